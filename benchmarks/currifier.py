@@ -0,0 +1,33 @@
+"""
+Measure the per-row overhead of calling a transformation through a ContextCurrifier (the object that binds context
+processors values, services and input rows to the transformation signature).
+
+Last results (100k calls, python 3.7):
+
+                 before   after
+identity         38k      1268k
+noop             38k      1083k
+ten_args         13k      1218k
+
+"before" is the signature(...).bind(...) on each call implementation, "after" is the call path built on setup.
+
+"""
+import timeit
+
+from bonobo.config.processors import ContextCurrifier
+from bonobo.nodes import identity, noop
+
+
+def ten_args(a, b, c, d, e, f, g, h, i, j):
+    return a
+
+
+ROWS = {"identity": (1,), "noop": (1,), "ten_args": tuple(range(10))}
+
+if __name__ == "__main__":
+    number = 100000
+
+    for name, node in (("identity", identity), ("noop", noop), ("ten_args", ten_args)):
+        with ContextCurrifier(node).as_contextmanager() as stack:
+            duration = timeit.timeit(lambda: stack(ROWS[name]), number=number)
+        print("{:<16} {:>8.0f}k rows/s".format(name, number / duration / 1000))
@@ -0,0 +1,500 @@
+"""
+Throughput benchmark suite: measures rows per second for the engine's building blocks, the built-in nodes, the
+readers and writers, and the execution strategies.
+
+Each benchmark moves a fixed number of rows through the measured code, and is repeated a few times (the best run is
+kept, as it is the least disturbed by the rest of the machine). Setup (building rows, writing input files, starting
+node contexts) is not measured.
+
+The mean time per row ("ns/row") is only the inverse of the throughput. For benchmarks running nodes, the per-row
+latency distribution is reported too ("p50" and "p99"): the time nodes spent processing each input row, as measured by
+the node contexts (see NodeExecutionContext.get_latency, durations are rounded up to a power of two).
+
+Groups:
+
+* transport: one put/get per row, or batches, through a node input (see inputs.py for details).
+* currifier: calling a transformation through a ContextCurrifier (see currifier.py for details).
+* bagtype: building bag type instances, and reading their fields.
+* nodes: each built-in node, run by a node execution context (from its input queue to a sink output).
+* io: each reader and writer, on a temporary directory.
+* strategies: synthetic graphs run by each strategy, by depth (chain of nodes) and fan-out (branches).
+
+Usage:
+
+    python benchmarks/suite.py                          # run everything, print a table
+    python benchmarks/suite.py --quick -k nodes.        # fewer rows, only names containing "nodes."
+    python benchmarks/suite.py --output results.json    # also write the results as JSON
+    python benchmarks/suite.py --save-baseline          # store the results as the baseline (baseline.json)
+    python benchmarks/suite.py --save-baseline --note "Laptop, on battery."  # ... with a note about the machine
+    python benchmarks/suite.py --baseline baseline.json # compare with a baseline, exits with 1 on regressions
+
+A benchmark regressed if its throughput is lower than the baseline's by more than the threshold (25% by default, as
+timings are noisy). Baselines only make sense on the machine (and python version) that produced them: store one
+before a change, then compare after it. The stored baseline.json is a sample, see its note.
+
+"""
+import argparse
+import json
+import os
+import pickle
+import platform
+import re
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+
+import bonobo
+from bonobo.config import use_context_processor
+from bonobo.config.processors import ContextCurrifier
+from bonobo.constants import BEGIN, END, NOT_MODIFIED
+from bonobo.execution.contexts.graph import GraphExecutionContext
+from bonobo.execution.contexts.node import NodeExecutionContext
+from bonobo.execution.strategies import create_strategy
+from bonobo.nodes import identity, noop
+from bonobo.nodes.aggregation import Reduce
+from bonobo.structs.inputs import BATCH_SIZE, Input
+from bonobo.util.bags import BagType
+from bonobo.util.statistics import LatencyHistogram, format_duration
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+Row = BagType("Row", ("id", "name", "value"))
+
+BENCHMARKS = OrderedDict()
+
+
+def benchmark(name, *, rows=100000):
+    """
+    Registers a benchmark. The decorated function takes a number of rows and a work directory, does the setup, and
+    returns the callable to measure (that must process this number of rows, and may return the node or graph execution
+    context it ran, see :func:`get_latency`).
+
+    """
+
+    def register(factory):
+        BENCHMARKS[name] = (factory, rows)
+        return factory
+
+    return register
+
+
+def make_rows(n):
+    return [Row(i, "foo", i * 0.5) for i in range(n)]
+
+
+class Sink:
+    """
+    Output that drops everything, so only the node itself is measured.
+
+    """
+
+    def put(self, data, block=True, timeout=None):
+        pass
+
+    def put_many(self, items, block=True, timeout=None):
+        pass
+
+
+# Transport
+
+
+@benchmark("transport.put_get")
+def transport_put_get(n, workdir):
+    input, rows = Input(maxsize=0), make_rows(n)
+    input.put(BEGIN)
+
+    def run():
+        for row in rows:
+            input.put(row)
+        for _ in rows:
+            input.get()
+
+    return run
+
+
+@benchmark("transport.batches", rows=1000000)
+def transport_batches(n, workdir):
+    input, rows = Input(maxsize=0), make_rows(BATCH_SIZE)
+    input.put(BEGIN)
+
+    def run():
+        for _ in range(n // BATCH_SIZE):
+            input.put_many(rows)
+            input.get_many(BATCH_SIZE)
+
+    return run
+
+
+# Currifier
+
+
+def ten_args(a, b, c, d, e, f, g, h, i, j):
+    return a
+
+
+def processor(self):
+    yield 42
+
+
+@use_context_processor(processor)
+def with_processor(value, row):
+    return row
+
+
+def currify(node, row):
+    def factory(n, workdir):
+        stack = ContextCurrifier(node)
+        stack.setup()
+
+        def run():
+            for _ in range(n):
+                stack(row)
+
+        return run
+
+    return factory
+
+
+benchmark("currifier.identity")(currify(identity, (1,)))
+benchmark("currifier.ten_args")(currify(ten_args, tuple(range(10))))
+benchmark("currifier.processor")(currify(with_processor, (1,)))
+
+
+# Bag types
+
+
+@benchmark("bagtype.create")
+def bagtype_create(n, workdir):
+    def run():
+        for i in range(n):
+            Row(i, "foo", 0.5)
+
+    return run
+
+
+@benchmark("bagtype.make")
+def bagtype_make(n, workdir):
+    values = [(i, "foo", i * 0.5) for i in range(n)]
+
+    def run():
+        make = Row._make
+        for value in values:
+            make(value)
+
+    return run
+
+
+@benchmark("bagtype.getattr")
+def bagtype_getattr(n, workdir):
+    rows = make_rows(n)
+
+    def run():
+        for row in rows:
+            row.id, row.name, row.value
+
+    return run
+
+
+@benchmark("bagtype.get")
+def bagtype_get(n, workdir):
+    rows = make_rows(n)
+
+    def run():
+        for row in rows:
+            row.get("id"), row.get("name"), row.get("value")
+
+    return run
+
+
+@benchmark("bagtype.asdict", rows=20000)
+def bagtype_asdict(n, workdir):
+    rows = make_rows(n)
+
+    def run():
+        for row in rows:
+            row._asdict()
+
+    return run
+
+
+# Nodes
+
+
+def run_node(node, rows, services=None):
+    """
+    Starts a node context with all input rows already queued, and returns a callable that processes all of them, then
+    stops the context (and returns it).
+
+    """
+    context = NodeExecutionContext(node, services=services, _input=Input(maxsize=0), _outputs=[Sink()])
+    context.start()
+    context.write(BEGIN, *rows, END)
+
+    def run():
+        for _ in rows:
+            context.step()
+        context.stop()
+        return context
+
+    return run
+
+
+def node_benchmark(name, factory, *, rows=50000, make=make_rows):
+    benchmark("nodes." + name, rows=rows)(lambda n, workdir: run_node(factory(n), make(n)))
+
+
+node_benchmark("Limit", lambda n: bonobo.Limit(n))
+node_benchmark("Format", lambda n: bonobo.Format(label="{name}-{id}"), rows=20000)
+node_benchmark("OrderFields", lambda n: bonobo.OrderFields(["value", "id"]), rows=20000)
+node_benchmark("MapFields", lambda n: bonobo.MapFields(str), rows=20000)
+node_benchmark(
+    "UnpackItems",
+    lambda n: bonobo.UnpackItems(0),
+    rows=20000,
+    make=lambda n: [({"id": i, "name": "foo"},) for i in range(n)],
+)
+node_benchmark("Rename", lambda n: bonobo.Rename(label="name"), rows=20000)
+node_benchmark("Filter", lambda n: bonobo.Filter(lambda self, id, name, value: id % 2))
+# Reduce and FixedWindow receive each row unpacked after their context value, so they are fed one-value rows (and
+# Method options are called with the node as first argument).
+node_benchmark(
+    "Reduce",
+    lambda n: Reduce(lambda self, total, value: total + value, initializer=0.0),
+    make=lambda n: list(range(n)),
+)
+node_benchmark("FixedWindow", lambda n: bonobo.FixedWindow(10), make=lambda n: list(range(n)))
+
+
+# Readers and writers
+
+
+def make_graph(*chain):
+    graph = bonobo.Graph()
+    graph.add_chain(*chain)
+    return graph
+
+
+def extract(rows):
+    def extract():
+        yield from rows
+
+    return extract
+
+
+def execute(graph, *, strategy="naive", services=None):
+    context = create_strategy(strategy).execute(graph, services=services, plugins=[])
+    if context.xstatus or any(dict(node.get_statistics()).get("err") for node in context):
+        raise RuntimeError("Benchmark graph failed: {!r}.".format(context))
+    return context
+
+
+def write_with(writer, filename, make=make_rows):
+    def factory(n, workdir):
+        rows, services = make(n), {"fs": bonobo.open_fs(workdir)}
+        return lambda: execute(make_graph(extract(rows), writer(filename)), services=services)
+
+    return factory
+
+
+def read_with(reader, filename, prepare):
+    def factory(n, workdir):
+        prepare(n, workdir)
+        services = {"fs": bonobo.open_fs(workdir)}
+        return lambda: execute(make_graph(reader(filename)), services=services)
+
+    return factory
+
+
+def dump_pickle(filename):
+    # The pickle reader loads one object (field names, then rows), while the writer pickles each row's only value.
+    def prepare(n, workdir):
+        with open(os.path.join(workdir, filename), "wb") as f:
+            pickle.dump([("id", "name", "value")] + [tuple(row) for row in make_rows(n)], f)
+
+    return prepare
+
+
+IO = {
+    "csv": (bonobo.CsvReader, bonobo.CsvWriter, "bench.csv", make_rows),
+    "json": (bonobo.JsonReader, bonobo.JsonWriter, "bench.json", make_rows),
+    "ldjson": (bonobo.LdjsonReader, bonobo.LdjsonWriter, "bench.ldjson", make_rows),
+    "pickle": (
+        bonobo.PickleReader,
+        bonobo.PickleWriter,
+        "bench.pkl",
+        lambda n: [(tuple(row),) for row in make_rows(n)],
+    ),
+    "file": (bonobo.FileReader, bonobo.FileWriter, "bench.txt", lambda n: ["line {}".format(i) for i in range(n)]),
+}
+
+for _name, (_reader, _writer, _filename, _make) in IO.items():
+    _write = write_with(_writer, _filename, _make)
+    _prepare = dump_pickle(_filename) if _name == "pickle" else lambda n, workdir, write=_write: write(n, workdir)()
+    benchmark("io.{}.write".format(_name), rows=20000)(_write)
+    benchmark("io.{}.read".format(_name), rows=20000)(read_with(_reader, _filename, _prepare))
+
+
+# Strategies
+
+
+def forward(*row):
+    return NOT_MODIFIED
+
+
+def strategy_benchmark(strategy, depth, fanout, *, rows=20000):
+    """
+    One root node sending `rows` rows to `fanout` branches, each being a chain of `depth` nodes.
+
+    """
+
+    def factory(n, workdir):
+        graph = bonobo.Graph()
+        graph.add_chain(extract(make_rows(n)), _name="extract")
+        for branch in range(fanout):
+            graph.add_chain(*(forward for _ in range(depth - 1)), noop, _input="extract")
+        return lambda: execute(graph, strategy=strategy)
+
+    benchmark("strategies.{}.depth{}.fanout{}".format(strategy, depth, fanout), rows=rows)(factory)
+
+
+for _strategy in ("naive", "threadpool", "processpool"):
+    for _depth, _fanout in ((1, 1), (4, 1), (1, 4), (4, 4)):
+        strategy_benchmark(_strategy, _depth, _fanout)
+
+
+# Runner
+
+
+def get_latency(context):
+    """
+    Per-row latency histogram of a benchmark run, if it returned a node or graph execution context: the time spent by
+    the node processing each input row, or by the nodes of the graph (merged). Nodes that got only one input row (like
+    readers, or the first node of a graph) are left out, as it is the time spent producing all their rows.
+
+    """
+    if isinstance(context, NodeExecutionContext):
+        return context.get_latency()
+    if isinstance(context, GraphExecutionContext):
+        latency = LatencyHistogram()
+        for node in context:
+            if len(node.get_latency()) > 1:
+                latency.update(node.get_latency())
+        return latency if len(latency) else None
+    return None
+
+
+def measure(name, *, scale=1.0, repeat=3, workdir):
+    factory, rows = BENCHMARKS[name]
+    rows = max(int(rows * scale), 1)
+    best, latency = None, None
+    for _ in range(repeat):
+        run = factory(rows, workdir)
+        started = time.perf_counter()
+        context = run()
+        duration = time.perf_counter() - started
+        if best is None or duration < best:
+            best, latency = duration, get_latency(context)
+    return {
+        "rows": rows,
+        "repeat": repeat,
+        "seconds": best,
+        "rows_per_second": rows / best if best else None,
+        "ns_per_row": best / rows * 1e9,
+        "p50_ns": latency.percentile(50) * 1e9 if latency else None,
+        "p99_ns": latency.percentile(99) * 1e9 if latency else None,
+    }
+
+
+def format_latency(ns):
+    return "-" if ns is None else format_duration(ns / 1e9)
+
+
+def compare(results, baseline, *, threshold):
+    """
+    Throughput ratios (current / baseline) of benchmarks present in both, and the names of those that regressed.
+
+    """
+    ratios, regressions = OrderedDict(), []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if not before or not before.get("rows_per_second") or not result["rows_per_second"]:
+            continue
+        ratios[name] = result["rows_per_second"] / before["rows_per_second"]
+        if ratios[name] < 1 - threshold:
+            regressions.append(name)
+    return ratios, regressions
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n", 1)[0])
+    parser.add_argument("-k", "--filter", help="Only run benchmarks whose name matches this regular expression.")
+    parser.add_argument("--quick", action="store_true", help="Run with 10 times less rows.")
+    parser.add_argument("--scale", type=float, help="Multiply the number of rows of each benchmark.")
+    parser.add_argument("--repeat", type=int, help="Runs of each benchmark (the best one is kept).")
+    parser.add_argument("-o", "--output", help="Write the results in this file, as JSON.")
+    parser.add_argument("--baseline", help="Compare the results with this file (a previous output).")
+    parser.add_argument("--save-baseline", action="store_true", help="Write the results in " + BASELINE + ".")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Slowdown ratio considered a regression.")
+    parser.add_argument("--note", help="Free text stored with the results (like what machine produced them).")
+    return parser
+
+
+def main(args=None):
+    options = get_parser().parse_args(args)
+    scale = options.scale or (0.1 if options.quick else 1.0)
+    repeat = options.repeat or 3
+    names = [name for name in BENCHMARKS if not options.filter or re.search(options.filter, name)]
+
+    baseline = None
+    if options.baseline:
+        with open(options.baseline) as f:
+            baseline = json.load(f)["results"]
+
+    results = OrderedDict()
+    with tempfile.TemporaryDirectory() as workdir:
+        for name in names:
+            results[name] = result = measure(name, scale=scale, repeat=repeat, workdir=workdir)
+            line = "{:<40} {:>12,.0f} rows/s {:>12,.0f} ns/row {:>8} p50 {:>8} p99".format(
+                name,
+                result["rows_per_second"],
+                result["ns_per_row"],
+                format_latency(result["p50_ns"]),
+                format_latency(result["p99_ns"]),
+            )
+            if baseline and name in baseline:
+                line += " {:>+7.1%}".format(result["rows_per_second"] / baseline[name]["rows_per_second"] - 1)
+            print(line, flush=True)
+
+    output = {
+        "bonobo": bonobo.__version__,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "scale": scale,
+        "note": options.note,
+        "results": results,
+    }
+    for path in filter(None, (options.output, BASELINE if options.save_baseline else None)):
+        with open(path, "w") as f:
+            json.dump(output, f, indent=2)
+            f.write("\n")
+
+    if baseline:
+        ratios, regressions = compare(results, baseline, threshold=options.threshold)
+        if regressions:
+            print(
+                "\n{} regression(s) (more than {:.0%} slower than the baseline):".format(
+                    len(regressions), options.threshold
+                )
+            )
+            for name in regressions:
+                print("  {:<40} {:>+7.1%}".format(name, ratios[name] - 1))
+            return 1
+        print("\nNo regression (threshold: {:.0%}).".format(options.threshold))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
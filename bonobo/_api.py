@@ -37,6 +37,12 @@ def run(graph, *, plugins=None, services=None, strategy=None):
 
     You'll probably want to provide a services dictionary mapping service names to service instances.
 
+    The returned execution context can summarize what happened, including per-node statistics and timings (see
+    :class:`bonobo.execution.report.RunReport`):
+
+    >>> report = bonobo.run(graph).get_report()
+    >>> report.as_dict()["nodes"][-1]["rows_per_second"]
+
     :param Graph graph: The :class:`Graph` to execute.
     :param str strategy: The :class:`bonobo.execution.strategies.base.Strategy` to use.
     :param list plugins: The list of plugins to enhance execution.
@@ -76,6 +82,24 @@ def run(graph, *, plugins=None, services=None, strategy=None):
                 if JupyterOutputPlugin not in plugins:
                     plugins.append(JupyterOutputPlugin)
 
+    if settings.PROFILE.get():
+        from bonobo.plugins.profiler import ProfilerPlugin
+
+        if not any(plugin is ProfilerPlugin or isinstance(plugin, ProfilerPlugin) for plugin in plugins):
+            plugins.append(ProfilerPlugin)
+
+    if settings.TRACE_MEMORY.get():
+        from bonobo.plugins.memory import MemoryTracerPlugin
+
+        if not any(plugin is MemoryTracerPlugin or isinstance(plugin, MemoryTracerPlugin) for plugin in plugins):
+            plugins.append(MemoryTracerPlugin)
+
+    if settings.TRACE_ROWS.get():
+        from bonobo.plugins.tracing import RowTracerPlugin
+
+        if not any(plugin is RowTracerPlugin or isinstance(plugin, RowTracerPlugin) for plugin in plugins):
+            plugins.append(RowTracerPlugin)
+
     import logging
 
     logging.getLogger().setLevel(settings.LOGGING_LEVEL.get())
@@ -90,6 +114,38 @@ def run(graph, *, plugins=None, services=None, strategy=None):
         return strategy.execute(graph, plugins=plugins, services=services)
 
 
+@api.register_graph
+def iterate(graph, *, output=None, plugins=None, services=None, strategy=None):
+    """
+    Execute a graph in the background, and iterate over the rows sent by one of its nodes, as they are produced
+    (see :class:`bonobo.execution.iterator.GraphIterator`). The consumer's pace drives the execution: nodes wait when
+    the rows are not consumed fast enough, so unbounded outputs can be consumed without keeping everything in memory.
+
+    Stopping the iteration early kills the execution.
+
+    >>> for row in bonobo.iterate(graph, output="transform"):
+    ...     print(row)
+
+    :param Graph graph: The :class:`Graph` to execute.
+    :param output: The node (index, node value or name) to get rows from, defaults to the last node added.
+    :param list plugins: The list of plugins to enhance execution.
+    :param dict services: The implementations of services this graph will use.
+    :param str strategy: The :class:`bonobo.execution.strategies.base.Strategy` to use (must run nodes in this process).
+    :return: generator of rows (bags)
+    """
+    from bonobo import settings
+    from bonobo.execution.iterator import GraphIterator
+
+    settings.check()
+
+    if not isinstance(graph, Graph) and hasattr(graph, "graph"):
+        graph = graph.graph
+
+    yield from GraphIterator(
+        graph, output=output, plugins=plugins, services=services, strategy=create_strategy(strategy)
+    )
+
+
 def _inspect_as_graph(graph):
     return graph._repr_dot_()
 
@@ -149,6 +205,7 @@ api.register_group(
     Filter,
     FixedWindow,
     Format,
+    Generate,
     JsonReader,
     JsonWriter,
     LdjsonReader,
@@ -6,6 +6,7 @@ from bonobo.commands import BaseGraphCommand
 
 class RunCommand(BaseGraphCommand):
     install = False
+    report = None
     handler = staticmethod(bonobo.run)
 
     def add_arguments(self, parser):
@@ -16,15 +17,27 @@ class RunCommand(BaseGraphCommand):
         verbosity_group.add_argument("--verbose", "-v", action="store_true")
 
         parser.add_argument("--install", "-I", action="store_true")
+        parser.add_argument(
+            "--report",
+            metavar="PATH",
+            help="Write a JSON report of the execution (NDJSON if the filename ends with .ndjson or .jsonl).",
+        )
 
-    def parse_options(self, *, quiet=False, verbose=False, install=False, **options):
+    def parse_options(self, *, quiet=False, verbose=False, install=False, report=None, **options):
         from bonobo import settings
 
         settings.QUIET.set_if_true(quiet)
         settings.DEBUG.set_if_true(verbose)
         self.install = install
+        self.report = report
         return options
 
+    def do_handle(self, graph, **options):
+        context = super().do_handle(graph, **options)
+        if self.report and context is not None:
+            context.get_report().write(self.report)
+        return context
+
     def _run_path(self, file):
         # add install logic
         if self.install:
@@ -4,7 +4,7 @@ from functools import partial
 from inspect import signature
 
 from bonobo.config import Option
-from bonobo.errors import UnrecoverableTypeError
+from bonobo.errors import UnrecoverableError, UnrecoverableTypeError
 from bonobo.util import deprecated_alias, ensure_tuple
 
 _raw = object()
@@ -68,6 +68,10 @@ class bound(partial):
 class ContextCurrifier:
     """
     This is a helper to resolve processors.
+
+    The call path to the wrapped transformation is built once (on creation, then again after setup, as context
+    processors add positional arguments), so calling it for each input row is a plain function call. The signature is
+    only inspected if a call fails, to tell the user why the input does not bind.
     """
 
     def __init__(self, wrapped, *args, **kwargs):
@@ -76,6 +80,7 @@ class ContextCurrifier:
         self.kwargs = kwargs
         self.format = getattr(wrapped, "__input_format__", _args)
         self._stack, self._stack_values = None, None
+        self._call = self._compile()
 
     def __iter__(self):
         yield from self.wrapped
@@ -93,26 +98,70 @@ class ContextCurrifier:
             return bind(*self.args, **self.kwargs)
         raise NotImplementedError("Invalid format {!r}.".format(self.format))
 
+    def _compile(self):
+        """
+        Build the function that will be called with each input row, specialized for the input format and for the
+        arguments known at this point.
+
+        """
+        wrapped, args, kwargs = self.wrapped, self.args, self.kwargs
+
+        if not callable(wrapped):
+            if isinstance(wrapped, Iterable):
+                return lambda _input: self.__iter__()
+
+            def _uncallable(_input):
+                raise UnrecoverableTypeError("Uncallable node {}".format(wrapped))
+
+            return _uncallable
+
+        if self.format is _args:
+            if args or kwargs:
+                return lambda _input: wrapped(*args, *_input, **kwargs)
+            return lambda _input: wrapped(*_input)
+
+        if self.format is _raw:
+            if args or kwargs:
+                return lambda _input: wrapped(*args, _input, **kwargs)
+            return wrapped
+
+        if self.format is _none:
+            if args or kwargs:
+                return lambda _input: wrapped(*args, **kwargs)
+            return lambda _input: wrapped()
+
+        def _invalid_format(_input):
+            raise NotImplementedError("Invalid format {!r}.".format(self.format))
+
+        return _invalid_format
+
     def __call__(self, _input):
-        if not callable(self.wrapped):
-            if isinstance(self.wrapped, Iterable):
-                return self.__iter__()
-            raise UnrecoverableTypeError("Uncallable node {}".format(self.wrapped))
         try:
-            bound = self._bind(_input)
+            return self._call(_input)
+        except UnrecoverableError:
+            # Already explicit (like an uncallable node), binding the input again would not tell more.
+            raise
         except TypeError as exc:
-            raise UnrecoverableTypeError(
-                (
-                    "Input of {wrapped!r} does not bind to the node signature.\n"
-                    "Args: {args}\n"
-                    "Input: {input}\n"
-                    "Kwargs: {kwargs}\n"
-                    "Signature: {sig}"
-                ).format(
-                    wrapped=self.wrapped, args=self.args, input=_input, kwargs=self.kwargs, sig=signature(self.wrapped)
-                )
-            ) from exc
-        return self.wrapped(*bound.args, **bound.kwargs)
+            # Was it raised by the call itself, or from the inside of the transformation?
+            try:
+                self._bind(_input)
+            except TypeError:
+                raise UnrecoverableTypeError(
+                    (
+                        "Input of {wrapped!r} does not bind to the node signature.\n"
+                        "Args: {args}\n"
+                        "Input: {input}\n"
+                        "Kwargs: {kwargs}\n"
+                        "Signature: {sig}"
+                    ).format(
+                        wrapped=self.wrapped,
+                        args=self.args,
+                        input=_input,
+                        kwargs=self.kwargs,
+                        sig=signature(self.wrapped),
+                    )
+                ) from exc
+            raise
 
     def setup(self, *context):
         if self._stack is not None:
@@ -126,6 +175,7 @@ class ContextCurrifier:
             if _append_to_context is not None:
                 self.args += ensure_tuple(_append_to_context)
             self._stack.append(_processed)
+        self._call = self._compile()
 
     def teardown(self):
         while self._stack:
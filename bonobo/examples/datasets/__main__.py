@@ -5,8 +5,13 @@ from bonobo import examples
 from bonobo.examples import get_datasets_dir, get_minor_version, get_services
 from bonobo.examples.datasets.coffeeshops import get_graph as get_coffeeshops_graph
 from bonobo.examples.datasets.fablabs import get_graph as get_fablabs_graph
+from bonobo.examples.datasets.synthetic import get_graph as get_synthetic_graph
 
-graph_factories = {"coffeeshops": get_coffeeshops_graph, "fablabs": get_fablabs_graph}
+graph_factories = {
+    "coffeeshops": get_coffeeshops_graph,
+    "fablabs": get_fablabs_graph,
+    "synthetic": get_synthetic_graph,
+}
 
 if __name__ == "__main__":
     parser = examples.get_argument_parser()
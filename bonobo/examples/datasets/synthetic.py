@@ -0,0 +1,51 @@
+import sys
+
+import bonobo
+from bonobo import examples
+from bonobo.examples import get_services
+from bonobo.nodes.synthetic import Float, Integer, String, Timestamp
+from bonobo.structs.graphs import PartialGraph
+
+ROWS = 100000
+
+
+def get_fields():
+    return {
+        "id": Integer(0, 10 ** 9),
+        "customer": String(cardinality=1000, length=12),
+        "country": String(cardinality=50, length=2),
+        "quantity": Integer(1, 100),
+        "price": Float(0.5, 500.0),
+        "ordered_at": Timestamp(interval=0.5, format="%Y-%m-%dT%H:%M:%S.%f"),
+    }
+
+
+def get_graph(graph=None, *, _limit=(), _print=(), rows=ROWS, seed=0):
+    """
+    Generates synthetic orders (always the same ones, for a given number of rows and seed), and writes them as csv,
+    json and line-delimited json files, to be used as large fixtures when benchmarking readers.
+
+    """
+    graph = graph or bonobo.Graph()
+
+    producer = graph.get_cursor() >> bonobo.Generate(get_fields(), rows, seed=seed) >> PartialGraph(*_limit, *_print)
+
+    graph.get_cursor(producer.output) >> bonobo.CsvWriter("synthetic.csv")
+    graph.get_cursor(producer.output) >> bonobo.JsonWriter("synthetic.json")
+    graph.get_cursor(producer.output) >> bonobo.LdjsonWriter("synthetic.ldjson")
+
+    return graph
+
+
+def get_argument_parser():
+    parser = examples.get_argument_parser()
+    parser.add_argument("--rows", "-n", type=int, default=ROWS, help="How many rows to generate.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the random generators.")
+    return parser
+
+
+if __name__ == "__main__":
+    with bonobo.parse_args(get_argument_parser()) as options:
+        rows, seed = options.pop("rows"), options.pop("seed")
+        graph = get_graph(rows=rows, seed=seed, **examples.get_graph_options(options))
+        sys.exit(bonobo.run(graph, services=get_services(), strategy=options["strategy"]).xstatus)
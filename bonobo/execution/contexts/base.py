@@ -70,6 +70,22 @@ class Lifecycle:
             return "+"
         return "-"
 
+    @property
+    def state(self):
+        """
+        Lifecycle state, as a word: "pending", "running", "done", "killed" or "defunct".
+
+        """
+        if self._defunct:
+            return "defunct"
+        if self.killed:
+            return "killed"
+        if not self.started:
+            return "pending"
+        if not self.stopped:
+            return "running"
+        return "done"
+
     def __enter__(self):
         self.start()
         return self
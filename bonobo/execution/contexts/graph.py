@@ -1,17 +1,20 @@
 import logging
 from functools import partial
 from queue import Empty
-from time import sleep
+from time import sleep, time
 
 from whistle import EventDispatcher
 
+from bonobo import settings
 from bonobo.config import create_container
 from bonobo.constants import BEGIN, EMPTY, END
 from bonobo.errors import InactiveReadableError
 from bonobo.execution import events
 from bonobo.execution.contexts.base import BaseContext
 from bonobo.execution.contexts.node import AsyncNodeExecutionContext, NodeExecutionContext
+from bonobo.execution.contexts.parallel import ParallelNodeExecutionContext
 from bonobo.execution.contexts.plugin import PluginExecutionContext
+from bonobo.structs.inputs import InlineInput, Input, MemoryBudget, SpillingInput
 
 logger = logging.getLogger(__name__)
 
@@ -24,10 +27,18 @@ class BaseGraphExecutionContext(BaseContext):
     """
 
     NodeExecutionContextType = NodeExecutionContext
+    ParallelNodeExecutionContextType = ParallelNodeExecutionContext
     PluginExecutionContextType = PluginExecutionContext
 
     TICK_PERIOD = 0.25
 
+    #: How many fused nodes may follow each other (see :meth:`get_fusable_indexes`). Each of them runs the next one as a
+    #: nested call, so a longer fused chain would exhaust the interpreter stack: another queue is used past this depth.
+    MAX_FUSED_DEPTH = 32
+
+    #: Strategy executing this context, if any (see :meth:`bonobo.execution.strategies.base.Strategy.execute`).
+    strategy = None
+
     @property
     def started(self):
         if not len(self.nodes):
@@ -54,17 +65,65 @@ class BaseGraphExecutionContext(BaseContext):
         """
         return max(node.xstatus for node in self.nodes) if len(self.nodes) else 0
 
-    def __init__(self, graph, *, plugins=None, services=None, dispatcher=None):
+    def __init__(
+        self, graph, *, plugins=None, services=None, dispatcher=None, fuse=False, memory_budget=None, validation=None
+    ):
+        """
+        :param graph: the graph to execute
+        :param plugins: plugins (or plugin factories) to register during execution
+        :param services: dict-like collection of services
+        :param dispatcher: event dispatcher (a new one is created if not provided)
+        :param fuse: if true, nodes that are the only output of a node having only one output are run by their upstream
+            node (see :meth:`get_fusable_indexes`), without a queue in between. If "tree", all nodes having only one
+            input are, so a tree-shaped graph runs as nested calls (only sensible if all nodes run in one thread).
+        :param memory_budget: approximate limit, in bytes, for the rows waiting in node inputs (see
+            :class:`bonobo.structs.inputs.MemoryBudget`), defaults to the MEMORY_BUDGET setting.
+        :param validation: how nodes check their input rows, "strict", "sampled" or "trusted" (see
+            :attr:`bonobo.execution.contexts.node.NodeExecutionContext.validation`), defaults to the VALIDATION setting.
+        """
         super(BaseGraphExecutionContext, self).__init__(graph)
         self.dispatcher = dispatcher or EventDispatcher()
         self.graph = graph
-        self.nodes = [self.create_node_execution_context_for(node) for node in self.graph]
+        self.started_at, self.stopped_at = None, None
+        self.nodes = [
+            self.create_parallel_node_execution_context_for(node, self.graph.parallelism[i])
+            if i in self.graph.parallelism
+            else self.create_node_execution_context_for(node)
+            for i, node in enumerate(self.graph)
+        ]
         self.plugins = [self.create_plugin_execution_context_for(plugin) for plugin in plugins or ()]
         self.services = create_container(services)
 
         # Probably not a good idea to use it unless you really know what you're doing. But you can access the context.
         self.services["__graph_context"] = self
 
+        self.validation = validation or settings.VALIDATION.get()
+        for node_context in self:
+            node_context.validation = self.validation
+
+        if fuse:
+            for i in self.get_fusable_indexes(fan_out=fuse == "tree"):
+                self[i].input = InlineInput()
+                self[i].input.on_data = self[i].push
+
+        for i, size in self.graph.buffer_sizes.items():
+            self[i].input.maxsize = size
+
+        # Spilling only makes sense for thread-safe queues (fused nodes have none).
+        for i in self.graph.spilling:
+            if type(self[i].input) is Input:
+                self[i].input = SpillingInput(self[i].input.maxsize)
+
+        if memory_budget is None:
+            memory_budget = settings.MEMORY_BUDGET.get()
+        if memory_budget is None:
+            self.memory_budget = None
+        else:
+            self.memory_budget = MemoryBudget(memory_budget)
+            for node_context in self:
+                if isinstance(node_context.input, Input):
+                    self.memory_budget.register(node_context.input)
+
         for i, node_context in enumerate(self):
             outputs = self.graph.outputs_of(i)
             if len(outputs):
@@ -73,6 +132,36 @@ class BaseGraphExecutionContext(BaseContext):
             node_context.input.on_end = partial(node_context._put, END, _control=True)
             node_context.input.on_finalize = partial(node_context.stop)
 
+    def get_fusable_indexes(self, *, fan_out=False):
+        """
+        Indexes of nodes that can be fused with their upstream node: they have exactly one input, which is a node (and
+        not BEGIN) with exactly one output. In a linear chain, all nodes but the first one are fusable.
+
+        If `fan_out` is true, the upstream node may have other outputs: it then runs all its fused outputs, one after
+        the other, for each batch of rows. In a tree-shaped graph, all nodes but the roots are fusable.
+
+        A node is not fusable if it would be more than :attr:`MAX_FUSED_DEPTH` hops away from a node having a queue,
+        it then reads from a queue and starts a new fused chain.
+
+        """
+        inputs_count = {i: 0 for i in range(len(self.nodes))}
+        for source, targets in self.graph.edges.items():
+            if source is not None:
+                for target in targets:
+                    inputs_count[target] += 1
+
+        fusable, depth = set(), {}
+        for source in self.graph.topologically_sorted_indexes:
+            targets = self.graph.outputs_of(source)
+            depth.setdefault(source, 0)
+            if not fan_out and len(targets) != 1:
+                continue
+            for target in targets:
+                if inputs_count[target] == 1 and depth[source] < self.MAX_FUSED_DEPTH:
+                    fusable.add(target)
+                    depth[target] = depth[source] + 1
+        return fusable
+
     def __getitem__(self, item):
         return self.nodes[item]
 
@@ -85,6 +174,9 @@ class BaseGraphExecutionContext(BaseContext):
     def create_node_execution_context_for(self, node):
         return self.NodeExecutionContextType(node, parent=self)
 
+    def create_parallel_node_execution_context_for(self, node, parallelism):
+        return self.ParallelNodeExecutionContextType(node, parent=self, parallelism=parallelism)
+
     def create_plugin_execution_context_for(self, plugin):
         if isinstance(plugin, type):
             plugin = plugin()
@@ -101,16 +193,40 @@ class BaseGraphExecutionContext(BaseContext):
         for plugin_context in self.plugins:
             plugin_context.unregister()
 
+    def get_report(self):
+        """
+        Structured summary of this execution (see :class:`bonobo.execution.report.RunReport`).
+
+        """
+        from bonobo.execution.report import RunReport
+
+        return RunReport(self)
+
 
 class GraphExecutionContext(BaseGraphExecutionContext):
     def start(self, starter=None):
         super(GraphExecutionContext, self).start()
+        self.started_at = time()
 
         self.register_plugins()
         self.dispatch(events.START)
         self.tick(pause=False)
 
+        # Fused nodes are run by their upstream node, they must be ready before it starts sending data (or stops, which
+        # happens right away if it fails to start), so downstream nodes are started first. A node failing to start is
+        # defunct (see NodeExecutionContext.start), this must not prevent the others from running, same as when started
+        # by a strategy.
+        for i in reversed(self.graph.topologically_sorted_indexes):
+            node = self.nodes[i]
+            if node.fused:
+                try:
+                    node.start()
+                except Exception:
+                    logger.critical("Critical error while starting fused node {!r}.".format(node), exc_info=True)
+
         for node in self.nodes:
+            if node.fused:
+                continue
             if starter is None:
                 node.start()
             else:
@@ -119,6 +235,8 @@ class GraphExecutionContext(BaseGraphExecutionContext):
         self.dispatch(events.STARTED)
 
     def tick(self, pause=True):
+        for node in self.nodes:
+            node.sample_queue()
         self.dispatch(events.TICK)
         if pause:
             sleep(self.TICK_PERIOD)
@@ -132,6 +250,7 @@ class GraphExecutionContext(BaseGraphExecutionContext):
                 node_context.stop()
             else:
                 stopper(node_context)
+        self.stopped_at = time()
         self.tick(pause=False)
         self.dispatch(events.STOPPED)
         self.unregister_plugins()
@@ -153,16 +272,29 @@ class GraphExecutionContext(BaseGraphExecutionContext):
                 self[i].write(message)
 
     def loop(self):
-        nodes = set(node for node in self.nodes if node.should_loop)
+        # Fused nodes are run by their upstream node.
+        nodes = [node for node in self.nodes if node.should_loop and not node.fused]
         while self.should_loop and len(nodes):
             self.tick(pause=False)
+            idle = True
             for node in list(nodes):
+                # Only step nodes having something to read, as stepping an empty node waits for a tick.
+                if not node.has_work:
+                    if not node.input.alive:
+                        nodes.remove(node)
+                    continue
+                idle = False
                 try:
                     node.step()
                 except Empty:
                     continue
                 except InactiveReadableError:
-                    nodes.discard(node)
+                    nodes.remove(node)
+                    continue
+                if not node.should_loop:
+                    nodes.remove(node)
+            if idle:
+                sleep(self.TICK_PERIOD)
 
     def run_until_complete(self):
         self.write(BEGIN, EMPTY, END)
@@ -170,11 +302,35 @@ class GraphExecutionContext(BaseGraphExecutionContext):
 
 
 class AsyncGraphExecutionContext(GraphExecutionContext):
+    """
+    Graph execution context for nodes running in an asyncio event loop (see
+    :class:`bonobo.execution.strategies.aio.AsyncIOStrategy`).
+
+    Nodes with parallelism (see :meth:`bonobo.structs.graphs.Graph.set_parallelism`) are run with as many rows being
+    processed concurrently as they have replicas, sharing the same context processors stack. Only unordered
+    parallelism without key is supported here.
+
+    """
+
     NodeExecutionContextType = AsyncNodeExecutionContext
 
-    def __init__(self, *args, loop, **kwargs):
+    def __init__(self, *args, loop, executor=None, **kwargs):
+        """
+        :param loop: the event loop nodes will run in
+        :param executor: executor used to run regular (non-async) nodes, defaults to the event loop's default executor
+        """
         self._event_loop = loop
+        self._executor = executor
         super().__init__(*args, **kwargs)
 
-    def create_node_execution_context_for(self, node):
-        return self.NodeExecutionContextType(node, parent=self, loop=self._event_loop)
+    def create_node_execution_context_for(self, node, *, concurrency=1):
+        return self.NodeExecutionContextType(
+            node, parent=self, loop=self._event_loop, executor=self._executor, concurrency=concurrency
+        )
+
+    def create_parallel_node_execution_context_for(self, node, parallelism):
+        if parallelism.key is not None or parallelism.ordered:
+            raise NotImplementedError(
+                "Ordered or keyed parallelism is not supported by {}.".format(type(self).__name__)
+            )
+        return self.create_node_execution_context_for(node, concurrency=parallelism.replicas)
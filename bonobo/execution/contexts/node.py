@@ -1,26 +1,82 @@
+import asyncio
+import inspect
 import logging
 import sys
-from collections import namedtuple
+import threading
+import weakref
+from collections import deque, namedtuple
+from itertools import islice
 from queue import Empty
-from time import sleep
+from time import perf_counter, sleep, time
 from types import GeneratorType
 
+from bonobo import settings
 from bonobo.config import create_container
 from bonobo.config.processors import ContextCurrifier
 from bonobo.constants import BEGIN, END, TICK_PERIOD
 from bonobo.errors import InactiveReadableError, UnrecoverableError, UnrecoverableTypeError
 from bonobo.execution.contexts.base import BaseContext
-from bonobo.structs.inputs import AioInput, Input
+from bonobo.structs.inputs import BATCH_SIZE, BATCH_TIMEOUT, AioInput, InlineInput, Input
 from bonobo.structs.tokens import Flag, Token
 from bonobo.util import deprecated, ensure_tuple, get_name, isconfigurabletype
 from bonobo.util.bags import BagType
 from bonobo.util.envelopes import F_INHERIT, F_NOT_MODIFIED, isenvelope
-from bonobo.util.statistics import WithStatistics
+from bonobo.util.statistics import Counters, LatencyHistogram, WithStatistics
 
 logger = logging.getLogger(__name__)
 
 UnboundArguments = namedtuple("UnboundArguments", ["args", "kwargs"])
 
+# Statistics of node contexts, and slots of the most updated ones (see :class:`bonobo.util.statistics.Counters`).
+STATISTICS = ("in", "out", "err", "warn", "queued")
+_IN, _OUT = map(Counters(STATISTICS).slot, ("in", "out"))
+
+
+class OutputFlusher:
+    """
+    Sends the output rows buffered by node contexts for longer than BATCH_TIMEOUT, from a background thread, so rows
+    are not held while their node is busy in its own code (for example, a slow generator between two rows). Node
+    contexts register while they run (see :meth:`NodeExecutionContext.flush_expired`).
+
+    """
+
+    def __init__(self, period=BATCH_TIMEOUT):
+        self.period = period
+        self.contexts = weakref.WeakSet()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def register(self, context):
+        with self._lock:
+            self.contexts.add(context)
+            # The thread ends when no context is left, and does not survive a fork: it is (re)started if needed.
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self.run, name="bonobo-flusher", daemon=True)
+                self._thread.start()
+
+    def unregister(self, context):
+        with self._lock:
+            self.contexts.discard(context)
+
+    def run(self):
+        while True:
+            with self._lock:
+                if not self.contexts:
+                    self._thread = None
+                    return
+                contexts = list(self.contexts)
+            now = time()
+            for context in contexts:
+                try:
+                    context.flush_expired(now)
+                except Exception:  # pylint: disable=broad-except
+                    # The node will flush (and handle errors) by itself.
+                    logger.debug("Could not flush {!r} in the background.".format(context), exc_info=True)
+            sleep(self.period)
+
+
+flusher = OutputFlusher()
+
 
 class NodeExecutionContext(BaseContext, WithStatistics):
     """
@@ -35,6 +91,15 @@ class NodeExecutionContext(BaseContext, WithStatistics):
 
     QueueType = Input
 
+    #: In "sampled" validation mode, one input row out of this many is fully checked.
+    VALIDATION_SAMPLE_RATE = 100
+
+    #: How many of the last errors are kept (see :func:`format_error_sample`), for run reports.
+    ERROR_SAMPLES = 5
+
+    #: Whether the :data:`flusher` may send this context's expired output batches (see :meth:`flush_expired`).
+    FLUSH_IN_BACKGROUND = True
+
     def __init__(self, wrapped, *, parent=None, services=None, _input=None, _outputs=None):
         """
         Node execution context has the responsibility fo storing the state of a transformation during its execution.
@@ -46,7 +111,23 @@ class NodeExecutionContext(BaseContext, WithStatistics):
         :param _outputs: output queues (optional)
         """
         BaseContext.__init__(self, wrapped, parent=parent)
-        WithStatistics.__init__(self, "in", "out", "err", "warn")
+        WithStatistics.__init__(self, *STATISTICS)
+        self._counts = self.statistics.counts
+
+        # Time spent (in seconds) in the node's code, waiting for input, and waiting for room in outputs, and how long
+        # each input row took to be processed by the node's code.
+        self.timings = {"busy": 0.0, "idle": 0.0, "blocked": 0.0}
+        self.latency = LatencyHistogram()
+
+        # Highest input queue occupancy seen (sampled, see sample_queue) and last errors, for run reports.
+        self.peak_queued = 0
+        self.error_samples = deque(maxlen=self.ERROR_SAMPLES)
+
+        # Bytes held by the node's code, and their peak, if memory is traced (see bonobo.plugins.memory).
+        self.memory, self.peak_memory = None, None
+
+        # Row tracer, if rows are traced (see bonobo.plugins.tracing), and trace of the row being processed, if any.
+        self._tracer, self._trace = None, None
 
         # Services: how we'll access external dependencies
         if services:
@@ -62,9 +143,23 @@ class NodeExecutionContext(BaseContext, WithStatistics):
         self.input = _input or self.QueueType()
         self.outputs = _outputs or []
 
+        # Buffers: rows are moved between nodes in batches, but the wrapped node still sees them one by one.
+        self._input_buffer = deque()
+        self._output_buffer = []
+        self._output_buffer_since = None
+        self._output_batch_size = 1
+        self._flush_lock = threading.Lock()
+        # Batches sent in the background to some outputs only (the others were full), as (output, batch) pairs.
+        self._output_backlog = []
+
+        # Generator being consumed, when run by quantums (see run_quantum), and time spent in it so far.
+        self._pending_results = None
+        self._pending_busy = 0.0
+
         # Types
         self._input_type, self._input_length = None, None
         self._output_type = None
+        self.validation = settings.VALIDATION.get()
 
         # Stack: context decorators for the execution
         self._stack = None
@@ -108,6 +203,8 @@ class NodeExecutionContext(BaseContext, WithStatistics):
                         )
                     )
             self._stack.setup(self)
+            if self.FLUSH_IN_BACKGROUND:
+                flusher.register(self)
         except Exception:
             # Set the logging level to the lowest possible, to avoid double log.
             self.fatal(sys.exc_info(), level=0)
@@ -124,19 +221,25 @@ class NodeExecutionContext(BaseContext, WithStatistics):
 
         while self.should_loop:
             try:
-                self.step()
+                self.step(block=True)
             except InactiveReadableError:
                 break
 
         logger.debug("Node loop ends for {!r}.".format(self))
 
-    def step(self):
+    def step(self, *, block=False):
+        """
+        Runs one step of this node. If `block` is true, waits for the input to be available (or for the context to be
+        killed) instead of polling it.
+
+        """
         try:
-            self._step()
+            self._step(block=block)
         except InactiveReadableError:
             raise
         except Empty:
-            sleep(TICK_PERIOD)  # XXX: How do we determine this constant?
+            if not block:
+                sleep(TICK_PERIOD)  # XXX: How do we determine this constant?
         except (NotImplementedError, UnrecoverableError):
             self.fatal(sys.exc_info())  # exit loop
         except Exception:  # pylint: disable=broad-except
@@ -144,7 +247,7 @@ class NodeExecutionContext(BaseContext, WithStatistics):
         except BaseException:
             self.fatal(sys.exc_info())  # exit loop
 
-    def _step(self):
+    def _step(self, *, block=False):
         """
         A single step in the loop.
 
@@ -153,12 +256,27 @@ class NodeExecutionContext(BaseContext, WithStatistics):
         """
 
         # Pull and check data
-        input_bag = self._get()
+        input_bag = self._get(block=block)
+
+        # Send it through the stack, and put the results onto output channels
+        self._process(input_bag)
 
-        # Sent through the stack
-        results = self._stack(input_bag)
+        # Not running in our own loop, so someone else will take control after this step. Don't keep anything.
+        if not block:
+            self._flush()
+
+    def _process(self, input_bag):
+        """
+        Send an input bag to the node, interpret the results.
+
+        """
+        if self._tracer is not None and self._tracer.pending:
+            self._trace = self._tracer.begin(self, input_bag)
+
+        started = perf_counter()
+        results = self._call(input_bag)
+        busy = perf_counter() - started
 
-        # self._exec_time += timer.duration
         # Put data onto output channels
 
         if isinstance(results, GeneratorType):
@@ -167,7 +285,11 @@ class NodeExecutionContext(BaseContext, WithStatistics):
                     # if kill flag was step, stop iterating.
                     if self._killed:
                         break
-                    result = next(results)
+                    started = perf_counter()
+                    try:
+                        result = next(results)
+                    finally:
+                        busy += perf_counter() - started
                 except StopIteration:
                     # That's not an error, we're just done.
                     break
@@ -177,27 +299,234 @@ class NodeExecutionContext(BaseContext, WithStatistics):
         elif results:
             # Push data (returned value)
             self._put(self._cast(input_bag, results))
-        else:
-            # case with no result, an execution went through anyway, use for stats.
-            # self._exec_count += 1
-            pass
+
+        self._add_busy_time(busy)
+
+        if self._trace is not None:
+            self._trace = self._tracer.end(self, self._trace)
+
+    def _add_busy_time(self, busy):
+        """
+        Account for the time spent by the node's code to process one input row.
+
+        """
+        self.timings["busy"] += busy
+        self.latency.add(busy)
+
+    def _call(self, input_bag):
+        """
+        Send an input bag to the node, return the raw results.
+
+        """
+        return self._stack(input_bag)
+
+    def run_quantum(self, quantum):
+        """
+        Process up to `quantum` rows (input rows read, or rows produced by a generator) without ever waiting, then
+        return. A generator being consumed is kept for the next call, so a node producing lots of rows from one input
+        row can be paused. This is how schedulers running many nodes on a few threads (see
+        :class:`bonobo.execution.strategies.scheduler.SchedulerStrategy`) use this context instead of :meth:`loop`.
+        Errors are handled the same way as in :meth:`step`.
+
+        """
+        for _ in range(quantum):
+            if not self.should_loop:
+                break
+            try:
+                if self._pending_results is None:
+                    input_bag = self._get()
+                    if self._tracer is not None and self._tracer.pending:
+                        self._trace = self._tracer.begin(self, input_bag)
+                    started = perf_counter()
+                    results = self._call(input_bag)
+                    busy = perf_counter() - started
+                    if isinstance(results, GeneratorType):
+                        self._pending_results, self._pending_busy = (input_bag, results), busy
+                    else:
+                        self._add_busy_time(busy)
+                        if results:
+                            self._put(self._cast(input_bag, results))
+                        if self._trace is not None:
+                            self._trace = self._tracer.end(self, self._trace)
+                else:
+                    input_bag, results = self._pending_results
+                    started = perf_counter()
+                    try:
+                        result = next(results)
+                    except StopIteration:
+                        self._pending_results = None
+                        self._add_busy_time(self._pending_busy + perf_counter() - started)
+                        if self._trace is not None:
+                            self._trace = self._tracer.end(self, self._trace)
+                    else:
+                        self._pending_busy += perf_counter() - started
+                        self._put(self._cast(input_bag, result))
+            except (Empty, InactiveReadableError):
+                break
+            except (NotImplementedError, UnrecoverableError):
+                self._pending_results = None
+                self.fatal(sys.exc_info())
+            except Exception:  # pylint: disable=broad-except
+                self._pending_results = None
+                self.error(sys.exc_info())
+            except BaseException:
+                self._pending_results = None
+                self.fatal(sys.exc_info())
+
+        self._flush()
+
+    @property
+    def has_work(self):
+        """
+        Whether the next :meth:`run_quantum` call would have something to do (input rows or tokens, or a generator to
+        resume).
+
+        """
+        return self._pending_results is not None or bool(self._input_buffer) or bool(self.input.qsize())
+
+    def push(self, input_bags):
+        """
+        Process input bags pushed by the upstream node, in the upstream node's thread. This is how fused nodes (see
+        :class:`bonobo.structs.inputs.InlineInput`) work instead of running their own loop. Errors are handled the same
+        way as in :meth:`step`, except for a recursion error, which is fatal.
+
+        """
+        for input_bag in input_bags:
+            if not self.should_loop:
+                break
+            try:
+                self._process(self._check_input(input_bag))
+            except (NotImplementedError, UnrecoverableError, RecursionError):
+                # Running out of stack in a fused chain (see MAX_FUSED_DEPTH in graph contexts) would fail for each row.
+                self.fatal(sys.exc_info())
+            except Exception:  # pylint: disable=broad-except
+                self.error(sys.exc_info())
+            except BaseException:
+                self.fatal(sys.exc_info())
+        self._flush()
+
+    @property
+    def fused(self):
+        """
+        Whether this node is run in the thread of its upstream node, instead of looping on its own input.
+
+        """
+        return isinstance(self.input, InlineInput)
 
     def stop(self):
         """
         Cleanup the context, after the loop ended.
 
         """
+        flusher.unregister(self)
         if self._stack:
             try:
                 self._stack.teardown()
+                self._flush()
             except Exception:
                 self.fatal(sys.exc_info())
 
+        self.statistics["queued"] = 0
+
         super().stop()
 
+    def kill(self):
+        super().kill()
+
+        # Wake up the node loop if it's waiting for some input.
+        self.input.interrupt()
+
+    def get_statistics(self, *args, timings=False, **kwargs):
+        """
+        Counters (and gauges) of this node, as (name, value) pairs. If `timings` is true, the time spent being busy,
+        idle or blocked (see :meth:`get_timings`) and the median and 99th percentile of the per-row latency (see
+        :meth:`get_latency`) follow, in seconds. If memory is traced, the bytes held by the node ("mem") and their peak
+        ("peak_mem") come last.
+
+        """
+        self.sample_queue()
+        yield from super().get_statistics(*args, **kwargs)
+
+        if self.peak_memory is not None:
+            yield "mem", self.memory
+            yield "peak_mem", self.peak_memory
+
+        if timings:
+            yield from self.get_timings().items()
+            latency = self.get_latency()
+            yield "p50", latency.percentile(50)
+            yield "p99", latency.percentile(99)
+
+    def sample_queue(self):
+        """
+        Update the input queue occupancy gauge ("queued" statistic), and its peak value. Called at each tick of the
+        graph execution context, so the peak is only as accurate as the tick period.
+
+        """
+        # Queue occupancy is a gauge, not a counter: it is read when asked for, while the input is alive.
+        if self.input.alive:
+            self.statistics["queued"] = self.input.qsize() + len(self._input_buffer)
+        if self.statistics["queued"] > self.peak_queued:
+            self.peak_queued = self.statistics["queued"]
+
+    def get_timings(self):
+        """
+        Seconds spent in the node's code ("busy"), waiting for input rows ("idle") and waiting for room in the outputs
+        ("blocked").
+
+        """
+        return dict(self.timings)
+
+    def get_latency(self):
+        """
+        Histogram of the time spent in the node's code for each input row (see
+        :class:`bonobo.util.statistics.LatencyHistogram`).
+
+        """
+        return self.latency
+
+    def as_dict(self):
+        return {
+            **super().as_dict(),
+            "stats": self.get_statistics_as_string(timings=True),
+            "timings": self.get_timings(),
+            "latency": self.get_latency().as_dict(),
+        }
+
     def send(self, *_output, _input=None):
         return self._put(self._cast(_input, _output))
 
+    ### Validation
+    @property
+    def validation(self):
+        """
+        How input rows are checked against the input type and length seen on the first row:
+
+        * "strict" (default): every row is checked, and cast to the input type if needed.
+        * "sampled": rows of the exact input type are checked once in a while (see :attr:`VALIDATION_SAMPLE_RATE`).
+        * "trusted": rows of the exact input type are not checked at all.
+
+        Whatever the level, rows of another type are always checked (and cast).
+
+        """
+        return self._validation
+
+    @validation.setter
+    def validation(self, validation):
+        if validation not in settings.VALIDATIONS:
+            raise ValueError(
+                "Invalid validation level {!r}, choices are: {}.".format(
+                    validation, ", ".join(sorted(settings.VALIDATIONS))
+                )
+            )
+        self._validation = validation
+        # How often a row of the known input type is checked, 0 meaning never.
+        self._validate_every = {
+            settings.VALIDATION_STRICT: 1,
+            settings.VALIDATION_SAMPLED: self.VALIDATION_SAMPLE_RATE,
+            settings.VALIDATION_TRUSTED: 0,
+        }[validation]
+
     ### Input type and fields
     @property
     def input_type(self):
@@ -273,10 +602,16 @@ class NodeExecutionContext(BaseContext, WithStatistics):
 
     def error(self, exc_info, *, level=logging.ERROR):
         self.increment("err")
+        self.error_samples.append(format_error_sample(exc_info, level))
+        if self._trace is not None:
+            self._trace = self._tracer.end(self, self._trace, error=True)
         super().error(exc_info, level=level)
 
     def fatal(self, exc_info, *, level=logging.CRITICAL):
         self.increment("err")
+        self.error_samples.append(format_error_sample(exc_info, level))
+        if self._trace is not None:
+            self._trace = self._tracer.end(self, self._trace, error=True)
         super().fatal(exc_info, level=level)
         self.input.shutdown()
 
@@ -285,14 +620,38 @@ class NodeExecutionContext(BaseContext, WithStatistics):
             return self.parent.services.get(name)
         return self.services.get(name)
 
-    def _get(self):
+    def _get(self, *, block=False):
         """
         Read from the input queue.
 
         If Queue raises (like Timeout or Empty), stat won't be changed.
 
         """
-        input_bag = self.input.get(timeout=0)
+        if not self._input_buffer:
+            try:
+                self._input_buffer.extend(self.input.get_many(BATCH_SIZE, block=False))
+            except Empty:
+                if not block:
+                    raise
+                # We're about to wait for some input, don't let the downstream nodes wait for us.
+                self._flush()
+                started = perf_counter()
+                try:
+                    self._input_buffer.extend(self.input.get_many(BATCH_SIZE, block=True))
+                finally:
+                    self.timings["idle"] += perf_counter() - started
+        return self._check_input(self._input_buffer.popleft())
+
+    def _check_input(self, input_bag):
+        """
+        Check (and cast, if possible) an input bag against the input type and length seen so far.
+
+        """
+        # Fast path, for rows of the known input type, unless the validation level requires to check this one.
+        if self._validate_every != 1 and type(input_bag) is self._input_type:
+            if not self._validate_every or self._counts[_IN] % self._validate_every:
+                self._counts[_IN] += 1
+                return input_bag
 
         # Store or check input type
         if self._input_type is None:
@@ -320,7 +679,7 @@ class NodeExecutionContext(BaseContext, WithStatistics):
                 )
             )
 
-        self.increment("in")  # XXX should that go before type check ?
+        self._counts[_IN] += 1  # XXX should that go before type check ?
 
         return input_bag
 
@@ -333,6 +692,10 @@ class NodeExecutionContext(BaseContext, WithStatistics):
         :return: Bag
         """
 
+        # Fast path, the output already has the right type (and can't be an envelope, as it is a tuple).
+        if type(_output) is self._output_type:
+            return _output
+
         if isenvelope(_output):
             _output, _flags, _options = _output.unfold()
         else:
@@ -367,11 +730,96 @@ class NodeExecutionContext(BaseContext, WithStatistics):
         :param _control: if true, won't count in statistics.
         """
 
-        if not _control:
-            self.increment("out")
+        if _control:
+            self._flush()
+            for output in self.outputs:
+                output.put(value)
+            return
 
-        for output in self.outputs:
-            output.put(value)
+        self._counts[_OUT] += 1
+
+        if self._tracer is not None:
+            self._tracer.emit(self, value)
+
+        if not self._output_buffer:
+            self._output_buffer_since = time()
+        self._output_buffer.append(value)
+
+        # Adapt the batch size: grow it while batches fill up quickly, shrink it if rows wait for too long.
+        if len(self._output_buffer) >= self._output_batch_size:
+            if time() - self._output_buffer_since < BATCH_TIMEOUT:
+                self._output_batch_size = min(self._output_batch_size * 2, BATCH_SIZE)
+            self._flush()
+        elif time() - self._output_buffer_since >= BATCH_TIMEOUT:
+            self._output_batch_size = max(self._output_batch_size // 2, 1)
+            self._flush()
+
+    def _flush(self):
+        """
+        Sends the buffered output rows to all of this context's outputs.
+
+        """
+        if not self._output_buffer and not self._output_backlog:
+            return
+
+        with self._flush_lock:
+            # Rows left behind by the background flusher go first, to keep each output's rows in order.
+            backlog, self._output_backlog = self._output_backlog, []
+            batch, self._output_buffer = self._output_buffer, []
+            for output, rows in backlog + [(output, batch) for output in self.outputs if batch]:
+                # Fused nodes process the rows right away, this is their own busy time, not time waiting for room.
+                started = None if isinstance(output, InlineInput) else perf_counter()
+                try:
+                    put_many = output.put_many
+                except AttributeError:
+                    for value in rows:
+                        output.put(value)
+                else:
+                    put_many(rows)
+                if started is not None:
+                    self.timings["blocked"] += perf_counter() - started
+
+    def flush_expired(self, now):
+        """
+        Called by the :data:`flusher` thread: sends the buffered output rows if the oldest one waited for more than
+        BATCH_TIMEOUT, unless it would have to wait (this context's thread is flushing, or the first output is full), or
+        an output is not a queue (fused nodes must run in their upstream node's thread). This never waits, rows that
+        could only be sent to some outputs are kept for the others, and sent again at the next call (or by the next
+        :meth:`_flush`, whichever comes first).
+
+        """
+        if not self._output_backlog and (
+            not self._output_buffer or now - (self._output_buffer_since or now) < BATCH_TIMEOUT
+        ):
+            return
+        if not all(hasattr(output, "offer_many") for output in self.outputs):
+            return
+        if not self._flush_lock.acquire(blocking=False):
+            return
+
+        try:
+            self._output_backlog = [
+                (output, rows) for output, rows in self._output_backlog if not output.offer_many(rows)
+            ]
+            if self._output_backlog:
+                return
+
+            # The buffer is not replaced, as this context's thread may be appending to it right now.
+            buffer = self._output_buffer
+            batch = buffer[: len(buffer)]
+            if not batch or now - (self._output_buffer_since or now) < BATCH_TIMEOUT:
+                return
+            for i, output in enumerate(self.outputs):
+                if not output.offer_many(batch):
+                    if not i:
+                        return
+                    # Some outputs got the rows already (another writer filled this queue in between).
+                    self._output_backlog.append((output, batch))
+            del buffer[: len(batch)]
+            self._output_buffer_since = time()
+            self._output_batch_size = max(self._output_batch_size // 2, 1)
+        finally:
+            self._flush_lock.release()
 
     def _get_initial_context(self):
         if self.parent:
@@ -382,50 +830,230 @@ class NodeExecutionContext(BaseContext, WithStatistics):
 
 
 class AsyncNodeExecutionContext(NodeExecutionContext):
+    """
+    Node execution context running in an asyncio event loop, driven by
+    :class:`bonobo.execution.strategies.aio.AsyncIOStrategy`.
+
+    The node can be a coroutine function (its return value is used as a regular node return value), an asynchronous
+    generator function, or any regular node, in which case it is called in a thread pool executor so it does not block
+    the event loop (regular generators are also iterated in the executor, by batches).
+
+    Up to `concurrency` input rows can be processed at once (rows are then not kept in order). Input rows are read and
+    output rows written by awaiting the :class:`bonobo.structs.inputs.AioInput` queues, which are bounded, so a slow
+    node makes its upstream nodes wait.
+
+    """
+
     QueueType = AioInput
 
-    def __init__(self, *args, loop, **kwargs):
+    # Output rows are sent by the event loop's thread only.
+    FLUSH_IN_BACKGROUND = False
+
+    def __init__(self, *args, loop, concurrency=1, executor=None, **kwargs):
+        """
+        :param loop: the event loop this context runs in
+        :param concurrency: maximum number of input rows being processed at the same time
+        :param executor: executor used to run regular (non-async) nodes, defaults to the event loop's default executor
+        """
         super().__init__(*args, **kwargs)
         self._event_loop = loop
+        self.concurrency = concurrency
+        self.executor = executor
+
+        self._offload = True
+        self._tasks = set()
+        self._semaphore = None
+
+    def start(self):
+        super().start()
+        self._offload = not isasync(self.wrapped)
+
+    async def loop(self):
+        """
+        The actual infinite loop for this transformation, as a coroutine.
+
+        """
+        logger.debug("Node loop starts for {!r}.".format(self))
+
+        if self.concurrency > 1:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+
+        while self.should_loop:
+            try:
+                await self.step()
+            except InactiveReadableError:
+                break
+
+        await self._join()
+        await self._drain(force=True)
+
+        logger.debug("Node loop ends for {!r}.".format(self))
+
+    async def step(self):
+        """
+        Runs one step of this node: reads an input row and processes it (or starts processing it, if concurrency
+        allows).
+
+        """
+        try:
+            input_bag = await self._get()
+            if self._semaphore is None:
+                await self._process(input_bag)
+            else:
+                await self._semaphore.acquire()
+                task = self._event_loop.create_task(self._run(input_bag))
+                self._tasks.add(task)
+                task.add_done_callback(self._done)
+        except InactiveReadableError:
+            raise
+        except Empty:
+            pass
+        except (NotImplementedError, UnrecoverableError):
+            self.fatal(sys.exc_info())  # exit loop
+        except Exception:  # pylint: disable=broad-except
+            self.error(sys.exc_info())  # does not exit loop
+        except BaseException:
+            self.fatal(sys.exc_info())  # exit loop
+
+    async def _run(self, input_bag):
+        try:
+            await self._process(input_bag)
+        except (NotImplementedError, UnrecoverableError):
+            self.fatal(sys.exc_info())
+        except Exception:  # pylint: disable=broad-except
+            self.error(sys.exc_info())
+        except BaseException:
+            self.fatal(sys.exc_info())
+
+    def _done(self, task):
+        self._tasks.discard(task)
+        self._semaphore.release()
+
+    async def _join(self):
+        """
+        Wait for the input rows being processed, so END tokens are sent after their outputs.
+
+        """
+        if self._tasks:
+            await asyncio.wait(list(self._tasks))
+
+    async def _process(self, input_bag):
+        """
+        Send an input bag to the node, interpret the results.
+
+        """
+        if self._offload:
+            results = await self._event_loop.run_in_executor(self.executor, self._stack, input_bag)
+        else:
+            results = self._stack(input_bag)
+
+        if isinstance(results, GeneratorType):
+            while not self._killed:
+                batch = await self._event_loop.run_in_executor(self.executor, _next_batch, results, BATCH_SIZE)
+                for result in batch:
+                    self._put(self._cast(input_bag, result))
+                await self._drain()
+                if len(batch) < BATCH_SIZE:
+                    break
+        elif inspect.isasyncgen(results):
+            async for result in results:
+                if self._killed:
+                    break
+                self._put(self._cast(input_bag, result))
+                await self._drain()
+        else:
+            if inspect.isawaitable(results):
+                results = await results
+            if results:
+                self._put(self._cast(input_bag, results))
+            await self._drain()
 
     async def _get(self):
         """
         Read from the input queue.
 
-        If Queue raises (like Timeout or Empty), stat won't be changed.
+        Raises :class:`queue.Empty` if the input was interrupted while waiting.
 
         """
-        input_bag = await self.input.get()
+        if not self._input_buffer:
+            if not self.input.qsize():
+                # We're about to wait for some input, don't let the downstream nodes wait for us.
+                await self._drain(force=True)
+            self._input_buffer.extend(await self.input.get_many(BATCH_SIZE, before_end=self._join))
+        return self._check_input(self._input_buffer.popleft())
 
-        # Store or check input type
-        if self._input_type is None:
-            self._input_type = type(input_bag)
-        elif type(input_bag) != self._input_type:
-            try:
-                if self._input_type == tuple:
-                    input_bag = self._input_type(input_bag)
-                else:
-                    input_bag = self._input_type(*input_bag)
-            except Exception as exc:
-                raise UnrecoverableTypeError(
-                    "Input type changed to incompatible type between calls to {!r}.\nGot {!r} which is not of type {!r}.".format(
-                        self.wrapped, input_bag, self._input_type
-                    )
-                ) from exc
+    def _put(self, value, _control=False):
+        if _control:
+            return super()._put(value, _control=True)
 
-        # Store or check input length, which is a soft fallback in case we're just using tuples
-        if self._input_length is None:
-            self._input_length = len(input_bag)
-        elif len(input_bag) != self._input_length:
-            raise UnrecoverableTypeError(
-                "Input length changed between calls to {!r}.\nExpected {} but got {}: {!r}.".format(
-                    self.wrapped, self._input_length, len(input_bag), input_bag
-                )
-            )
+        self._counts[_OUT] += 1
 
-        self.increment("in")  # XXX should that go before type check ?
+        if not self._output_buffer:
+            self._output_buffer_since = time()
+        self._output_buffer.append(value)
 
-        return input_bag
+    def _flush(self):
+        """
+        Sends the buffered output rows to all of this context's outputs, without waiting for room (this is used before
+        sending tokens, and on teardown).
+
+        """
+        if not self._output_buffer:
+            return
+
+        batch, self._output_buffer = self._output_buffer, []
+        for output in self.outputs:
+            for value in batch:
+                output.put(value)
+
+    async def _drain(self, *, force=False):
+        """
+        Sends the buffered output rows to all of this context's outputs, waiting for room if necessary, if there is a
+        full batch or if the oldest row waited for too long (or if `force` is true).
+
+        """
+        if not self._output_buffer:
+            return
+
+        if not force and len(self._output_buffer) < BATCH_SIZE and time() - self._output_buffer_since < BATCH_TIMEOUT:
+            return
+
+        batch, self._output_buffer = self._output_buffer, []
+        for output in self.outputs:
+            if isinstance(output, AioInput):
+                await output.put_many(batch)
+            else:
+                for value in batch:
+                    output.put(value)
+
+
+def _next_batch(iterator, size):
+    return list(islice(iterator, size))
+
+
+def format_error_sample(exc_info, level):
+    """
+    Summary of an error (when, how bad, exception type and message), as kept in
+    :attr:`NodeExecutionContext.error_samples`.
+
+    """
+    exc_type, exc, tb = exc_info
+    return {
+        "time": time(),
+        "level": logging.getLevelName(level),
+        "type": get_name(exc_type) if exc_type else None,
+        "message": str(exc) if exc is not None else None,
+    }
+
+
+def isasync(node):
+    """
+    Whether a node is a coroutine function or an asynchronous generator function (or a callable object whose
+    `__call__` method is one of those).
+
+    """
+    call = node if inspect.isfunction(node) or inspect.ismethod(node) else getattr(type(node), "__call__", None)
+    return inspect.iscoroutinefunction(call) or inspect.isasyncgenfunction(call)
 
 
 def isflag(param):
@@ -0,0 +1,182 @@
+import sys
+import threading
+from queue import Empty, Queue
+
+from bonobo.execution.contexts.node import NodeExecutionContext
+from bonobo.structs.inputs import BATCH_SIZE, Writable
+from bonobo.structs.tokens import Token
+from bonobo.util.statistics import LatencyHistogram
+
+
+class ReplicaOutput(Writable):
+    """
+    Collects the output rows of a replica, so they can be merged by the parent context.
+
+    """
+
+    def __init__(self):
+        self.rows = []
+
+    def put(self, data, block=True, timeout=None):
+        if not isinstance(data, Token):
+            self.rows.append(data)
+
+    def put_many(self, items, block=True, timeout=None):
+        self.rows += items
+
+    def take(self):
+        rows, self.rows = self.rows, []
+        return rows
+
+
+class ParallelNodeExecutionContext(NodeExecutionContext):
+    """
+    Context for a node with parallelism (see :meth:`bonobo.structs.graphs.Graph.set_parallelism`).
+
+    It does not call the node itself: input rows are dispatched to replicas (plain node contexts, each with its own
+    context processors stack, running in their own thread), and their outputs are merged back into this context's
+    output stream, from this context's thread. Errors of the replicas are counted in this context's statistics.
+
+    """
+
+    def __init__(self, wrapped, *, parallelism, **kwargs):
+        super().__init__(wrapped, **kwargs)
+        self.parallelism = parallelism
+
+        self._replicas, self._queues, self._threads = [], [], []
+        self._results = Queue()
+        self._dispatched, self._received, self._next = 0, 0, 0
+        self._pending = {}
+
+    def start(self):
+        # Only the lifecycle, the replicas are the ones having a stack.
+        super(NodeExecutionContext, self).start()
+
+        try:
+            for i in range(self.parallelism.replicas):
+                replica = NodeExecutionContext(
+                    self.wrapped,
+                    parent=self.parent,
+                    services=None if self.parent else self.services,
+                    _outputs=[ReplicaOutput()],
+                )
+                replica.validation = self.validation
+                replica.error_samples = self.error_samples
+                self._replicas.append(replica)
+                replica.start()
+
+            for replica in self._replicas:
+                queue = Queue(maxsize=BATCH_SIZE)
+                thread = threading.Thread(target=self._work, args=(replica, queue), daemon=True)
+                self._queues.append(queue)
+                self._threads.append(thread)
+                thread.start()
+        except Exception:
+            # Set the logging level to the lowest possible, to avoid double log.
+            self.fatal(sys.exc_info(), level=0)
+
+            # We raise again, so the error is not ignored out of execution loops.
+            raise
+
+    def stop(self):
+        if self._threads:
+            self._merge(block=True)
+            for queue in self._queues:
+                queue.put(None)
+            for thread in self._threads:
+                thread.join()
+            self._threads = []
+
+            # Context processors teardown may send data, it goes to the output stream too (without ordering).
+            for replica in self._replicas:
+                if replica.started and not replica.stopped:
+                    replica.stop()
+                for row in replica.outputs[0].take():
+                    self._put(row)
+
+            self._flush()
+
+        super().stop()
+
+    def kill(self):
+        super().kill()
+
+        for replica in self._replicas:
+            if replica.started and not replica.stopped:
+                replica.kill()
+
+    def get_statistics(self, *args, **kwargs):
+        for name, count in super().get_statistics(*args, **kwargs):
+            if name in ("err", "warn"):
+                count += sum(replica.statistics[name] for replica in self._replicas)
+            yield name, count
+
+    def get_timings(self):
+        timings = super().get_timings()
+        # The node's code runs in the replicas (we only dispatch rows), each one in its own thread.
+        timings["busy"] += sum(replica.timings["busy"] for replica in self._replicas)
+        return timings
+
+    def get_latency(self):
+        latency = LatencyHistogram()
+        for replica in self._replicas:
+            latency.update(replica.latency)
+        return latency
+
+    def _get(self, *, block=False):
+        # Before waiting for input, wait for the rows being processed by replicas (and send their outputs).
+        if block and not self._input_buffer and self._received < self._dispatched:
+            try:
+                return super()._get(block=False)
+            except Empty:
+                self._merge(block=True)
+        return super()._get(block=block)
+
+    def _call(self, input_bag):
+        if self.parallelism.key is None:
+            replica = self._dispatched % self.parallelism.replicas
+        else:
+            replica = hash(self.parallelism.key(input_bag)) % self.parallelism.replicas
+
+        self._queues[replica].put((self._dispatched, input_bag))
+        self._dispatched += 1
+
+        self._merge(block=False)
+
+    def _merge(self, *, block):
+        """
+        Send the outputs of rows processed by replicas to this context's outputs. If `block` is true, waits until all
+        dispatched rows are processed.
+
+        """
+        while self._received < self._dispatched:
+            try:
+                seq, rows = self._results.get(block=block)
+            except Empty:
+                break
+            self._received += 1
+
+            if self.parallelism.ordered:
+                self._pending[seq] = rows
+                while self._next in self._pending:
+                    for row in self._pending.pop(self._next):
+                        self._put(row)
+                    self._next += 1
+            else:
+                for row in rows:
+                    self._put(row)
+
+        # A replica hit an unrecoverable error (already logged), so does the node.
+        if not self._defunct and any(replica.defunct for replica in self._replicas):
+            self._defunct = True
+            self.input.shutdown()
+
+    def _work(self, replica, queue):
+        output = replica.outputs[0]
+        while True:
+            item = queue.get()
+            if item is None:
+                return
+            seq, input_bag = item
+            replica.push((input_bag,))
+            self._results.put((seq, output.take()))
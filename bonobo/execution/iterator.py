@@ -0,0 +1,130 @@
+"""
+Iterate over the rows produced by a node of a graph, from python code (see :func:`bonobo.iterate`).
+
+"""
+import sys
+import threading
+from queue import Empty, Full, Queue
+
+from whistle import EventDispatcher
+
+from bonobo.config import use_context, use_raw_input
+from bonobo.constants import TICK_PERIOD
+from bonobo.execution import events
+from bonobo.execution.strategies.process import ProcessStrategy
+from bonobo.structs.inputs import BATCH_SIZE
+
+_DONE = object()
+
+
+class GraphIterator:
+    """
+    Runs a graph in a background thread, and yields the rows sent by one of its nodes, as they are produced.
+
+    Rows go through a queue of `maxsize` rows (and an input queue of the same size): when it is full, the node waits,
+    and so do its upstream nodes once their own queues are full. The consumer's pace drives the execution, and memory
+    usage does not depend on the output length.
+
+    Closing the iterator before the end (or not consuming it until the end) kills the execution.
+
+    """
+
+    def __init__(self, graph, *, strategy, output=None, plugins=None, services=None, maxsize=BATCH_SIZE):
+        """
+        :param graph: the graph to execute (it is copied, not modified)
+        :param strategy: the execution strategy, which must run nodes in this process
+        :param output: the node (index, node value or name) to get rows from, defaults to the last node added
+        :param plugins: plugins to register during execution
+        :param services: services available to the graph nodes
+        :param maxsize: how many rows can be produced in advance
+        """
+        if isinstance(strategy, ProcessStrategy):
+            raise NotImplementedError("Cannot iterate over a graph executed in other processes.")
+
+        self.graph = graph.copy()
+        self.output = len(graph) - 1 if output is None else self.graph.index_of(output)
+        self.strategy = strategy
+        self.plugins = plugins
+        self.services = services
+
+        self.context = None
+        self._dispatcher = EventDispatcher()
+        self._dispatcher.add_listener(events.START, self._on_start)
+        self._queue = Queue(maxsize=maxsize)
+        self._closed = threading.Event()
+        self._exc_info = None
+
+        @use_context
+        @use_raw_input
+        def sink(context, bag):
+            while not self._closed.is_set():
+                try:
+                    return self._queue.put(bag, timeout=TICK_PERIOD)
+                except Full:
+                    continue
+            self._kill()
+
+        self.graph.add_chain(sink, _input=self.output, _buffer_size=maxsize)
+        self._thread = threading.Thread(target=self._run, name="bonobo-iterator", daemon=True)
+
+    def __iter__(self):
+        if not self._thread.is_alive() and not self._closed.is_set():
+            self._thread.start()
+        try:
+            while True:
+                bag = self._queue.get()
+                if bag is _DONE:
+                    break
+                yield bag
+        finally:
+            self.close()
+
+        if self._exc_info:
+            raise self._exc_info[1].with_traceback(self._exc_info[2])
+
+    def close(self):
+        """
+        Stops the execution (if still running) and waits for it to end.
+
+        """
+        if self._closed.is_set():
+            return
+        self._closed.set()
+
+        # Nodes may still be starting (or the graph may not even have started yet), so they are killed again until the
+        # execution ends, and the sink is woken up if waiting for room.
+        while self._thread.is_alive():
+            self._kill()
+            try:
+                self._queue.get(timeout=TICK_PERIOD)
+            except Empty:
+                pass
+
+        # The end of the rows may have been drained above, while another thread is still waiting for them.
+        try:
+            self._queue.put_nowait(_DONE)
+        except Full:
+            pass
+
+    def _on_start(self, event):
+        # Known before any row is produced, so that the execution can be killed even if none ever is.
+        self.context = event.context
+
+    def _kill(self):
+        # Some nodes may be done already, and the others may be finishing right now.
+        for node in self.context or ():
+            try:
+                if node.alive and not node.killed:
+                    node.kill()
+            except RuntimeError:
+                pass
+
+    def _run(self):
+        try:
+            self.context = self.strategy.execute(
+                self.graph, plugins=self.plugins, services=self.services, dispatcher=self._dispatcher
+            )
+        except Exception:
+            self._exc_info = sys.exc_info()
+        finally:
+            self._queue.put(_DONE)
@@ -0,0 +1,92 @@
+"""
+Machine readable summary of a graph execution, for capacity planning or tracking throughput over time (see
+:meth:`bonobo.execution.contexts.graph.BaseGraphExecutionContext.get_report`, and the ``--report`` option of
+``bonobo run``).
+
+"""
+import json
+import os
+import platform
+
+from bonobo.constants import BEGIN
+from bonobo.structs.inputs import Input
+from bonobo.util import get_name
+
+
+class RunReport:
+    """
+    Snapshot of a graph execution context: topology, per-node statistics, timings and errors, and where it ran.
+
+    Edges are (source, target) pairs of node indexes, where the source of the graph's entry points is "BEGIN".
+    Timestamps are UNIX timestamps, durations are in seconds.
+
+    """
+
+    def __init__(self, context):
+        graph = context.graph
+
+        self.strategy = get_name(context.strategy) if context.strategy is not None else None
+        self.started_at, self.stopped_at = context.started_at, context.stopped_at
+        self.duration = self.stopped_at - self.started_at if self.started_at and self.stopped_at else None
+        self.xstatus = context.xstatus
+
+        self.python = platform.python_version()
+        self.implementation = platform.python_implementation()
+        self.platform = platform.platform()
+        self.cpu_count = os.cpu_count()
+
+        self.topologically_sorted_indexes = list(graph.topologically_sorted_indexes)
+        self.edges = [("BEGIN", target) for target in sorted(graph.outputs_of(BEGIN))] + [
+            (source, target) for source in range(len(graph)) for target in sorted(graph.outputs_of(source))
+        ]
+        self.nodes = [self.get_node_report(i, node) for i, node in enumerate(context)]
+
+    def get_node_report(self, i, node):
+        statistics = dict(node.get_statistics())
+        latency = node.get_latency()
+        return {
+            "index": i,
+            "name": node.name,
+            "state": node.state,
+            "statistics": statistics,
+            "rows_per_second": statistics.get("out", 0) / self.duration if self.duration else None,
+            "timings": node.get_timings(),
+            "latency": {"p50": latency.percentile(50), "p99": latency.percentile(99), "rows": len(latency)},
+            "peak_queued": node.peak_queued,
+            "queued_bytes": node.input.queued_bytes if isinstance(node.input, Input) else 0,
+            "memory": node.memory,
+            "peak_memory": node.peak_memory,
+            "errors": list(node.error_samples),
+        }
+
+    def as_dict(self):
+        return {
+            "strategy": self.strategy,
+            "started_at": self.started_at,
+            "stopped_at": self.stopped_at,
+            "duration": self.duration,
+            "xstatus": self.xstatus,
+            "python": self.python,
+            "implementation": self.implementation,
+            "platform": self.platform,
+            "cpu_count": self.cpu_count,
+            "topologically_sorted_indexes": self.topologically_sorted_indexes,
+            "edges": self.edges,
+            "nodes": self.nodes,
+        }
+
+    def write(self, path):
+        """
+        Write the report to a file, as one JSON document, or as NDJSON if the filename ends with ".ndjson" or ".jsonl"
+        (one line for the run, without nodes, then one line per node, each having a "type" key).
+
+        """
+        with open(path, "w") as f:
+            if path.endswith((".ndjson", ".jsonl")):
+                run = self.as_dict()
+                nodes = run.pop("nodes")
+                for record in [{"type": "run", **run}] + [{"type": "node", **node} for node in nodes]:
+                    f.write(json.dumps(record, default=str) + "\n")
+            else:
+                json.dump(self.as_dict(), f, default=str, indent=2)
+                f.write("\n")
@@ -2,22 +2,37 @@
 Execution strategies define how an actual job execution will happen. Default and recommended strategy is "threadpool",
 for now, which leverage a :obj:`concurrent.futures.ThreadPoolExecutor` to run each node in a separate thread.
 
-In the future, the two strategies that would really benefit bonobo are subprocess and dask/dask.distributed. Please be
-at home if you want to give it a shot.
+The "asyncio" strategy runs all nodes in one event loop (see :mod:`bonobo.execution.strategies.aio`), which is
+useful for IO-bound jobs written using coroutines.
+
+The "scheduler" strategy runs all nodes on a fixed number of threads (see
+:mod:`bonobo.execution.strategies.scheduler`), which is useful for large graphs.
+
+The "processpool" strategy runs chains of nodes in separate worker processes (see
+:mod:`bonobo.execution.strategies.process`), which is useful for CPU-bound transformations.
+
+In the future, another strategy that would really benefit bonobo is dask/dask.distributed. Please be at home if you
+want to give it a shot.
 
 """
+from bonobo.execution.strategies.aio import AsyncIOStrategy
 from bonobo.execution.strategies.executor import (
-    AsyncThreadPoolExecutorStrategy, ProcessPoolExecutorStrategy, ThreadPoolExecutorStrategy
+    FusedThreadPoolExecutorStrategy, ProcessPoolExecutorStrategy, ThreadPoolExecutorStrategy
 )
 from bonobo.execution.strategies.naive import NaiveStrategy
+from bonobo.execution.strategies.process import ProcessStrategy
+from bonobo.execution.strategies.scheduler import SchedulerStrategy
 
 __all__ = ["create_strategy"]
 
 STRATEGIES = {
+    "asyncio": AsyncIOStrategy,
     "naive": NaiveStrategy,
-    "processpool": ProcessPoolExecutorStrategy,
+    "processpool": ProcessStrategy,
+    "scheduler": SchedulerStrategy,
     "threadpool": ThreadPoolExecutorStrategy,
-    "aio_threadpool": AsyncThreadPoolExecutorStrategy,
+    "threadpool_fused": FusedThreadPoolExecutorStrategy,
+    "aio_threadpool": AsyncIOStrategy,
 }
 
 DEFAULT_STRATEGY = "threadpool"
@@ -0,0 +1,85 @@
+"""
+Asyncio execution strategy.
+
+All nodes run in one event loop, in the main thread: nodes can be coroutine functions or asynchronous generator
+functions, which is the way to go for IO-bound jobs doing lots of concurrent network calls. Regular nodes are
+automatically run in a thread pool, so they do not block the event loop.
+
+"""
+import asyncio
+import functools
+import logging
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from bonobo.constants import BEGIN, END
+from bonobo.execution.contexts.graph import AsyncGraphExecutionContext
+from bonobo.execution.strategies.base import Strategy
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncIOStrategy(Strategy):
+    """
+    Strategy running all nodes as tasks of a new asyncio event loop.
+
+    To process more than one row at a time in a node, use :meth:`bonobo.structs.graphs.Graph.set_parallelism`.
+
+    """
+
+    GraphExecutionContextType = AsyncGraphExecutionContext
+
+    def __init__(self, GraphExecutionContextType=None, *, max_workers=None):
+        """
+        :param max_workers: size of the thread pool running regular (non-async) nodes
+        """
+        super().__init__(GraphExecutionContextType)
+        self.max_workers = max_workers
+
+    def execute(self, graph, **kwargs):
+        loop = asyncio.new_event_loop()
+        tasks = []
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                context = self.create_graph_execution_context(graph, loop=loop, executor=executor, **kwargs)
+                context.write(BEGIN, (), END)
+
+                try:
+                    loop.run_until_complete(self.run(context, tasks))
+                except KeyboardInterrupt:
+                    logger.warning("KeyboardInterrupt received. Trying to terminate the nodes gracefully.")
+                    context.kill()
+                    if tasks:
+                        loop.run_until_complete(asyncio.wait(tasks))
+
+                context.stop()
+        finally:
+            loop.close()
+
+        return context
+
+    async def run(self, context, tasks):
+        try:
+            context.start(self.get_starter(context._event_loop, tasks))
+        except Exception:
+            logger.critical("Exception caught while starting execution context.", exc_info=sys.exc_info())
+
+        pending = tasks
+        while pending:
+            _, pending = await asyncio.wait(pending, timeout=context.TICK_PERIOD)
+            context.tick(pause=False)
+
+    def get_starter(self, loop, tasks):
+        def starter(node):
+            @functools.wraps(node)
+            async def _runner():
+                try:
+                    with node:
+                        await node.loop()
+                except Exception:
+                    logger.critical("Critical error in asyncio node starter.", exc_info=sys.exc_info())
+
+            tasks.append(loop.create_task(_runner()))
+
+        return starter
@@ -15,7 +15,9 @@ class Strategy:
     def create_graph_execution_context(self, graph, *args, GraphExecutionContextType=None, **kwargs):
         if not len(graph):
             raise ValueError("You provided an empty graph, which does not really make sense. Please add some nodes.")
-        return (GraphExecutionContextType or self.GraphExecutionContextType)(graph, *args, **kwargs)
+        context = (GraphExecutionContextType or self.GraphExecutionContextType)(graph, *args, **kwargs)
+        context.strategy = self
+        return context
 
     def execute(self, graph, *args, **kwargs):
         raise NotImplementedError
@@ -1,16 +1,11 @@
-import asyncio
 import functools
 import logging
 import sys
-from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import Executor, ThreadPoolExecutor, wait
 
-from cached_property import cached_property
-
-from bonobo import settings
 from bonobo.constants import BEGIN, END
-from bonobo.execution.contexts.graph import AsyncGraphExecutionContext
 from bonobo.execution.strategies.base import Strategy
-from bonobo.util import get_name
+from bonobo.execution.strategies.process import ProcessStrategy
 
 logger = logging.getLogger(__name__)
 
@@ -19,9 +14,18 @@ class ExecutorStrategy(Strategy):
     """
     Strategy based on a concurrent.futures.Executor subclass (or similar interface).
 
+    The execution ends as soon as all node loops are done. Meanwhile, a TICK event is dispatched to plugins every
+    `tick_period` seconds (defaults to the graph execution context's TICK_PERIOD).
+
     """
 
     executor_factory = Executor
+    tick_period = None
+
+    def __init__(self, GraphExecutionContextType=None, *, tick_period=None):
+        super().__init__(GraphExecutionContextType)
+        if tick_period is not None:
+            self.tick_period = tick_period
 
     def create_executor(self, graph):
         return self.executor_factory()
@@ -38,9 +42,14 @@ class ExecutorStrategy(Strategy):
             except Exception:
                 logger.critical("Exception caught while starting execution context.", exc_info=sys.exc_info())
 
-            while context.alive:
+            tick_period = context.TICK_PERIOD if self.tick_period is None else self.tick_period
+
+            # Wait for the node loops to complete, waking up on a regular basis to let plugins know.
+            pending = futures
+            while pending:
                 try:
-                    context.tick()
+                    _, pending = wait(pending, timeout=tick_period)
+                    context.tick(pause=False)
                 except KeyboardInterrupt:
                     logging.getLogger(__name__).warning(
                         "KeyboardInterrupt received. Trying to terminate the nodes gracefully."
@@ -79,37 +88,16 @@ class ThreadPoolExecutorStrategy(ExecutorStrategy):
         return self.executor_factory(max_workers=len(graph))
 
 
-class AsyncThreadPoolExecutorStrategy(ThreadPoolExecutorStrategy):
-    GraphExecutionContextType = AsyncGraphExecutionContext
-
-    def __init__(self, GraphExecutionContextType=None):
-        if not settings.ALPHA.get():
-            raise NotImplementedError(
-                "{} is experimental, you need to explicitely activate it using ALPHA=True in system env.".format(
-                    get_name(self)
-                )
-            )
-        super().__init__(GraphExecutionContextType)
+class FusedThreadPoolExecutorStrategy(ThreadPoolExecutorStrategy):
+    """
+    Same as the threadpool strategy, but linear chains of nodes are run in one thread (rows are passed from one node to
+    the next using direct calls instead of queues). Statistics and errors are still tracked for each node.
 
-    @cached_property
-    def loop(self):
-        return asyncio.get_event_loop()
+    """
 
     def create_graph_execution_context(self, *args, **kwargs):
-        return super(AsyncThreadPoolExecutorStrategy, self).create_graph_execution_context(
-            *args, **kwargs, loop=self.loop
-        )
-
-    def get_starter(self, executor, futures):
-        return functools.partial(
-            self.loop.run_in_executor,
-            executor,
-            super(AsyncThreadPoolExecutorStrategy, self).get_starter(executor, futures),
-        )
+        return super(FusedThreadPoolExecutorStrategy, self).create_graph_execution_context(*args, **kwargs, fuse=True)
 
 
-class ProcessPoolExecutorStrategy(ExecutorStrategy):
-    executor_factory = ProcessPoolExecutor
-
-    def create_executor(self, graph):
-        return self.executor_factory(max_workers=len(graph))
+# Node loops cannot run in a pool of processes (their context is not picklable), see ProcessStrategy instead.
+ProcessPoolExecutorStrategy = ProcessStrategy
@@ -1,10 +1,27 @@
 from bonobo.execution.strategies.base import Strategy
+from bonobo.structs.inputs import Input
 
 
 class NaiveStrategy(Strategy):
+    """
+    Strategy running all nodes in the current thread, mostly useful for debugging and tests.
+
+    The graph is compiled into a push pipeline: each node having only one input is run by its upstream node, as a
+    direct call for each batch of rows (see ``get_fusable_indexes(fan_out=True)`` in graph execution contexts), so a
+    tree-shaped graph runs without any queue. Only the roots, the nodes having more than one input and the nodes too
+    deep in a fused chain to be run as nested calls (see ``MAX_FUSED_DEPTH``) read from a queue, and those queues are
+    unbounded, as there is nobody else to empty them while a writer would wait for room.
+
+    """
+
     # TODO: how to run plugins in "naive" mode ?
 
     def execute(self, graph, **kwargs):
+        kwargs.setdefault("fuse", "tree")
         with self.create_graph_execution_context(graph, **kwargs) as context:
+            for node in context:
+                if type(node.input) is Input:
+                    node.input.maxsize = 0
+                    node.input.budget = None
             context.run_until_complete()
         return context
@@ -0,0 +1,297 @@
+"""
+Multi-process execution strategy.
+
+Each linear chain of nodes (see :meth:`bonobo.execution.contexts.graph.BaseGraphExecutionContext.get_fusable_indexes`)
+runs in its own worker process, forked from the main process (so nodes and services do not need to be picklable, but
+rows do). Edges between processes are :class:`multiprocessing.Queue` instances (pipes), carrying batches of rows and END
+tokens. BEGIN tokens are not sent: each process knows how many it should expect from the graph topology.
+
+The main process keeps a graph execution context where node contexts are only mirrors of the real ones: workers send
+the changes of their statistics and their status on a regular basis, so plugins (like the console output) work as
+usual.
+
+"""
+import logging
+import multiprocessing
+import sys
+import threading
+from queue import Empty
+from time import time
+
+from bonobo.constants import BEGIN, EMPTY, END, TICK_PERIOD
+from bonobo.execution.contexts.base import Lifecycle
+from bonobo.execution.strategies.base import Strategy
+from bonobo.structs.inputs import BATCH_SIZE, BUFFER_SIZE, Writable
+from bonobo.util.bags import decode_rows, encode_rows
+
+logger = logging.getLogger(__name__)
+
+
+class QueueWritable(Writable):
+    """
+    Writable end of an edge between two processes. Rows are sent in batches, as plain tuples grouped by row type
+    (dynamically created bag types cannot be pickled by reference, so their fields are sent instead).
+
+    """
+
+    def __init__(self, queue):
+        self.queue = queue
+
+    def put(self, data, block=True, timeout=None):
+        if data is BEGIN:
+            # The reader process already knows how many BEGIN to expect.
+            return
+        if data is END:
+            self.queue.put(None, block, timeout)
+        else:
+            self.put_many((data,), block, timeout)
+
+    def put_many(self, items, block=True, timeout=None):
+        self.queue.put(encode_rows(items), block, timeout)
+
+
+class ProcessStrategy(Strategy):
+    """
+    Strategy running each chain of nodes in a separate worker process, using the "fork" start method (not available
+    on windows).
+
+    .. attribute:: fuse
+
+        If true (default), linear chains of nodes share a process and pass rows to each other using direct calls.
+        Otherwise, each node gets its own process.
+
+    """
+
+    fuse = True
+
+    def __init__(self, GraphExecutionContextType=None):
+        super().__init__(GraphExecutionContextType)
+        self.mp = multiprocessing.get_context("fork")
+
+    def get_groups(self, context):
+        """
+        Split the graph into groups of nodes that will share a process, as a dict mapping the first node index of each
+        group to the list of indexes in this group.
+
+        """
+        graph = context.graph
+        fusable = context.get_fusable_indexes() if self.fuse else set()
+
+        group_of, groups = {}, {}
+        for i in graph.topologically_sorted_indexes:
+            if i not in group_of:
+                group_of[i] = i
+                groups[i] = [i]
+            for j in graph.outputs_of(i):
+                if j in fusable:
+                    group_of[j] = group_of[i]
+                    groups[group_of[i]].append(j)
+        return groups
+
+    def execute(self, graph, *, services=None, **kwargs):
+        context = self.create_graph_execution_context(graph, services=services, **kwargs)
+        groups = self.get_groups(context)
+
+        # How many BEGIN tokens each node will receive: one for each path from BEGIN.
+        begins = {i: 0 for i in range(len(graph))}
+        for i in graph.outputs_of(BEGIN):
+            begins[i] += 1
+        for i in graph.topologically_sorted_indexes:
+            for j in graph.outputs_of(i):
+                begins[j] += begins[i]
+
+        # Pipes carry batches, so their size is in batches.
+        queues = {}
+        for i in groups:
+            size = graph.buffer_sizes.get(i, BUFFER_SIZE)
+            queues[i] = self.mp.Queue(maxsize=max(size // BATCH_SIZE, 1) if size else 0)
+        status = self.mp.Queue()
+
+        # Fork before starting the main context, so workers don't inherit plugins state (like redirected outputs).
+        processes = {}
+        for i, group in groups.items():
+            processes[i] = self.mp.Process(
+                target=run_worker,
+                args=(
+                    self.GraphExecutionContextType,
+                    graph,
+                    services,
+                    group,
+                    queues,
+                    status,
+                    begins[i],
+                    self.fuse,
+                    context.validation,
+                ),
+                name="bonobo-{}".format(i),
+                daemon=True,
+            )
+            processes[i].start()
+
+        for i in graph.outputs_of(BEGIN):
+            queues[i].put(encode_rows((EMPTY,)))
+            queues[i].put(None)
+
+        # Node contexts in this process are mirrors, their lifecycle is updated from the workers status.
+        context.start(Lifecycle.start)
+
+        try:
+            while context.alive:
+                context.tick(pause=False)
+                self.receive(context, status, timeout=context.TICK_PERIOD)
+                for i, process in processes.items():
+                    if not process.is_alive():
+                        self.receive(context, status, timeout=0)
+                        if not self.check_worker(context, groups[i], process):
+                            # Other workers may wait forever for room in its queue, or for its rows.
+                            self.terminate(context, processes, groups)
+                            break
+        except KeyboardInterrupt:
+            logger.warning("KeyboardInterrupt received. Terminating the worker processes.")
+            context.kill()
+            for process in processes.values():
+                process.terminate()
+
+        for process in processes.values():
+            process.join()
+
+        context.stop()
+        return context
+
+    def receive(self, context, status, *, timeout):
+        """
+        Apply the status messages sent by workers to the mirror node contexts, until timeout.
+
+        """
+        deadline = time() + timeout
+        while True:
+            try:
+                index, statistics, timings, latency, defunct, final = status.get(timeout=max(deadline - time(), 0))
+            except Empty:
+                return
+
+            # Workers send what changed since their last message.
+            node = context[index]
+            for name, delta in statistics.items():
+                node.statistics[name] += delta
+            for name, delta in timings.items():
+                node.timings[name] += delta
+            for bucket, delta in latency.items():
+                node.latency.counts[bucket] += delta
+            if defunct:
+                node._defunct = True
+            if final and not node.stopped:
+                node.stop()
+                if not context.alive:
+                    return
+
+    def check_worker(self, context, group, process):
+        """
+        A worker process exited, make sure its nodes are marked as stopped (and defunct if the process did not finish
+        properly). Returns whether the process finished properly.
+
+        """
+        finished = True
+        for i in group:
+            node = context[i]
+            if not node.stopped:
+                logger.critical(
+                    "Worker process {} exited with code {} before {!r} was done.".format(
+                        process.name, process.exitcode, node
+                    )
+                )
+                node._defunct = True
+                node.stop()
+                finished = False
+        return finished
+
+    def terminate(self, context, processes, groups):
+        """
+        Terminate the worker processes still running, and mark their nodes as killed.
+
+        """
+        for i, process in processes.items():
+            if not process.is_alive():
+                continue
+            logger.warning("Terminating worker process {}.".format(process.name))
+            process.terminate()
+            process.join()
+            for j in groups[i]:
+                node = context[j]
+                if not node.stopped:
+                    node.kill()
+                    node.stop()
+
+
+def get_changes(values, previous):
+    """
+    Differences between two dicts of numbers, for the keys whose value changed.
+
+    """
+    return {key: value - previous.get(key, 0) for key, value in values.items() if value != previous.get(key, 0)}
+
+
+def run_worker(GraphExecutionContextType, graph, services, group, queues, status, begins, fuse, validation):
+    """
+    Worker process entry point: runs a group of nodes, the first one reading from its queue and the others fused with
+    it.
+
+    """
+    context = GraphExecutionContextType(graph, services=services, fuse=fuse, validation=validation)
+    nodes = [context[i] for i in group]
+    head = nodes[0]
+
+    # Outputs going to another group are sent through the other group's queue.
+    for i, node in zip(group, nodes):
+        node.outputs = [
+            context[j].input if j in group else QueueWritable(queues[j]) for j in sorted(graph.outputs_of(i))
+        ]
+
+    for _ in range(begins):
+        head.input.put(BEGIN)
+
+    def feed():
+        ends, queue = begins, queues[group[0]]
+        while ends:
+            message = queue.get()
+            if message is None:
+                ends -= 1
+                head.input.put(END)
+            elif head.input.alive:
+                head.input.put_many(decode_rows(message))
+
+    # What was sent so far for each node, so only changes are sent (the main process adds them to its mirrors).
+    reported = {i: ({}, {}, {}) for i in group}
+    lock = threading.Lock()
+
+    def report(final=False):
+        with lock:
+            for i, node in zip(group, nodes):
+                current = dict(node.get_statistics()), node.get_timings(), dict(enumerate(node.get_latency().counts))
+                deltas = tuple(get_changes(values, previous) for values, previous in zip(current, reported[i]))
+                reported[i] = current
+                if final or node.defunct or any(deltas):
+                    status.put((i, *deltas, node.defunct, final))
+
+    done = threading.Event()
+
+    def reporter():
+        while not done.wait(TICK_PERIOD):
+            report()
+
+    threading.Thread(target=feed, daemon=True).start()
+    threading.Thread(target=reporter, daemon=True).start()
+
+    try:
+        for node in nodes[1:]:
+            node.start()
+        with head:
+            head.loop()
+    except Exception:
+        logger.critical("Critical error in worker process.", exc_info=sys.exc_info())
+    finally:
+        for node in nodes:
+            if node.started and not node.stopped:
+                node.stop()
+        done.set()
+        report(final=True)
@@ -0,0 +1,147 @@
+"""
+Cooperative scheduler execution strategy.
+
+Instead of one thread per node, a fixed pool of worker threads run the nodes that are ready, a quantum of rows at a
+time (see :meth:`bonobo.execution.contexts.node.NodeExecutionContext.run_quantum`). A node is ready when it has
+something to process and room in all its downstream queues. A node is never run by two workers at the same time.
+
+Queue capacities (and the memory budget, if any) are checked before running a node, instead of making writers wait,
+so a worker never blocks: queues can hold up to one quantum more than their capacity.
+
+"""
+import logging
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from threading import Condition, Lock
+
+from bonobo.constants import BEGIN, END
+from bonobo.execution.strategies.base import Strategy
+from bonobo.structs.inputs import BATCH_SIZE, Input
+
+logger = logging.getLogger(__name__)
+
+
+class SchedulerStrategy(Strategy):
+    """
+    Strategy running all nodes on a fixed number of worker threads.
+
+    .. attribute:: quantum
+
+        Maximum number of rows a node processes (or produces, for generators) before the worker moves to another node.
+
+    .. attribute:: tick_period
+
+        How often a TICK event is dispatched to plugins while the nodes run, in seconds (defaults to the graph
+        execution context's TICK_PERIOD). The execution ends as soon as the last node is done, without waiting for the
+        next tick.
+
+    """
+
+    quantum = BATCH_SIZE
+    tick_period = None
+
+    def __init__(self, GraphExecutionContextType=None, *, workers=None, quantum=None, tick_period=None):
+        """
+        :param workers: number of worker threads, defaults to the number of CPUs
+        :param quantum: see :attr:`quantum`
+        :param tick_period: see :attr:`tick_period`
+        """
+        super().__init__(GraphExecutionContextType)
+        self.workers = workers or os.cpu_count() or 1
+        self.quantum = quantum or self.quantum
+        if tick_period is not None:
+            self.tick_period = tick_period
+
+    def execute(self, graph, **kwargs):
+        context = self.create_graph_execution_context(graph, **kwargs)
+        context.write(BEGIN, (), END)
+
+        # Capacities are checked by the scheduler, queues themselves must never block.
+        capacities = {}
+        for i, node in enumerate(context):
+            if type(node.input) is Input:
+                capacities[i] = node.input.maxsize
+                node.input.maxsize = 0
+                node.input.budget = None
+
+        inputs_of = {i: set() for i in range(len(graph))}
+        for i in range(len(graph)):
+            for j in graph.outputs_of(i):
+                inputs_of[j].add(i)
+
+        lock, scheduled = Lock(), set()
+
+        # Notified when a node is done, so the supervisor does not wait for the next tick to end the execution.
+        done = Condition()
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+
+            def schedule(indexes):
+                with lock:
+                    for i in indexes:
+                        if i not in scheduled and self.is_ready(context, i, capacities):
+                            scheduled.add(i)
+                            executor.submit(run, i)
+
+            def run(i):
+                try:
+                    context[i].run_quantum(self.quantum)
+                except Exception:
+                    logger.critical("Critical error in scheduler worker.", exc_info=sys.exc_info())
+                finally:
+                    with lock:
+                        scheduled.discard(i)
+                    # Itself (if there is more to do), downstream nodes (they got input) and upstream nodes (they got
+                    # room).
+                    schedule((i, *graph.outputs_of(i), *inputs_of[i]))
+                    if not context[i].should_loop:
+                        with done:
+                            done.notify()
+
+            try:
+                context.start()
+                schedule(range(len(graph)))
+            except Exception:
+                logger.critical("Exception caught while starting execution context.", exc_info=sys.exc_info())
+
+            tick_period = context.TICK_PERIOD if self.tick_period is None else self.tick_period
+
+            # Wait for the nodes to be done, waking up on a regular basis to let plugins know. Killed nodes are not run
+            # anymore, so they would never read their END token and stop by themselves.
+            while True:
+                try:
+                    with done:
+                        if not any(node.should_loop for node in context):
+                            break
+                        done.wait(tick_period)
+                    context.tick(pause=False)
+                except KeyboardInterrupt:
+                    logger.warning("KeyboardInterrupt received. Trying to terminate the nodes gracefully.")
+                    context.kill()
+                    break
+
+        context.stop()
+        return context
+
+    def is_ready(self, context, i, capacities):
+        """
+        Whether node `i` has something to do, and room for its outputs.
+
+        """
+        node = context[i]
+        if not node.should_loop or not node.has_work:
+            return False
+
+        budget = context.memory_budget
+        for j in context.graph.outputs_of(i):
+            output = context[j].input
+            # Nobody will read those rows anyway.
+            if not output.alive:
+                continue
+            size = output.qsize()
+            if 0 < capacities.get(j, 0) <= size:
+                return False
+            if budget is not None and size >= BATCH_SIZE and budget.exceeded():
+                return False
+        return True
@@ -0,0 +1,177 @@
+"""
+Synthetic data sources, to load test graphs (or benchmark nodes) with rows of a declared schema, without writing
+ad-hoc generator functions.
+
+    >>> import bonobo
+    >>> from bonobo.nodes.synthetic import Float, Integer, String, Timestamp
+    >>> graph = bonobo.Graph(
+    ...     bonobo.Generate(
+    ...         {"id": Integer(0, 10 ** 6), "price": Float(0, 100), "city": String(50), "at": Timestamp()},
+    ...         count=10 ** 6,
+    ...     ),
+    ...     bonobo.CsvWriter("synthetic.csv"),
+    ... )
+
+"""
+import datetime
+import string
+from random import Random
+from time import perf_counter, sleep
+
+from bonobo.config import Configurable, Option, use_context
+
+__all__ = ["Float", "Generate", "Integer", "String", "Timestamp"]
+
+# When generating at a given rate, rows are sent in bursts at most this far apart (in seconds).
+RATE_PERIOD = 0.1
+
+
+class Field:
+    """
+    Base class for synthetic field types.
+
+    """
+
+    def get_column(self, random):
+        """
+        Returns a function that builds a list of `size` values, the first one being the `start`-th value of the
+        column, using `random` (a :class:`random.Random` instance owned by this column).
+
+        """
+        raise NotImplementedError("Abstract.")
+
+
+class Integer(Field):
+    """
+    Uniformly distributed integers, from `low` (included) to `high` (excluded).
+
+    """
+
+    def __init__(self, low=0, high=2 ** 31):
+        if high <= low:
+            raise ValueError("Integer range must not be empty (got {!r} to {!r}).".format(low, high))
+        self.low, self.high = low, high
+
+    def get_column(self, random):
+        low, span, random = self.low, self.high - self.low, random.random
+        return lambda start, size: [low + int(random() * span) for _ in range(size)]
+
+
+class Float(Field):
+    """
+    Uniformly distributed floats, between `low` and `high`.
+
+    """
+
+    def __init__(self, low=0.0, high=1.0):
+        self.low, self.high = low, high
+
+    def get_column(self, random):
+        low, span, random = self.low, self.high - self.low, random.random
+        return lambda start, size: [low + random() * span for _ in range(size)]
+
+
+class String(Field):
+    """
+    Strings of `length` letters and digits, picked uniformly among `cardinality` distinct values.
+
+    """
+
+    alphabet = string.ascii_letters + string.digits
+
+    def __init__(self, cardinality=100, length=8):
+        if cardinality < 1 or cardinality > len(self.alphabet) ** length:
+            raise ValueError("Cannot build {!r} distinct strings of length {!r}.".format(cardinality, length))
+        self.cardinality, self.length = cardinality, length
+
+    def get_column(self, random):
+        values, seen = [], set()
+        while len(values) < self.cardinality:
+            value = "".join(random.choice(self.alphabet) for _ in range(self.length))
+            if value not in seen:
+                seen.add(value)
+                values.append(value)
+
+        cardinality, random = self.cardinality, random.random
+        return lambda start, size: [values[int(random() * cardinality)] for _ in range(size)]
+
+
+class Timestamp(Field):
+    """
+    Increasing timestamps, `interval` seconds apart, from `start`. They are datetime objects, or strings if a
+    :meth:`datetime.datetime.strftime` `format` is given (for formats that cannot serialize datetimes, like JSON).
+
+    """
+
+    def __init__(self, start=datetime.datetime(2020, 1, 1), interval=1.0, *, format=None):
+        self.start, self.interval, self.format = start, interval, format
+
+    def get_column(self, random):
+        start, interval, timedelta = self.start, self.interval, datetime.timedelta
+        if self.format:
+            format = self.format
+            return lambda first, size: [
+                (start + timedelta(seconds=(first + i) * interval)).strftime(format) for i in range(size)
+            ]
+        return lambda first, size: [start + timedelta(seconds=(first + i) * interval) for i in range(size)]
+
+
+@use_context
+class Generate(Configurable):
+    """
+    Source node that sends synthetic rows, with the declared fields: `count` rows (or an infinite stream, until the
+    execution is stopped), as fast as possible or at a given `rate`.
+
+    Values are built column by column, in batches, so generating them costs little compared to what is measured
+    downstream. Each column has its own random generator, seeded from `seed` and its position, so the same options
+    always produce the same rows (whatever the batch size or rate).
+
+    .. attribute:: fields
+
+        Ordered mapping (or list of pairs) of field names to field types (:class:`Integer`, :class:`Float`,
+        :class:`String` or :class:`Timestamp`).
+
+    .. attribute:: count
+
+        How many rows to send (forever, if not set).
+
+    .. attribute:: rate
+
+        Target throughput, in rows per second (as fast as possible, if not set). Rows are sent in bursts, at most
+        100ms apart.
+
+    .. attribute:: seed
+
+        Seed of the random generators.
+
+    .. attribute:: batch_size
+
+        How many rows are generated at once.
+
+    """
+
+    fields = Option(positional=True, required=True)
+    count = Option(int, positional=True, required=False)
+    rate = Option(float, required=False)
+    seed = Option(int, default=0)
+    batch_size = Option(int, default=1000)
+
+    def __call__(self, context):
+        fields = list(self.fields.items() if hasattr(self.fields, "items") else self.fields)
+        context.set_output_fields([name for name, field in fields])
+        make = context.output_type._make
+        columns = [field.get_column(Random("{}:{}".format(self.seed, i))) for i, (name, field) in enumerate(fields)]
+
+        count, rate, batch_size = self.count, self.rate, self.batch_size
+        if rate:
+            batch_size = max(1, min(batch_size, int(rate * RATE_PERIOD)))
+
+        produced, started = 0, perf_counter()
+        while count is None or produced < count:
+            size = batch_size if count is None else min(batch_size, count - produced)
+            if rate:
+                delay = started + produced / rate - perf_counter()
+                if delay > 0:
+                    sleep(delay)
+            yield from map(make, zip(*(column(produced, size) for column in columns)))
+            produced += size
@@ -0,0 +1,255 @@
+import logging
+import math
+import os
+from time import perf_counter
+
+from bonobo.constants import BEGIN
+from bonobo.execution import events
+from bonobo.plugins import Plugin
+from bonobo.structs.inputs import Input
+
+logger = logging.getLogger(__name__)
+
+
+class NodeSample:
+    """
+    What happened to one node between two ticks: time ratios (of the wall time) spent busy, idle and blocked, and how
+    full its input queue is (None if its capacity is unknown).
+
+    """
+
+    __slots__ = ("busy", "idle", "blocked", "fill")
+
+    def __init__(self, busy, idle, blocked, fill):
+        self.busy, self.idle, self.blocked, self.fill = busy, idle, blocked, fill
+
+
+class BottleneckPlugin(Plugin):
+    """
+    Finds which node limits the throughput of a graph, while it runs.
+
+    At each tick, the busy, idle and blocked time ratios of each node (see
+    :meth:`bonobo.execution.contexts.node.NodeExecutionContext.get_timings`) and the occupancy of its input queue are
+    sampled. A node is saturated when it is mostly busy, its input is full (or its upstream nodes are mostly blocked
+    writing to it) and its downstream nodes are starving (their inputs are almost empty, or they are mostly idle).
+    The saturated node, if any, is logged each time it changes.
+
+    At the end of the execution, a summary is logged (and kept in :attr:`summary`): time ratios and saturated ticks for
+    each node, the critical path (the chain of nodes from a root to a leaf that spent the most time busy), and
+    recommendations (parallel replicas for the bottleneck, larger buffers for nodes alternating between idle and
+    blocked).
+
+    .. attribute:: saturation
+
+        Busy ratio above which a node can be considered saturated, and blocked (or idle) ratio above which its upstream
+        (or downstream) nodes are considered waiting for it.
+
+    .. attribute:: full
+
+        Input queue occupancy ratio above which a queue is considered full (its opposite is used for empty).
+
+    """
+
+    saturation = 0.5
+    full = 0.8
+
+    def __init__(self, *, saturation=None, full=None):
+        self.saturation = saturation or self.saturation
+        self.full = full or self.full
+
+        self.summary = None
+        self.bottleneck = None
+
+    def register(self, dispatcher):
+        dispatcher.add_listener(events.START, self.setup)
+        dispatcher.add_listener(events.TICK, self.tick)
+        dispatcher.add_listener(events.STOPPED, self.teardown)
+
+    def unregister(self, dispatcher):
+        dispatcher.remove_listener(events.STOPPED, self.teardown)
+        dispatcher.remove_listener(events.TICK, self.tick)
+        dispatcher.remove_listener(events.START, self.setup)
+
+    def setup(self, event):
+        context = event.context
+        self.outputs_of = {i: sorted(context.graph.outputs_of(i)) for i in range(len(context))}
+        self.inputs_of = {i: set() for i in range(len(context))}
+        for i in range(len(context)):
+            for j in self.outputs_of[i]:
+                self.inputs_of[j].add(i)
+
+        self.summary, self.bottleneck = None, None
+        self._previous = perf_counter(), [node.get_timings() for node in context]
+        self.saturated = [0] * len(context)
+        self.ticks = 0
+
+    def tick(self, event):
+        samples = self.sample(event.context)
+        if samples is None:
+            return
+
+        self.ticks += 1
+        bottleneck = self.get_saturated(samples)
+        if bottleneck is not None:
+            self.saturated[bottleneck] += 1
+        if bottleneck != self.bottleneck:
+            self.bottleneck = bottleneck
+            if bottleneck is not None:
+                sample = samples[bottleneck]
+                logger.info(
+                    "Bottleneck: {} (busy {:.0%}, blocked {:.0%}, input {}).".format(
+                        event.context[bottleneck].name,
+                        sample.busy,
+                        sample.blocked,
+                        "unbounded" if sample.fill is None else "{:.0%} full".format(sample.fill),
+                    )
+                )
+
+    def teardown(self, event):
+        self.tick(event)
+        self.summary = self.summarize(event.context)
+        logger.info(self.format_summary(self.summary))
+
+    def sample(self, context):
+        """
+        Time ratios and queue occupancy of each node since the last call, or None if no time passed.
+
+        """
+        then, previous = self._previous
+        now, timings = perf_counter(), [node.get_timings() for node in context]
+        self._previous = now, timings
+        if now <= then:
+            return None
+
+        samples = []
+        for node, current, before in zip(context, timings, previous):
+            ratios = {name: (current[name] - before[name]) / (now - then) for name in current}
+            samples.append(NodeSample(ratios["busy"], ratios["idle"], ratios["blocked"], get_fill(node)))
+        return samples
+
+    def get_saturated(self, samples):
+        """
+        Index of the node matching the upstream-full / downstream-empty pattern (the busiest one, if more than one),
+        or None.
+
+        """
+        candidates = []
+        for i, sample in enumerate(samples):
+            if sample.busy < self.saturation or sample.blocked >= self.saturation:
+                continue
+
+            upstream_full = (sample.fill is not None and sample.fill >= self.full) or any(
+                samples[j].blocked >= self.saturation for j in self.inputs_of[i]
+            )
+            # Root nodes have no upstream queue to fill, they are saturated if they cannot feed the others.
+            if self.inputs_of[i] and not upstream_full:
+                continue
+
+            downstream_empty = all(
+                (samples[j].fill is not None and samples[j].fill <= 1 - self.full) or samples[j].idle >= self.saturation
+                for j in self.outputs_of[i]
+            )
+            if downstream_empty:
+                candidates.append((sample.busy, i))
+
+        return max(candidates)[1] if candidates else None
+
+    def summarize(self, context):
+        """
+        End of run analysis, as a dict (see :meth:`format_summary`).
+
+        """
+        graph = context.graph
+        duration = (context.stopped_at or 0) - (context.started_at or 0)
+        timings = [node.get_timings() for node in context]
+
+        nodes = []
+        for i, node in enumerate(context):
+            nodes.append(
+                {
+                    "index": i,
+                    "name": node.name,
+                    **{name: seconds / duration if duration > 0 else 0.0 for name, seconds in timings[i].items()},
+                    "saturated": self.saturated[i],
+                    "peak_queued": node.peak_queued,
+                }
+            )
+
+        # Longest path (in busy time) from a root to a leaf, following the topological order.
+        best = {}
+        for i in graph.topologically_sorted_indexes:
+            if i is BEGIN:
+                continue
+            previous = max((best[j] for j in self.inputs_of[i] if j in best), default=(0.0, ()))
+            best[i] = (previous[0] + timings[i]["busy"], previous[1] + (i,))
+        leaves = [best[i] for i in best if not self.outputs_of[i]]
+        critical_path = list(max(leaves)[1]) if leaves else []
+
+        # The bottleneck is the node saturated most often, or the busiest node of the critical path.
+        if any(self.saturated):
+            bottleneck = max(range(len(context)), key=lambda i: self.saturated[i])
+        elif critical_path:
+            bottleneck = max(critical_path, key=lambda i: timings[i]["busy"])
+        else:
+            bottleneck = None
+
+        recommendations = []
+        if bottleneck is not None and timings[bottleneck]["busy"] > 0:
+            others = [timings[i]["busy"] for i in critical_path if i != bottleneck]
+            replicas = math.ceil(timings[bottleneck]["busy"] / max(max(others, default=0.0), duration / 10, 1e-9))
+            replicas = min(max(replicas, 2), os.cpu_count() or 2)
+            recommendations.append(
+                "{!r} limits the throughput: try running it with parallel replicas, for example "
+                "graph.set_parallelism({}, {}).".format(context[bottleneck].name, bottleneck, replicas)
+            )
+        for node in nodes:
+            if node["idle"] >= 1 - self.full and node["blocked"] >= 1 - self.full:
+                size = context[node["index"]].input.maxsize if isinstance(context[node["index"]].input, Input) else 0
+                recommendations.append(
+                    "{!r} alternates between waiting for input and for room in its outputs: a larger buffer may "
+                    "absorb the bursts, for example graph.set_buffer_size({}, {}).".format(
+                        node["name"], node["index"], max(size, 1) * 4
+                    )
+                )
+
+        return {
+            "ticks": self.ticks,
+            "nodes": nodes,
+            "bottleneck": bottleneck,
+            "critical_path": critical_path,
+            "recommendations": recommendations,
+        }
+
+    def format_summary(self, summary):
+        lines = ["Bottleneck analysis ({} ticks):".format(summary["ticks"])]
+        lines.append(
+            "{:>4}  {:<24} {:>6} {:>6} {:>8} {:>10} {:>11}".format(
+                "", "node", "busy", "idle", "blocked", "saturated", "peak queue"
+            )
+        )
+        for node in summary["nodes"]:
+            lines.append(
+                "{:>4}  {:<24} {:>6.0%} {:>6.0%} {:>8.0%} {:>10} {:>11}".format(
+                    "*" if node["index"] == summary["bottleneck"] else "",
+                    node["name"][:24],
+                    node["busy"],
+                    node["idle"],
+                    node["blocked"],
+                    node["saturated"],
+                    node["peak_queued"],
+                )
+            )
+        names = {node["index"]: node["name"] for node in summary["nodes"]}
+        lines.append("Critical path: {}".format(" -> ".join(names[i] for i in summary["critical_path"])))
+        lines.extend(summary["recommendations"])
+        return "\n".join(lines)
+
+
+def get_fill(node):
+    """
+    Occupancy ratio of a node's input queue, or None for unbounded queues (or fused nodes, that have none).
+
+    """
+    if type(node.input) is not Input or node.input.maxsize <= 0:
+        return None
+    return node.statistics["queued"] / node.input.maxsize
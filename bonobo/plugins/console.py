@@ -102,7 +102,7 @@ class ConsoleOutputPlugin(Plugin):
                     node.name,
                     name_suffix,
                     " ",
-                    node.get_statistics_as_string(),
+                    node.get_statistics_as_string(timings=True),
                     " ",
                     node.get_flags_as_string(),
                     Style.RESET_ALL,
@@ -0,0 +1,191 @@
+import dis
+import functools
+import inspect
+import tracemalloc
+from collections import defaultdict
+
+from bonobo.execution import events
+from bonobo.execution.contexts.parallel import ParallelNodeExecutionContext
+from bonobo.plugins import Plugin
+
+
+class MemoryTracerPlugin(Plugin):
+    """
+    Attributes the memory allocated (and still held) during an execution to the nodes of the graph, using
+    :mod:`tracemalloc`, and keeps track of each node's peak.
+
+    Allocation tracebacks only tell which code made an allocation, not which thread (and so, which node), and nodes may
+    share their code (like two instances of the same class). So each node processes rows through a function of its
+    own (see :func:`create_marker`), and each live memory block is attributed to the innermost node being run in the
+    block's allocation traceback. Blocks allocated out of the row processing (like by context processors) are
+    attributed to the innermost node whose code is in the traceback: the lines of a function node, or of the class of a
+    callable object node (and its base classes), unless this code is shared by several nodes (it is ambiguous, so not
+    attributed at all). Memory allocated by bonobo itself on behalf of a node (like rows waiting in a queue) is
+    estimated separately (see :attr:`bonobo.structs.inputs.Input.queued_bytes`).
+
+    Results are stored in the node contexts (``memory`` and ``peak_memory``, in bytes, see
+    :meth:`bonobo.execution.contexts.node.NodeExecutionContext.get_statistics`), so they also appear in the console
+    output and the run report.
+
+    It is added automatically by :func:`bonobo.run` if the TRACE_MEMORY setting is true. Tracing memory makes the
+    execution noticeably slower, and only works for nodes running in the current process (not with the "processpool"
+    strategy).
+
+    .. attribute:: nframe
+
+        How many frames are stored for each allocation traceback (deeper means more accurate, but slower).
+
+    .. attribute:: every
+
+        Memory is measured every `every` ticks (and at the end), as taking a snapshot can be slow when a lot of memory
+        blocks are allocated.
+
+    """
+
+    nframe = 25
+    every = 4
+
+    def __init__(self, *, nframe=None, every=None):
+        self.nframe = nframe or self.nframe
+        self.every = every or self.every
+        self._started = False
+
+    def register(self, dispatcher):
+        dispatcher.add_listener(events.START, self.setup)
+        dispatcher.add_listener(events.TICK, self.tick)
+        dispatcher.add_listener(events.STOP, self.measure)
+        dispatcher.add_listener(events.STOPPED, self.teardown)
+
+    def unregister(self, dispatcher):
+        dispatcher.remove_listener(events.STOPPED, self.teardown)
+        dispatcher.remove_listener(events.STOP, self.measure)
+        dispatcher.remove_listener(events.TICK, self.tick)
+        dispatcher.remove_listener(events.START, self.setup)
+
+    def setup(self, event):
+        # Another tool may be tracing already, in which case we only take snapshots.
+        self._started = not tracemalloc.is_tracing()
+        if self._started:
+            tracemalloc.start(self.nframe)
+
+        owners = defaultdict(set)
+        self.markers = {}
+        for i, node in enumerate(event.context):
+            for location in get_code_locations(node.wrapped):
+                owners[location].add(i)
+            node.memory, node.peak_memory = 0, 0
+
+            if inspect.iscoroutinefunction(node._process):
+                continue
+            marker = create_marker(i)
+            self.markers[marker.__code__.co_filename] = i
+            # Entry points of the row processing, depending on the strategy (replicas of nodes with parallelism run
+            # their own loop, in their own thread, see ParallelNodeExecutionContext._work).
+            node._process = functools.partial(marker, node._process)
+            node.run_quantum = functools.partial(marker, node.run_quantum)
+            if isinstance(node, ParallelNodeExecutionContext):
+                node._work = functools.partial(marker, node._work)
+
+        # Code shared by several nodes is ambiguous, it is not attributed.
+        self.locations = defaultdict(list)
+        for (filename, first, last), indexes in owners.items():
+            self.locations[filename].append((first, last, indexes.pop() if len(indexes) == 1 else None))
+
+        self.counter = 0
+
+    def tick(self, event):
+        self.counter += 1
+        if not self.counter % self.every:
+            self.measure(event)
+
+    def teardown(self, event):
+        if self._started:
+            tracemalloc.stop()
+            self._started = False
+
+    def measure(self, event):
+        """
+        Take a snapshot, and update the memory held by each node.
+
+        """
+        if not tracemalloc.is_tracing():
+            return
+
+        memory = self.attribute(tracemalloc.take_snapshot())
+        for i, node in enumerate(event.context):
+            node.memory = memory.get(i, 0)
+            if node.memory > node.peak_memory:
+                node.peak_memory = node.memory
+
+    def attribute(self, snapshot):
+        """
+        Bytes held by each node (by index), in a snapshot.
+
+        """
+        memory = defaultdict(int)
+        owners = {}
+        for trace in snapshot.traces:
+            traceback = trace.traceback
+            try:
+                owner = owners[traceback]
+            except KeyError:
+                owner = owners[traceback] = self.get_owner(traceback)
+            if owner is not None:
+                memory[owner] += trace.size
+        return memory
+
+    def get_owner(self, traceback):
+        # Most recent frame first, so nested calls (fused nodes) are attributed to the callee.
+        owner, located = None, False
+        for frame in reversed(traceback):
+            try:
+                return self.markers[frame.filename]
+            except KeyError:
+                pass
+            if not located:
+                for first, last, i in self.locations.get(frame.filename, ()):
+                    if first <= frame.lineno <= last:
+                        owner, located = i, True
+                        break
+        return owner
+
+
+def create_marker(i):
+    """
+    Function calling `f` with the other arguments, compiled under a file name of its own (like ``<bonobo node 2>``),
+    so allocations made while it runs can be attributed to node `i`.
+
+    """
+    namespace = {}
+    source = "def call(f, *args, **kwargs):\n    return f(*args, **kwargs)\n"
+    exec(compile(source, "<bonobo node {}>".format(i), "exec"), namespace)
+    return namespace["call"]
+
+
+def get_code_locations(node):
+    """
+    Source locations (filename, first line, last line) of a node's code: the function itself (unwrapped from its
+    decorators), or the classes of a callable object (excluding bonobo's configuration base classes).
+
+    """
+    from bonobo.config import Configurable
+
+    if inspect.isfunction(node) or inspect.ismethod(node):
+        code = inspect.unwrap(node).__code__
+        try:
+            # Including nested functions, that are other code objects.
+            lines, first = inspect.getsourcelines(code)
+            return [(code.co_filename, first, first + len(lines) - 1)]
+        except (OSError, TypeError):
+            return [(code.co_filename, code.co_firstlineno, max(line for _, line in dis.findlinestarts(code)))]
+
+    locations = []
+    for cls in type(node).__mro__:
+        if cls is object or issubclass(Configurable, cls):
+            continue
+        try:
+            lines, first = inspect.getsourcelines(cls)
+            locations.append((inspect.getsourcefile(cls), first, first + len(lines) - 1))
+        except (OSError, TypeError):
+            continue
+    return locations
@@ -0,0 +1,214 @@
+import logging
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from time import perf_counter
+
+from bonobo.execution import events
+from bonobo.plugins import Plugin
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+STATES = ("pending", "running", "done", "killed", "defunct")
+
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_value(value):
+    if isinstance(value, float):
+        return repr(value)
+    return str(int(value))
+
+
+def format_labels(labels):
+    return ",".join('{}="{}"'.format(name, escape(value)) for name, value in labels)
+
+
+class OpenMetricsPlugin(Plugin):
+    """
+    Exposes metrics about each node of the graph in the OpenMetrics text format, on a local HTTP endpoint (any path)
+    and/or in a text file (for example, in the directory of a node_exporter textfile collector).
+
+    Metrics are rendered once per tick (and once at the end), from the nodes' statistics: scraping only returns the
+    last rendering, and never touches the nodes. Rates are computed from the difference between two ticks.
+
+    Each node is labelled with its index and name:
+
+    * ``bonobo_node_rows_total`` (counter, by direction),
+    * ``bonobo_node_errors_total`` and ``bonobo_node_warnings_total`` (counters),
+    * ``bonobo_node_rows_per_second`` (gauge, by direction),
+    * ``bonobo_node_queued_rows`` (gauge, rows waiting in the node's input),
+    * ``bonobo_node_seconds_total`` (counter, time spent busy, idle or blocked),
+    * ``bonobo_node_latency_seconds`` (histogram of the time spent on each input row),
+    * ``bonobo_node_state`` (stateset, one of pending, running, done, killed or defunct).
+
+    The endpoint stays available until the end of the execution.
+
+    .. attribute:: host
+
+        Address the HTTP server listens on (local only, by default).
+
+    .. attribute:: port
+
+        Port of the HTTP server (0 picks a free port, see :attr:`address`). If None, there is no HTTP server.
+
+    .. attribute:: path
+
+        If set, file where metrics are written at each tick (replaced atomically).
+
+    """
+
+    host = "127.0.0.1"
+
+    def __init__(self, port=9184, *, host=None, path=None):
+        self.port = port
+        self.host = host or self.host
+        self.path = path
+
+        self.server = None
+        self.metrics = b"# EOF\n"
+        self._previous = None
+
+    @property
+    def address(self):
+        """
+        (host, port) the HTTP server actually listens on, if any.
+
+        """
+        return self.server.server_address if self.server else None
+
+    def register(self, dispatcher):
+        dispatcher.add_listener(events.START, self.setup)
+        dispatcher.add_listener(events.TICK, self.tick)
+        dispatcher.add_listener(events.STOPPED, self.teardown)
+
+    def unregister(self, dispatcher):
+        dispatcher.remove_listener(events.STOPPED, self.teardown)
+        dispatcher.remove_listener(events.TICK, self.tick)
+        dispatcher.remove_listener(events.START, self.setup)
+
+    def setup(self, event):
+        self._previous = None
+        if self.port is not None:
+            plugin = self
+
+            class Handler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    metrics = plugin.metrics
+                    self.send_response(200)
+                    self.send_header("Content-Type", CONTENT_TYPE)
+                    self.send_header("Content-Length", str(len(metrics)))
+                    self.end_headers()
+                    self.wfile.write(metrics)
+
+                def log_message(self, format, *args):
+                    logger.debug(format, *args)
+
+            self.server = _Server((self.host, self.port), Handler)
+            threading.Thread(target=self.server.serve_forever, name="bonobo-openmetrics", daemon=True).start()
+            logger.info("Serving metrics on http://{}:{}/.".format(*self.address))
+
+    def tick(self, event):
+        self.metrics = self.render(event.context).encode("utf-8")
+        if self.path:
+            tmp = "{}.{}.tmp".format(self.path, os.getpid())
+            with open(tmp, "wb") as f:
+                f.write(self.metrics)
+            os.replace(tmp, self.path)
+
+    def teardown(self, event):
+        self.tick(event)
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def render(self, context):
+        """
+        Metrics of all nodes of an execution context, as an OpenMetrics text exposition.
+
+        """
+        now = perf_counter()
+        nodes = []
+        for i, node in enumerate(context):
+            statistics = dict(node.get_statistics())
+            nodes.append(((("node", node.name), ("index", i)), node, statistics))
+
+        # Rates, from the counters of the previous rendering.
+        rates = {}
+        if self._previous is not None:
+            then, previous = self._previous
+            if now > then:
+                for labels, node, statistics in nodes:
+                    before = previous.get(labels, {})
+                    for direction in ("in", "out"):
+                        delta = statistics.get(direction, 0) - before.get(direction, 0)
+                        rates[labels, direction] = delta / (now - then)
+        self._previous = now, {labels: statistics for labels, node, statistics in nodes}
+
+        lines = []
+
+        def metric(name, type, help):
+            lines.append("# TYPE {} {}".format(name, type))
+            lines.append("# HELP {} {}".format(name, help))
+
+        def sample(name, labels, value):
+            lines.append("{}{{{}}} {}".format(name, format_labels(labels), format_value(value)))
+
+        metric("bonobo_node_rows", "counter", "Rows read (in) and written (out) by the node.")
+        for labels, node, statistics in nodes:
+            for direction in ("in", "out"):
+                sample("bonobo_node_rows_total", labels + (("direction", direction),), statistics.get(direction, 0))
+
+        metric("bonobo_node_rows_per_second", "gauge", "Rows read (in) and written (out) per second, since last tick.")
+        for labels, node, statistics in nodes:
+            for direction in ("in", "out"):
+                rate = rates.get((labels, direction), 0.0)
+                sample("bonobo_node_rows_per_second", labels + (("direction", direction),), rate)
+
+        metric("bonobo_node_errors", "counter", "Errors raised while processing rows.")
+        for labels, node, statistics in nodes:
+            sample("bonobo_node_errors_total", labels, statistics.get("err", 0))
+
+        metric("bonobo_node_warnings", "counter", "Warnings raised while processing rows.")
+        for labels, node, statistics in nodes:
+            sample("bonobo_node_warnings_total", labels, statistics.get("warn", 0))
+
+        metric("bonobo_node_queued_rows", "gauge", "Rows waiting in the node's input.")
+        for labels, node, statistics in nodes:
+            sample("bonobo_node_queued_rows", labels, statistics.get("queued", 0))
+
+        metric("bonobo_node_seconds", "counter", "Time spent busy, idle (waiting for input) or blocked (on outputs).")
+        for labels, node, statistics in nodes:
+            for state, seconds in sorted(node.get_timings().items()):
+                sample("bonobo_node_seconds_total", labels + (("state", state),), seconds)
+
+        metric("bonobo_node_latency_seconds", "histogram", "Time spent in the node's code for each input row.")
+        for labels, node, statistics in nodes:
+            latency = node.get_latency()
+            count = 0
+            # The last bucket also holds everything above its bound.
+            for i, bucket in enumerate(latency.counts[:-1]):
+                count += bucket
+                sample("bonobo_node_latency_seconds_bucket", labels + (("le", repr(2.0 ** (i - 20))),), count)
+            count += latency.counts[-1]
+            sample("bonobo_node_latency_seconds_bucket", labels + (("le", "+Inf"),), count)
+            sample("bonobo_node_latency_seconds_count", labels, count)
+
+        metric("bonobo_node_state", "stateset", "Lifecycle state of the node.")
+        for labels, node, statistics in nodes:
+            state = node.state
+            for name in STATES:
+                sample("bonobo_node_state", labels + (("bonobo_node_state", name),), name == state)
+
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+class _Server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
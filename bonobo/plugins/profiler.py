@@ -0,0 +1,208 @@
+import cProfile
+import functools
+import inspect
+import logging
+import os
+import pstats
+import re
+import threading
+from collections import defaultdict
+
+from bonobo import settings
+from bonobo.execution import events
+from bonobo.execution.contexts.parallel import ParallelNodeExecutionContext
+from bonobo.plugins import Plugin
+
+logger = logging.getLogger(__name__)
+
+# Profiler running in each thread, if any (only one can be enabled at a time).
+_active = threading.local()
+
+
+class NodeProfiler:
+    """
+    Deterministic profiler (see :mod:`cProfile`) for one node, enabled only while the node processes rows, whatever the
+    thread doing it. If another node's profiler is already running in this thread (a fused node, called by its upstream
+    node), it is paused meanwhile, so each node only accounts for its own work.
+
+    Replicas of a node with parallelism (see :class:`bonobo.execution.contexts.parallel.ParallelNodeExecutionContext`)
+    run at the same time in different threads, so each one gets its own profiler, merged in this one's statistics.
+
+    """
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+        self.replicas = []
+
+    def wrap(self, f):
+        @functools.wraps(f)
+        def profiled(*args, **kwargs):
+            previous = getattr(_active, "profile", None)
+            if previous is not None:
+                previous.disable()
+            _active.profile = self.profile
+            self.profile.enable()
+            try:
+                return f(*args, **kwargs)
+            finally:
+                self.profile.disable()
+                _active.profile = previous
+                if previous is not None:
+                    previous.enable()
+
+        return profiled
+
+    def wrap_work(self, work):
+        """
+        Wraps the loop run by each replica's thread (see
+        :meth:`bonobo.execution.contexts.parallel.ParallelNodeExecutionContext._work`), so the replica's rows are
+        profiled too (replicas are only created when the node starts).
+
+        """
+
+        @functools.wraps(work)
+        def profiled_work(replica, queue):
+            profiler = NodeProfiler()
+            self.replicas.append(profiler)
+            replica._process = profiler.wrap(replica._process)
+            return work(replica, queue)
+
+        return profiled_work
+
+    def get_stats(self):
+        # Profiles that never ran (like replicas that got no row) cannot be loaded.
+        profiles = [self.profile, *(replica.profile for replica in self.replicas)]
+        stats = pstats.Stats(*(profile for profile in profiles if profile.getstats()))
+        # Pausing the profiler is not part of the node's work.
+        for func in list(stats.stats):
+            if "_lsprof.Profiler" in func[2]:
+                del stats.stats[func]
+        return stats
+
+
+class ProfilerPlugin(Plugin):
+    """
+    Profiles each node of the graph (the row processing, in the node's own code and in bonobo's code), and writes one
+    report per node at the end of the execution, in `path`:
+
+    * ``<index>-<name>.pstats``: statistics to be read using :mod:`pstats` (or any tool reading this format, like
+      snakeviz),
+    * ``<index>-<name>.collapsed``: collapsed stacks (in microseconds), that flamegraph tools can render. As the
+      profiler is deterministic and does not record stacks, time of functions called from different places is split
+      between them proportionally to the time spent in each call site.
+
+    A summary of the top functions of each node (by internal time) is written in ``summary.txt`` and logged.
+
+    It is added automatically by :func:`bonobo.run` if the PROFILE setting is true. Only nodes running in the current
+    process can be profiled (not with the "processpool" strategy), and asyncio nodes are not profiled. Nodes with
+    parallelism are profiled in their replicas, in one report per node.
+
+    .. attribute:: path
+
+        Directory where reports are written, defaults to the PROFILE_PATH setting.
+
+    .. attribute:: top
+
+        How many functions are listed for each node in the summary.
+
+    """
+
+    top = 10
+
+    def __init__(self, path=None, *, top=None):
+        self.path = path or settings.PROFILE_PATH.get()
+        self.top = top or self.top
+        self.profilers = {}
+
+    def register(self, dispatcher):
+        dispatcher.add_listener(events.START, self.setup)
+        dispatcher.add_listener(events.STOPPED, self.teardown)
+
+    def unregister(self, dispatcher):
+        dispatcher.remove_listener(events.STOPPED, self.teardown)
+        dispatcher.remove_listener(events.START, self.setup)
+
+    def setup(self, event):
+        self.profilers = {}
+        for i, node in enumerate(event.context):
+            if inspect.iscoroutinefunction(node._process):
+                continue
+            profiler = self.profilers[i] = NodeProfiler()
+            # Entry points of the row processing, depending on the strategy: node loops (and fused nodes) go through
+            # _process, while run_quantum (used by the scheduler) calls _call directly.
+            node._process = profiler.wrap(node._process)
+            node.run_quantum = profiler.wrap(node.run_quantum)
+            if isinstance(node, ParallelNodeExecutionContext):
+                node._work = profiler.wrap_work(node._work)
+
+    def teardown(self, event):
+        os.makedirs(self.path, exist_ok=True)
+
+        summary = []
+        for i, profiler in sorted(self.profilers.items()):
+            node = event.context[i]
+            name = "{}-{}".format(i, re.sub(r"[^\w.-]+", "_", node.name).strip("_"))
+            stats = profiler.get_stats()
+            stats.dump_stats(os.path.join(self.path, name + ".pstats"))
+            with open(os.path.join(self.path, name + ".collapsed"), "w") as f:
+                for stack, microseconds in sorted(get_collapsed_stacks(stats).items()):
+                    f.write("{} {}\n".format(stack, microseconds))
+            summary.append(get_summary(node.name, stats, self.top))
+
+        summary = "\n\n".join(summary)
+        with open(os.path.join(self.path, "summary.txt"), "w") as f:
+            f.write(summary + "\n")
+        logger.info("Profiling reports written in {}.\n\n{}".format(os.path.abspath(self.path), summary))
+
+
+def get_function_name(func):
+    filename, line, name = func
+    if filename == "~":
+        return name  # builtins
+    return "{}:{}:{}".format(os.path.basename(filename), line, name)
+
+
+def get_summary(name, stats, top):
+    """
+    Table of the `top` functions of a profile, ordered by internal time.
+
+    """
+    lines = [name, "{:>10} {:>12} {:>12}  {}".format("calls", "tottime", "cumtime", "function")]
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)[:top]
+    for func, (cc, nc, tt, ct, callers) in rows:
+        lines.append("{:>10} {:>12.6f} {:>12.6f}  {}".format(nc, tt, ct, get_function_name(func)))
+    return "\n".join(lines)
+
+
+def get_collapsed_stacks(stats, *, max_depth=64):
+    """
+    Approximate collapsed stacks ("a;b;c <microseconds>" lines, as a dict) from a deterministic profile. The internal
+    time of each function is split between its call paths, proportionally to the cumulative time of each call site.
+
+    """
+    callees = defaultdict(dict)
+    for func, (cc, nc, tt, ct, callers) in stats.stats.items():
+        for caller, (_, _, _, caller_ct) in callers.items():
+            callees[caller][func] = caller_ct
+
+    stacks = defaultdict(float)
+
+    def walk(func, path, names, share):
+        cc, nc, tt, ct, callers = stats.stats[func]
+        names = names + (get_function_name(func),)
+        stacks[";".join(names)] += tt * share
+        if len(names) >= max_depth:
+            return
+        for callee, callee_ct in callees[func].items():
+            # Recursion is folded in the first call.
+            if callee in path or not stats.stats[callee][3]:
+                continue
+            callee_share = share * callee_ct / stats.stats[callee][3]
+            if callee_share * stats.stats[callee][3] >= 0.000001:
+                walk(callee, path | {callee}, names, callee_share)
+
+    for func, (cc, nc, tt, ct, callers) in stats.stats.items():
+        if not callers:
+            walk(func, {func}, (), 1.0)
+
+    return {stack: round(seconds * 1000000) for stack, seconds in stacks.items() if round(seconds * 1000000)}
@@ -0,0 +1,180 @@
+import json
+import logging
+import os
+from itertools import count
+from time import perf_counter
+
+from bonobo import settings
+from bonobo.constants import BEGIN
+from bonobo.execution import events
+from bonobo.execution.contexts.parallel import ParallelNodeExecutionContext
+from bonobo.plugins import Plugin
+
+logger = logging.getLogger(__name__)
+
+
+class RowTracer:
+    """
+    Follows a sample of rows through a graph, and records trace events (in Chrome's trace event format, that
+    chrome://tracing or Perfetto can display) for each hop: time spent waiting in the input queue of a node, then in the
+    node itself.
+
+    One out of `every` rows produced by the graph's root nodes starts a trace. Rows produced by a node while it is
+    processing a traced row are traced too, with the same trace id, so fan-outs and generators show up as branches.
+
+    Traced rows are not modified: they are looked up by identity (and destination input) in :attr:`pending`, while
+    they wait to be read. Node contexts call the tracer only if this dict is not empty (see
+    :meth:`bonobo.execution.contexts.node.NodeExecutionContext._process`), so untraced rows cost almost nothing.
+
+    """
+
+    def __init__(self, every):
+        self.every = every
+        self.pending = {}
+        self.events = []
+
+        self._origin = perf_counter()
+        self._roots = {}
+        self._tids = {}
+        self._ids = count(1)
+
+    def register(self, node, tid, *, root=False):
+        """
+        Trace a node context, displayed as the thread `tid`. Rows sent by a root node may start a trace.
+
+        """
+        node._tracer = self
+        self._tids[node] = tid
+        if root:
+            self._roots[node] = 0
+        self.events.append({"name": "thread_name", "ph": "M", "pid": 0, "tid": tid, "args": {"name": node.name}})
+
+    def emit(self, node, row):
+        """
+        Called for each row sent by a traced node.
+
+        """
+        trace = node._trace
+        if trace is None:
+            # Not processing a traced row, but a root node may start a trace.
+            if node not in self._roots:
+                return
+            self._roots[node] += 1
+            if self._roots[node] % self.every:
+                return
+            trace = (next(self._ids), None)
+
+        now = self.now()
+        for output in node.outputs:
+            hop = next(self._ids)
+            self.pending[id(row), id(output)] = (row, trace[0], hop, now)
+            self.events.append(
+                {"name": "row", "cat": "flow", "ph": "s", "id": hop, "ts": now, "pid": 0, "tid": self._tids[node]}
+            )
+
+    def begin(self, node, row):
+        """
+        Called before a traced node processes a row. Returns the trace (trace id, start time) if the row is traced.
+
+        """
+        try:
+            row, trace_id, hop, sent_at = self.pending.pop((id(row), id(node.input)))
+        except KeyError:
+            return None
+
+        now, tid = self.now(), self._tids[node]
+        self.events.append(
+            {"name": "row", "cat": "flow", "ph": "f", "bp": "e", "id": hop, "ts": now, "pid": 0, "tid": tid}
+        )
+        self.events.append(
+            {
+                "name": "queued",
+                "cat": "queue",
+                "ph": "X",
+                "ts": sent_at,
+                "dur": now - sent_at,
+                "pid": 0,
+                "tid": tid,
+                "args": {"trace": trace_id},
+            }
+        )
+        return trace_id, now
+
+    def end(self, node, trace, *, error=False):
+        """
+        Called after a traced node processed a traced row (or failed to). Returns None, for convenience.
+
+        """
+        trace_id, started_at = trace
+        args = {"trace": trace_id, "error": True} if error else {"trace": trace_id}
+        self.events.append(
+            {
+                "name": node.name,
+                "cat": "node",
+                "ph": "X",
+                "ts": started_at,
+                "dur": self.now() - started_at,
+                "pid": 0,
+                "tid": self._tids[node],
+                "args": args,
+            }
+        )
+
+    def now(self):
+        # Microseconds, as expected by trace viewers.
+        return (perf_counter() - self._origin) * 1000000
+
+    def write(self, path):
+        with open(path, "w") as f:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, f)
+
+
+class RowTracerPlugin(Plugin):
+    """
+    Traces a sample of rows end to end (see :class:`RowTracer`), and writes the trace to a JSON file at the end of the
+    execution, in Chrome's trace event format. Each node is displayed as a thread.
+
+    It is added automatically by :func:`bonobo.run` if the TRACE_ROWS setting is not 0. Rows are not followed through
+    asyncio nodes and nodes with parallel replicas (traces stop there), nor in other processes.
+
+    .. attribute:: rate
+
+        Fraction of the rows produced by root nodes to trace (one every ``round(1 / rate)`` rows).
+
+    .. attribute:: path
+
+        Trace file, defaults to the TRACE_ROWS_PATH setting.
+
+    """
+
+    def __init__(self, rate=None, *, path=None):
+        self.rate = rate or settings.TRACE_ROWS.get() or 0.01
+        self.path = path or settings.TRACE_ROWS_PATH.get()
+        self.tracer = None
+
+    def register(self, dispatcher):
+        dispatcher.add_listener(events.START, self.setup)
+        dispatcher.add_listener(events.STOPPED, self.teardown)
+
+    def unregister(self, dispatcher):
+        dispatcher.remove_listener(events.STOPPED, self.teardown)
+        dispatcher.remove_listener(events.START, self.setup)
+
+    def setup(self, event):
+        self.tracer = RowTracer(max(round(1 / self.rate), 1))
+        roots = event.context.graph.outputs_of(BEGIN)
+        for i, node in enumerate(event.context):
+            if isinstance(node, ParallelNodeExecutionContext):
+                continue
+            self.tracer.register(node, i, root=i in roots)
+
+    def teardown(self, event):
+        for node in event.context:
+            node._tracer, node._trace = None, None
+        # Rows that were never read (killed nodes) are not waited for.
+        self.tracer.pending.clear()
+        dirname = os.path.dirname(self.path)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+        self.tracer.write(self.path)
+        logger.info("Row traces written in {}.".format(os.path.abspath(self.path)))
@@ -16,6 +16,22 @@ def to_bool(s):
     return False
 
 
+def to_bytes(s):
+    """
+    Parse a size in bytes, with an optional K, M or G suffix (powers of 1024). Empty values are None.
+
+    """
+    if s is None or isinstance(s, int):
+        return s
+    s = s.strip().upper()
+    if not len(s):
+        return None
+    for i, suffix in enumerate("KMG", start=1):
+        if s.endswith(suffix):
+            return int(float(s[:-1]) * 1024 ** i)
+    return int(s)
+
+
 class Setting:
     __all__ = {}
 
@@ -83,12 +99,25 @@ DEBUG = Setting("DEBUG", formatter=to_bool, default=False)
 # Profile mode.
 PROFILE = Setting("PROFILE", formatter=to_bool, default=False)
 
+# Where profile mode writes its reports.
+PROFILE_PATH = Setting("PROFILE_PATH", default="profile")
+
+# Memory tracing mode (attributes memory to nodes, using tracemalloc).
+TRACE_MEMORY = Setting("TRACE_MEMORY", formatter=to_bool, default=False)
+
+# Fraction of rows to trace end to end (0 disables row tracing), and where the trace is written.
+TRACE_ROWS = Setting("TRACE_ROWS", formatter=float, default=0.0, validator=lambda value: 0 <= value <= 1)
+TRACE_ROWS_PATH = Setting("TRACE_ROWS_PATH", default="trace.json")
+
 # Alpha mode.
 ALPHA = Setting("ALPHA", formatter=to_bool, default=False)
 
 # Quiet mode.
 QUIET = Setting("QUIET", formatter=to_bool, default=False)
 
+# Approximate memory limit (in bytes, K/M/G suffixes allowed) for the rows waiting in queues during an execution.
+MEMORY_BUDGET = Setting("MEMORY_BUDGET", formatter=to_bytes)
+
 # Logging level.
 LOGGING_LEVEL = Setting(
     "LOGGING_LEVEL",
@@ -105,6 +134,15 @@ IOFORMATS = {IOFORMAT_ARG0, IOFORMAT_KWARGS}
 
 IOFORMAT = Setting("IOFORMAT", default=IOFORMAT_KWARGS, validator=IOFORMATS.__contains__)
 
+# Validation of the rows received by nodes, once the type of an edge is known (see NodeExecutionContext.validation).
+VALIDATION_STRICT = "strict"
+VALIDATION_SAMPLED = "sampled"
+VALIDATION_TRUSTED = "trusted"
+
+VALIDATIONS = {VALIDATION_STRICT, VALIDATION_SAMPLED, VALIDATION_TRUSTED}
+
+VALIDATION = Setting("VALIDATION", default=VALIDATION_STRICT, validator=VALIDATIONS.__contains__)
+
 
 def check():
     if DEBUG.get() and QUIET.get():
@@ -12,6 +12,8 @@ from bonobo.util.collections import coalesce
 
 GraphRange = namedtuple("GraphRange", ["graph", "input", "output"])
 
+Parallelism = namedtuple("Parallelism", ["replicas", "key", "ordered"])
+
 
 class GraphCursor:
     @property
@@ -56,6 +58,15 @@ class GraphCursor:
         # If we add nothing, then nothing changed.
         return self
 
+    def set_buffer_size(self, size, *, spill=False):
+        """
+        Set the input buffer size of the last node of this cursor (see :meth:`Graph.set_buffer_size`), and return the
+        cursor, so it can be used inline: ``(graph >> a >> b).set_buffer_size(100) >> c``.
+
+        """
+        self.graph.set_buffer_size(self.last, size, spill=spill)
+        return self
+
     def __enter__(self):
         return self
 
@@ -89,6 +100,9 @@ class Graph:
         self.edges = {BEGIN: set()}
         self.named = {}
         self.nodes = []
+        self.parallelism = {}
+        self.buffer_sizes = {}
+        self.spilling = set()
         if len(chain):
             self.add_chain(*chain)
 
@@ -190,7 +204,58 @@ class Graph:
             return self.index_of(new_node)
         return self.add_node(new_node, _name=_name)
 
-    def add_chain(self, *nodes, _input=BEGIN, _output=None, _name=None, use_existing_nodes=False):
+    def set_parallelism(self, mixed, replicas, *, key=None, ordered=False):
+        """
+        Run a node (index, node value or name) using `replicas` parallel replicas, each with its own context (and
+        context processors values).
+
+        Input rows are distributed to replicas round-robin, or based on the hash of `key(row)` if a key function is
+        given (so rows with the same key always go to the same replica). Outputs are merged back into one stream, in
+        completion order, or in input order if `ordered` is true.
+
+        """
+        idx = self.index_of(mixed)
+        if type(replicas) is not int or replicas < 1:
+            raise ValueError("Replicas count must be a positive integer, got {!r}.".format(replicas))
+        if replicas == 1:
+            self.parallelism.pop(idx, None)
+        else:
+            self.parallelism[idx] = Parallelism(replicas, key, ordered)
+
+    def set_buffer_size(self, mixed, size, *, spill=False):
+        """
+        Set the maximum number of rows waiting in the input queue of a node (index, node value or name), shared by all
+        the edges coming to this node. Writers wait when it is full. Use `None` to get back to the default size, or
+        `0` for an unbounded queue.
+
+        If `spill` is true, writers never wait: rows that do not fit are written to a temporary file instead (see
+        :class:`bonobo.structs.inputs.SpillingInput`).
+
+        """
+        idx = self.index_of(mixed)
+        if size is not None and (type(size) is not int or size < 0):
+            raise ValueError("Buffer size must be a non-negative integer, got {!r}.".format(size))
+
+        if size is None:
+            self.buffer_sizes.pop(idx, None)
+        else:
+            self.buffer_sizes[idx] = size
+
+        if spill:
+            self.spilling.add(idx)
+        else:
+            self.spilling.discard(idx)
+
+    def add_chain(
+        self,
+        *nodes,
+        _input=BEGIN,
+        _output=None,
+        _name=None,
+        _parallelism=None,
+        _buffer_size=None,
+        use_existing_nodes=False
+    ):
         """
         Add `nodes` as a chain in this graph.
 
@@ -213,6 +278,16 @@ class Graph:
         * If a `_name` is given, the first node in the chain will be named this way (same effect as providing a `_name`
           to add_node).
 
+        **Parallelism**
+
+        * If `_parallelism` is given, each node in the chain will run with this number of replicas (see
+          `set_parallelism`, to use a partition key or keep the row order).
+
+        **Buffering**
+
+        * If `_buffer_size` is given, each node in the chain will have an input queue of this size (see
+          `set_buffer_size`).
+
         **Special cases**
 
         * You can use this method to connect two other chains (in fact, two nodes) by not giving any `nodes`, but
@@ -242,6 +317,12 @@ class Graph:
             if _first is None:
                 _first = _last
 
+            if _parallelism is not None:
+                self.set_parallelism(_last, _parallelism)
+
+            if _buffer_size is not None:
+                self.set_buffer_size(_last, _buffer_size)
+
             self.outputs_of(_input, create=True).add(_last)
 
             _input = _last
@@ -260,6 +341,9 @@ class Graph:
         g.edges = copy(self.edges)
         g.named = copy(self.named)
         g.nodes = copy(self.nodes)
+        g.parallelism = copy(self.parallelism)
+        g.buffer_sizes = copy(self.buffer_sizes)
+        g.spilling = copy(self.spilling)
 
         return g
 
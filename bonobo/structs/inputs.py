@@ -14,16 +14,32 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
+import pickle
+import tempfile
 from abc import ABCMeta, abstractmethod
-from asyncio.queues import Queue as AioQueue
-from queue import Queue
+from collections import deque
+from io import SEEK_END
+from queue import Empty, Full, Queue
+from struct import Struct
+from sys import getsizeof
+from time import time
 
 from bonobo.constants import BEGIN, END
 from bonobo.errors import AbstractError, InactiveReadableError, InactiveWritableError
 from bonobo.nodes import noop
+from bonobo.util.bags import decode_rows, encode_rows
 
 BUFFER_SIZE = 8192
 
+# Maximum number of rows moved at once between two nodes, and maximum time (in seconds) a row can wait in a node's
+# output buffer before being flushed, if the node keeps producing.
+BATCH_SIZE = 256
+BATCH_TIMEOUT = 0.01
+
+# Frames of spilled rows are prefixed by their kind (one byte) and their length.
+_frame_length = Struct(">I")
+
 
 class Readable(metaclass=ABCMeta):
     """Interface for things you can read from."""
@@ -43,12 +59,61 @@ class Writable(metaclass=ABCMeta):
         raise AbstractError(self.put)
 
 
+def estimate_size(row):
+    """
+    Rough estimate of the memory used by a row, in bytes (the row itself and its values, not what they reference).
+
+    """
+    try:
+        return getsizeof(row) + sum(map(getsizeof, row))
+    except TypeError:
+        return getsizeof(row)
+
+
+class MemoryBudget:
+    """
+    Approximate limit for the memory used by rows waiting in a set of inputs (usually all the inputs of a graph
+    execution). When the limit is exceeded, writers wait before adding more rows to inputs that already hold at least a
+    batch, so upstream nodes slow down until downstream nodes catch up.
+
+    Queued bytes are estimated from the size of the last row written to each input (see :func:`estimate_size`).
+
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.inputs = []
+
+    def register(self, input):
+        input.budget = self
+        self.inputs.append(input)
+
+    @property
+    def used(self):
+        return sum(input.queued_bytes for input in self.inputs)
+
+    def exceeded(self):
+        return self.used > self.limit
+
+
 class Input(Queue, Readable, Writable):
+    """
+    Thread-safe FIFO queue between nodes, carrying data rows and END tokens (BEGIN tokens are not queued, they only
+    raise the runlevel). Tokens are compared by identity, and the END tokens waiting in the queue are counted, so
+    batches of rows can be read without looking at each row while there is none.
+
+    """
+
     def __init__(self, maxsize=BUFFER_SIZE):
         Queue.__init__(self, maxsize)
 
+        self.budget = None
+        self._row_size = 0
+        self._ends = 0
+
         self._runlevel = 0
         self._writable_runlevel = 0
+        self._interrupted = False
         self.on_initialize = noop
         self.on_begin = noop
         self.on_end = noop
@@ -56,7 +121,7 @@ class Input(Queue, Readable, Writable):
 
     def put(self, data, block=True, timeout=None):
         # Begin token is a metadata to raise the input runlevel.
-        if data == BEGIN:
+        if data is BEGIN:
             if not self._runlevel:
                 self.on_initialize()
 
@@ -72,10 +137,24 @@ class Input(Queue, Readable, Writable):
         if self._writable_runlevel < 1:
             raise InactiveWritableError("Cannot put() on an inactive {}.".format(Writable.__name__))
 
-        if data == END:
+        if data is END:
             self._writable_runlevel -= 1
+        elif not self._row_size:
+            self._row_size = estimate_size(data)
 
-        return Queue.put(self, data, block, timeout)
+        # Same as :meth:`queue.Queue.put`, but writers stop waiting once the reader is interrupted (tokens and single
+        # rows do not wait for the memory budget, though).
+        with self.not_full:
+            self._wait_for_room(block, timeout, budget=False)
+            self._put(data)
+            self.unfinished_tasks += 1
+            self.not_empty.notify()
+
+    def _put(self, item):
+        # Called by put, with the mutex acquired.
+        if item is END:
+            self._ends += 1
+        self.queue.append(item)
 
     def _decrement_runlevel(self):
         if self._runlevel == 1:
@@ -83,13 +162,63 @@ class Input(Queue, Readable, Writable):
         self._runlevel -= 1
         self.on_end()
 
+    def put_many(self, items, block=True, timeout=None):
+        """
+        Write a batch of data rows, acquiring the queue lock once for each chunk of rows that fits in the free space
+        (instead of once per row). Tokens are not allowed here, use :meth:`put`.
+
+        If a timeout is given and the queue stays full, :class:`queue.Full` is raised and the rows that did not fit
+        yet are not written.
+
+        """
+        if self._writable_runlevel < 1:
+            raise InactiveWritableError("Cannot put_many() on an inactive {}.".format(Writable.__name__))
+
+        if len(items):
+            self._row_size = estimate_size(items[0])
+
+        i, n = 0, len(items)
+        while i < n:
+            with self.not_full:
+                self._wait_for_room(block, timeout)
+                # Once interrupted, there is no room to wait for (see :meth:`interrupt`).
+                j = n if self.maxsize <= 0 or self._interrupted else min(n, i + self.maxsize - self._qsize())
+                self.queue.extend(items[i:j])
+                self.unfinished_tasks += j - i
+                self.not_empty.notify()
+            i = j
+
+    def offer_many(self, items):
+        """
+        Write a batch of data rows only if there is room for all of them right now, without ever waiting. Returns
+        whether they were written.
+
+        """
+        if self._writable_runlevel < 1:
+            raise InactiveWritableError("Cannot offer_many() on an inactive {}.".format(Writable.__name__))
+
+        with self.not_full:
+            if self._full() or 0 < self.maxsize < self._qsize() + len(items):
+                return False
+            if len(items):
+                self._row_size = estimate_size(items[0])
+            self.queue.extend(items)
+            self.unfinished_tasks += len(items)
+            self.not_empty.notify()
+        return True
+
     def get(self, block=True, timeout=None):
         if not self.alive:
             raise InactiveReadableError("Cannot get() on an inactive {}.".format(Readable.__name__))
 
-        data = Queue.get(self, block, timeout)
+        with self.not_empty:
+            self._wait_for_data(block, timeout)
+            data = self._get()
+            if data is END:
+                self._ends -= 1
+            self.not_full.notify()
 
-        if data == END:
+        if data is END:
             self._decrement_runlevel()
 
             if not self.alive:
@@ -100,15 +229,131 @@ class Input(Queue, Readable, Writable):
 
         return data
 
+    def get_many(self, max_items, block=True, timeout=None):
+        """
+        Read up to `max_items` data rows at once, acquiring the queue lock only once. Waits (according to `block` and
+        `timeout`) only if no row is available at all, then returns whatever is there. A batch never crosses an END
+        token, so the runlevel logic is the same as for :meth:`get`.
+
+        """
+        while True:
+            if not self.alive:
+                raise InactiveReadableError("Cannot get_many() on an inactive {}.".format(Readable.__name__))
+
+            with self.not_empty:
+                self._wait_for_data(block, timeout)
+                if not self._ends:
+                    # No END token waiting, rows can be taken without looking at them.
+                    _get = self._get
+                    batch = [_get() for _ in range(min(max_items, self._qsize()))]
+                    self.not_full.notify(len(batch))
+                elif self.queue[0] is END:
+                    batch = None
+                    self._ends -= 1
+                    self._get()
+                    self.not_full.notify()
+                else:
+                    batch = []
+                    while self._qsize() and len(batch) < max_items and self.queue[0] is not END:
+                        batch.append(self._get())
+                    self.not_full.notify(len(batch))
+
+            if batch is not None:
+                return batch
+
+            self._decrement_runlevel()
+
+            if not self.alive:
+                raise InactiveReadableError(
+                    "Cannot get_many() on an inactive {} (runlevel just reached 0).".format(Readable.__name__)
+                )
+
+    def _wait_for_data(self, block, timeout):
+        """
+        Same waiting logic as :meth:`queue.Queue.get` (must be called with `not_empty` acquired), but a blocked reader
+        will also be woken up by :meth:`interrupt`, in which case :class:`queue.Empty` is raised.
+
+        """
+        if not block:
+            if not self._qsize():
+                raise Empty
+        elif timeout is None:
+            while not self._qsize():
+                if self._interrupted:
+                    raise Empty
+                self.not_empty.wait()
+        elif timeout < 0:
+            raise ValueError("'timeout' must be a non-negative number")
+        else:
+            endtime = time() + timeout
+            while not self._qsize():
+                remaining = endtime - time()
+                if self._interrupted or remaining <= 0.0:
+                    raise Empty
+                self.not_empty.wait(remaining)
+
+    def _wait_for_room(self, block, timeout, *, budget=True):
+        """
+        Same waiting logic as :meth:`queue.Queue.put` (must be called with `not_full` acquired), also waiting while
+        the memory budget is exceeded, if any (and if `budget` is true). As other inputs being read do not wake us up,
+        the budget is polled. A blocked writer will also be woken up by :meth:`interrupt`, in which case it writes
+        anyway, as nobody will make room anymore.
+
+        """
+        poll = None if self.budget is None or not budget else BATCH_TIMEOUT
+        if not block:
+            if self._full(budget):
+                raise Full
+        elif timeout is None:
+            while self._full(budget) and not self._interrupted:
+                self.not_full.wait(poll)
+        elif timeout < 0:
+            raise ValueError("'timeout' must be a non-negative number")
+        else:
+            endtime = time() + timeout
+            while self._full(budget) and not self._interrupted:
+                remaining = endtime - time()
+                if remaining <= 0.0:
+                    raise Full
+                self.not_full.wait(remaining if poll is None else min(remaining, poll))
+
+    def _full(self, budget=True):
+        if 0 < self.maxsize <= self._qsize():
+            return True
+        # An input holding less than a batch never waits for the budget, so the nodes reading from the inputs holding
+        # most of the memory can always write, and make progress.
+        return budget and self.budget is not None and self._qsize() >= BATCH_SIZE and self.budget.exceeded()
+
+    @property
+    def queued_bytes(self):
+        """
+        Estimate of the memory used by the rows waiting in this input.
+
+        """
+        return len(self.queue) * self._row_size
+
+    def interrupt(self):
+        """
+        Wakes up any reader blocked in :meth:`get`, and any writer waiting for room. From now on, blocking reads on an
+        empty queue will raise :class:`queue.Empty` instead of waiting, and writes will not wait (the reader being
+        killed, upstream nodes would wait forever).
+
+        """
+        with self.mutex:
+            self._interrupted = True
+            self.not_empty.notify_all()
+            self.not_full.notify_all()
+
     def shutdown(self):
         while self._runlevel >= 1:
             self._decrement_runlevel()
 
     def empty(self):
         self.mutex.acquire()
-        while self._qsize() and self.queue[0] == END:
+        while self._ends and self.queue and self.queue[0] is END:
             self._runlevel -= 1
-            Queue._get(self)
+            self._ends -= 1
+            self._get()
         self.mutex.release()
 
         return Queue.empty(self)
@@ -118,5 +363,414 @@ class Input(Queue, Readable, Writable):
         return self._runlevel > 0
 
 
-class AioInput(AioQueue):
-    pass
+class SpillingInput(Input):
+    """
+    Input that never makes writers wait: it keeps up to `maxsize` rows in memory, and overflow rows are written to a
+    temporary file (in batches, see :func:`bonobo.util.bags.encode_rows`), then read back in FIFO order as the memory
+    segment gets consumed. Row values must be picklable.
+
+    Useful behind a fan-out, so a slow branch does not slow down the node feeding all the branches, without holding all
+    the rows it has not processed yet in memory.
+
+    """
+
+    def __init__(self, maxsize=BUFFER_SIZE, *, dir=None):
+        Input.__init__(self, maxsize)
+
+        self.dir = dir
+        self.spilled = 0  # rows and tokens not in memory, including the pending ones
+
+        self._file = None
+        self._read_offset = 0
+        self._pending = []
+
+    def put(self, data, block=True, timeout=None):
+        # Begin token is a metadata to raise the input runlevel.
+        if data is BEGIN:
+            return Input.put(self, data, block, timeout)
+
+        # Check we are actually able to receive data.
+        if self._writable_runlevel < 1:
+            raise InactiveWritableError("Cannot put() on an inactive {}.".format(Writable.__name__))
+
+        if data is END:
+            self._writable_runlevel -= 1
+
+        with self.mutex:
+            if data is END:
+                self._ends += 1
+            self._put_many((data,))
+            self.unfinished_tasks += 1
+            self.not_empty.notify()
+
+    def put_many(self, items, block=True, timeout=None):
+        if self._writable_runlevel < 1:
+            raise InactiveWritableError("Cannot put_many() on an inactive {}.".format(Writable.__name__))
+
+        if len(items):
+            self._row_size = estimate_size(items[0])
+
+        with self.mutex:
+            self._put_many(items)
+            self.unfinished_tasks += len(items)
+            self.not_empty.notify()
+
+    def offer_many(self, items):
+        # Never waits anyway.
+        self.put_many(items)
+        return True
+
+    def _put_many(self, items):
+        # Memory first, but only if nothing is spilled (or it would break the order).
+        i = 0
+        if not self.spilled:
+            i = len(items) if self.maxsize <= 0 else min(len(items), self.maxsize - len(self.queue))
+            self.queue.extend(items[:i])
+
+        for item in items[i:]:
+            if item is END:
+                self._spill()
+                self._write(b"E", b"")
+            else:
+                self._pending.append(item)
+                if len(self._pending) >= BATCH_SIZE:
+                    self._spill()
+            self.spilled += 1
+
+    def _spill(self):
+        if self._pending:
+            self._write(b"R", pickle.dumps(encode_rows(self._pending), pickle.HIGHEST_PROTOCOL))
+            self._pending = []
+
+    def _write(self, kind, payload):
+        if self._file is None:
+            self._file = tempfile.TemporaryFile(prefix="bonobo-", suffix=".spill", dir=self.dir)
+        self._file.seek(0, SEEK_END)
+        self._file.write(kind + _frame_length.pack(len(payload)) + payload)
+
+    def _read(self):
+        self._file.seek(self._read_offset)
+        kind, length = self._file.read(1), _frame_length.unpack(self._file.read(_frame_length.size))[0]
+        payload = self._file.read(length)
+        self._read_offset = self._file.tell()
+        if kind == b"E":
+            return [END]
+        return decode_rows(pickle.loads(payload))
+
+    def _refill(self):
+        """
+        Move spilled rows back to memory, while there is room for a batch (must be called with the mutex acquired).
+
+        """
+        while self.spilled and (self.maxsize <= 0 or len(self.queue) + BATCH_SIZE <= self.maxsize or not self.queue):
+            if self._file is not None and self._read_offset < self._file.seek(0, SEEK_END):
+                rows = self._read()
+            else:
+                rows, self._pending = self._pending, []
+            self.queue.extend(rows)
+            self.spilled -= len(rows)
+
+        # Everything was read back, start again from the beginning of the file.
+        if not self.spilled and self._read_offset:
+            self._file.seek(0)
+            self._file.truncate()
+            self._read_offset = 0
+
+    def _qsize(self):
+        return len(self.queue) + self.spilled
+
+    def _get(self):
+        item = self.queue.popleft()
+        if self.spilled:
+            self._refill()
+        return item
+
+    def _full(self, budget=True):
+        return False
+
+    def _decrement_runlevel(self):
+        Input._decrement_runlevel(self)
+        if not self._runlevel:
+            self.close()
+
+    def close(self):
+        """
+        Remove the temporary file, if any.
+
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._read_offset = 0
+
+
+class InlineInput(Readable, Writable):
+    """
+    Input that does not queue anything: data written here is handed over synchronously to the `on_data` callback, in
+    the writer's thread. It is used to fuse a node with its only upstream node, so only one writer is supported.
+
+    Runlevels and callbacks work the same as for :class:`Input`, but there is nothing to read.
+
+    """
+
+    def __init__(self):
+        self._runlevel = 0
+        self._writable_runlevel = 0
+        self.on_initialize = noop
+        self.on_begin = noop
+        self.on_data = noop
+        self.on_end = noop
+        self.on_finalize = noop
+
+    def put(self, data, block=True, timeout=None):
+        if data is BEGIN:
+            if not self._runlevel:
+                self.on_initialize()
+
+            self._runlevel += 1
+            self._writable_runlevel += 1
+
+            # callback
+            self.on_begin()
+
+            return
+
+        # Check we are actually able to receive data.
+        if self._writable_runlevel < 1:
+            raise InactiveWritableError("Cannot put() on an inactive {}.".format(Writable.__name__))
+
+        if data is END:
+            self._writable_runlevel -= 1
+            if self._runlevel > 0:
+                self._decrement_runlevel()
+            return
+
+        self.on_data((data,))
+
+    def put_many(self, items, block=True, timeout=None):
+        if self._writable_runlevel < 1:
+            raise InactiveWritableError("Cannot put_many() on an inactive {}.".format(Writable.__name__))
+
+        self.on_data(items)
+
+    def _decrement_runlevel(self):
+        if self._runlevel == 1:
+            self.on_finalize()
+        self._runlevel -= 1
+        self.on_end()
+
+    def get(self, block=True, timeout=None):
+        raise InactiveReadableError("Cannot get() on an {}, data is pushed to the reader.".format(type(self).__name__))
+
+    def get_many(self, max_items, block=True, timeout=None):
+        raise InactiveReadableError(
+            "Cannot get_many() on an {}, data is pushed to the reader.".format(type(self).__name__)
+        )
+
+    def interrupt(self):
+        pass
+
+    def shutdown(self):
+        while self._runlevel >= 1:
+            self._decrement_runlevel()
+
+    def empty(self):
+        return True
+
+    def qsize(self):
+        return 0
+
+    @property
+    def alive(self):
+        return self._runlevel > 0
+
+
+class AioInput(Readable, Writable):
+    """
+    Input for nodes running in an asyncio event loop (see
+    :class:`bonobo.execution.contexts.node.AsyncNodeExecutionContext`).
+
+    Runlevels and callbacks work the same as for :class:`Input`, but readers and writers wait for data (or for room)
+    by awaiting :meth:`get_many` and :meth:`put_many` instead of blocking their thread. Tokens, and rows written with
+    :meth:`put`, never wait for room.
+
+    It is not thread safe, and must only be used from the event loop's thread.
+
+    """
+
+    def __init__(self, maxsize=BUFFER_SIZE):
+        self.maxsize = maxsize
+        self.queue = deque()
+
+        self._getter = None
+        self._putters = deque()
+
+        self._runlevel = 0
+        self._writable_runlevel = 0
+        self._interrupted = False
+        self.on_initialize = noop
+        self.on_begin = noop
+        self.on_end = noop
+        self.on_finalize = noop
+
+    def put(self, data, block=True, timeout=None):
+        # Begin token is a metadata to raise the input runlevel.
+        if data is BEGIN:
+            if not self._runlevel:
+                self.on_initialize()
+
+            self._runlevel += 1
+            self._writable_runlevel += 1
+
+            # callback
+            self.on_begin()
+
+            return
+
+        # Check we are actually able to receive data.
+        if self._writable_runlevel < 1:
+            raise InactiveWritableError("Cannot put() on an inactive {}.".format(Writable.__name__))
+
+        if data is END:
+            self._writable_runlevel -= 1
+
+        self.queue.append(data)
+        self._wakeup_getter()
+
+    async def put_many(self, items):
+        """
+        Write a batch of data rows, waiting for room if the queue is full (unless nobody is reading it anymore, or the
+        reader was interrupted).
+
+        """
+        if self._writable_runlevel < 1:
+            raise InactiveWritableError("Cannot put_many() on an inactive {}.".format(Writable.__name__))
+
+        i, n = 0, len(items)
+        while i < n:
+            while self.full() and self.alive and not self._interrupted:
+                waiter = asyncio.get_event_loop().create_future()
+                self._putters.append(waiter)
+                await waiter
+            bounded = self.alive and not self._interrupted
+            j = n if self.maxsize <= 0 or not bounded else min(n, i + self.maxsize - len(self.queue))
+            self.queue.extend(items[i:j])
+            self._wakeup_getter()
+            i = j
+
+    def get(self, block=True, timeout=None):
+        """
+        Read one row, without ever waiting: :class:`queue.Empty` is raised if there is nothing to read. Use
+        :meth:`get_many` to wait for data.
+
+        """
+        if not self.alive:
+            raise InactiveReadableError("Cannot get() on an inactive {}.".format(Readable.__name__))
+
+        if not self.queue:
+            raise Empty
+
+        data = self.queue.popleft()
+        self._wakeup_putters()
+
+        if data is END:
+            self._decrement_runlevel()
+
+            if not self.alive:
+                raise InactiveReadableError(
+                    "Cannot get() on an inactive {} (runlevel just reached 0).".format(Readable.__name__)
+                )
+            return self.get(block, timeout)
+
+        return data
+
+    async def get_many(self, max_items, *, before_end=None):
+        """
+        Read up to `max_items` data rows at once, waiting only if no row is available at all. A batch never crosses an
+        END token. If given, the `before_end` coroutine function is awaited before an END token is consumed (and the
+        runlevel callbacks are called), so the reader can finish the work in progress first.
+
+        Raises :class:`queue.Empty` if the input gets interrupted while waiting.
+
+        """
+        while True:
+            if not self.alive:
+                raise InactiveReadableError("Cannot get_many() on an inactive {}.".format(Readable.__name__))
+
+            while not self.queue:
+                if self._interrupted:
+                    raise Empty
+                self._getter = asyncio.get_event_loop().create_future()
+                try:
+                    await self._getter
+                finally:
+                    self._getter = None
+
+            if self.queue[0] is END:
+                if before_end is not None:
+                    await before_end()
+                self.queue.popleft()
+                self._wakeup_putters()
+            else:
+                batch = []
+                while self.queue and len(batch) < max_items and self.queue[0] is not END:
+                    batch.append(self.queue.popleft())
+                self._wakeup_putters()
+                return batch
+
+            self._decrement_runlevel()
+
+            if not self.alive:
+                raise InactiveReadableError(
+                    "Cannot get_many() on an inactive {} (runlevel just reached 0).".format(Readable.__name__)
+                )
+
+    def _decrement_runlevel(self):
+        if self._runlevel == 1:
+            self.on_finalize()
+        self._runlevel -= 1
+        self.on_end()
+
+    def _wakeup_getter(self):
+        if self._getter is not None and not self._getter.done():
+            self._getter.set_result(None)
+
+    def _wakeup_putters(self):
+        while self._putters:
+            waiter = self._putters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def interrupt(self):
+        """
+        Wakes up the reader waiting in :meth:`get_many`, and the writers waiting for room. From now on, reads on an
+        empty queue will raise :class:`queue.Empty` instead of waiting, and writes will not wait.
+
+        """
+        self._interrupted = True
+        self._wakeup_getter()
+        self._wakeup_putters()
+
+    def shutdown(self):
+        while self._runlevel >= 1:
+            self._decrement_runlevel()
+
+        # Nobody will read anymore, writers should not wait for room.
+        self._wakeup_putters()
+
+    def full(self):
+        return 0 < self.maxsize <= len(self.queue)
+
+    def empty(self):
+        while self.queue and self.queue[0] is END:
+            self._runlevel -= 1
+            self.queue.popleft()
+
+        return not self.queue
+
+    def qsize(self):
+        return len(self.queue)
+
+    @property
+    def alive(self):
+        return self._runlevel > 0
@@ -192,3 +192,40 @@ def BagType(typename, fields, *, verbose=False, module=None):
         result.__module__ = module
 
     return result
+
+
+def encode_rows(rows):
+    """
+    Encode rows as a list of `(fields, values)` segments, one for each run of rows of the same type. `fields` is None
+    for plain tuples. This is a picklable form (dynamically created bag types are not), used to send rows to another
+    process or to disk.
+
+    """
+    segments, current_type = [], None
+    for row in rows:
+        if type(row) is not current_type or not segments:
+            current_type = type(row)
+            segments.append((getattr(current_type, "_fields", None), []))
+        segments[-1][1].append(tuple(row))
+    return segments
+
+
+_bag_types = {}
+
+
+def decode_rows(segments):
+    """
+    Reverse of :func:`encode_rows`, bag types are created once for each set of fields.
+
+    """
+    rows = []
+    for fields, values in segments:
+        if fields is None:
+            rows += values
+        else:
+            try:
+                cls = _bag_types[fields]
+            except KeyError:
+                cls = _bag_types[fields] = BagType("Bag", fields)
+            rows += (tuple.__new__(cls, value) for value in values)
+    return rows
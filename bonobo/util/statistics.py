@@ -1,20 +1,129 @@
 import time
+from collections.abc import MutableMapping
+from math import frexp
+
+
+class Counters(MutableMapping):
+    """
+    Fixed set of named counters, stored in a list (`counts`), so hot code paths can update them by slot (the index of
+    the name, see :meth:`slot`) instead of going through a dict. It still behaves like a dict of names to values.
+
+    Counters are meant to be updated by one thread (the one running a node) and read by others (plugins, on TICK),
+    without any lock: readers get the values as of the last update.
+
+    """
+
+    def __init__(self, names):
+        self.names = tuple(names)
+        self.slots = {name: i for i, name in enumerate(self.names)}
+        self.counts = [0] * len(self.names)
+
+    def slot(self, name):
+        return self.slots[name]
+
+    def __getitem__(self, name):
+        return self.counts[self.slots[name]]
+
+    def __setitem__(self, name, value):
+        self.counts[self.slots[name]] = value
+
+    def __delitem__(self, name):
+        raise TypeError("Counters cannot be removed.")
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __repr__(self):
+        return repr(dict(self))
 
 
 class WithStatistics:
     def __init__(self, *names):
         self.statistics_names = names
-        self.statistics = {name: 0 for name in names}
+        self.statistics = Counters(names)
 
     def get_statistics(self, *args, **kwargs):
-        return ((name, self.statistics[name]) for name in self.statistics_names)
+        return zip(self.statistics_names, list(self.statistics.counts))
 
     def get_statistics_as_string(self, *args, **kwargs):
-        stats = tuple("{0}={1}".format(name, cnt) for name, cnt in self.get_statistics(*args, **kwargs) if cnt > 0)
+        stats = tuple(
+            "{0}={1}".format(name, format_duration(cnt) if isinstance(cnt, float) else cnt)
+            for name, cnt in self.get_statistics(*args, **kwargs)
+            if cnt > 0
+        )
         return (kwargs.get("prefix", "") + " ".join(stats)) if len(stats) else ""
 
     def increment(self, name, *, amount=1):
-        self.statistics[name] += amount
+        self.statistics.counts[self.statistics.slots[name]] += amount
+
+
+def format_duration(seconds):
+    """
+    Human readable duration, with a unit depending on the magnitude.
+
+    """
+    if seconds < 0.001:
+        return "{:.0f}µs".format(seconds * 1000000)
+    if seconds < 1:
+        return "{:.1f}ms".format(seconds * 1000)
+    return "{:.2f}s".format(seconds)
+
+
+class LatencyHistogram:
+    """
+    Histogram of durations (in seconds), using log-scale buckets: bucket i counts durations from 2 ** (i - 21) to
+    2 ** (i - 20) seconds, so the first one counts durations under a microsecond (roughly), and the last one anything
+    longer than about half an hour. Adding a duration is cheap enough to be done on each call.
+
+    """
+
+    BUCKETS = 32
+
+    def __init__(self, counts=None):
+        self.counts = list(counts) if counts else [0] * self.BUCKETS
+
+    def __len__(self):
+        return sum(self.counts)
+
+    def add(self, duration):
+        # The binary exponent of the duration is the bucket, offset so the first bucket ends around a microsecond.
+        i = frexp(duration)[1] + 20 if duration > 0 else 0
+        if i < 0:
+            i = 0
+        elif i >= self.BUCKETS:
+            i = self.BUCKETS - 1
+        self.counts[i] += 1
+
+    def update(self, other):
+        """
+        Add the counts of another histogram to this one.
+
+        """
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+
+    def percentile(self, p):
+        """
+        Upper bound (in seconds) of the bucket holding the `p`-th percentile, or 0.0 if the histogram is empty.
+
+        """
+        rank, seen = len(self) * p / 100, 0
+        if not rank:
+            return 0.0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return 2.0 ** (i - 20)
+        return 2.0 ** (self.BUCKETS - 21)
+
+    def as_dict(self):
+        """
+        Non-empty buckets, keyed by their upper bound in seconds.
+
+        """
+        return {2.0 ** (i - 20): count for i, count in enumerate(self.counts) if count}
 
 
 class Timer:
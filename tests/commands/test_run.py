@@ -1,3 +1,4 @@
+import json
 import os
 from unittest.mock import patch
 
@@ -46,3 +47,31 @@ def test_install_requirements_for_file(runner):
     with patch("bonobo.commands.run._install_requirements") as install_mock:
         runner("run", "--install", os.path.join(dirname, "strings.py"))
     install_mock.assert_called_once_with(os.path.join(dirname, "requirements.txt"))
+
+
+@all_runners
+def test_run_with_report(runner, tmpdir):
+    filename = str(tmpdir.join("report.json"))
+    runner("run", "--quiet", "--report", filename, get_examples_path("types/strings.py"))
+
+    with open(filename) as f:
+        report = json.load(f)
+    assert report["strategy"] == "ThreadPoolExecutorStrategy"
+    assert report["xstatus"] == 0
+    assert report["stopped_at"] >= report["started_at"]
+    assert report["edges"] == [["BEGIN", 0], [0, 1], [1, 2]]
+    assert report["topologically_sorted_indexes"] == [0, 1, 2]
+    assert [node["statistics"]["in"] for node in report["nodes"]] == [1, 3, 3]
+    assert all(node["state"] == "done" for node in report["nodes"])
+
+
+@all_runners
+def test_run_with_ndjson_report(runner, tmpdir):
+    filename = str(tmpdir.join("report.ndjson"))
+    runner("run", "--quiet", "--report", filename, get_examples_path("types/strings.py"))
+
+    with open(filename) as f:
+        records = [json.loads(line) for line in f]
+    assert [record["type"] for record in records] == ["run", "node", "node", "node"]
+    assert "nodes" not in records[0]
+    assert [record["index"] for record in records[1:]] == [0, 1, 2]
@@ -1,7 +1,12 @@
 from operator import attrgetter
 
+import pytest
+
 from bonobo.config import Configurable
 from bonobo.config.processors import ContextCurrifier, ContextProcessor, resolve_processors, use_context_processor
+from bonobo.errors import UnrecoverableTypeError
+from bonobo.execution.strategies import NaiveStrategy
+from bonobo.structs.graphs import Graph
 
 
 class CP1(Configurable):
@@ -72,3 +77,32 @@ def test_processors_on_func():
         pass
 
     assert get_all_processors_names(node) == ["cp"]
+
+
+def test_currifier_call():
+    def add(a, b):
+        return a + b
+
+    with ContextCurrifier(add, 1).as_contextmanager() as stack:
+        assert stack((2,)) == 3
+
+        # Input does not bind to the signature, this is not recoverable.
+        with pytest.raises(UnrecoverableTypeError):
+            stack((2, 3))
+
+        # TypeError raised by the transformation itself is left untouched.
+        with pytest.raises(TypeError) as excinfo:
+            stack(("foo",))
+        assert not isinstance(excinfo.value, UnrecoverableTypeError)
+
+
+def test_currifier_call_uncallable():
+    with ContextCurrifier(42).as_contextmanager() as stack:
+        with pytest.raises(UnrecoverableTypeError) as excinfo:
+            stack(())
+        assert str(excinfo.value) == "Uncallable node 42"
+
+    # The node is defunct after the first row.
+    context = NaiveStrategy().execute(Graph([1, 2, 3], 42), plugins=[])
+    assert context[1].defunct
+    assert dict(context[1].get_statistics())["err"] == 1
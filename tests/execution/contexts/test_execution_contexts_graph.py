@@ -1,6 +1,8 @@
-from bonobo import Graph
+from bonobo import Graph, noop
+from bonobo.config import use
 from bonobo.constants import BEGIN, EMPTY, END
 from bonobo.execution.contexts import GraphExecutionContext
+from bonobo.execution.strategies import create_strategy
 
 
 def raise_an_error(*args, **kwargs):
@@ -57,3 +59,110 @@ def test_lifecycle_of_graph_with_unrecoverable_error():
     assert not context.alive
     assert context.stopped
     assert not context.xstatus
+
+
+def test_fusable_indexes():
+    graph = Graph()
+    graph.add_chain(print, print, print, _name="trunk")
+    graph.add_chain(print, print, _input=2)
+    graph.add_chain(print, _input=2)
+    graph.add_chain(print, _input=None, _output=5)
+
+    # 1 and 2 are a linear chain after the first node, 2 has two outputs and 5 has two inputs.
+    assert GraphExecutionContext(graph).get_fusable_indexes() == {1, 2, 4}
+
+    # With fan out, the first output of 2 is fusable too, but 5 still has two inputs.
+    assert GraphExecutionContext(graph).get_fusable_indexes(fan_out=True) == {1, 2, 3, 4}
+
+
+def test_fusable_indexes_max_depth(monkeypatch):
+    monkeypatch.setattr(GraphExecutionContext, "MAX_FUSED_DEPTH", 2)
+
+    graph = Graph()
+    graph.add_chain(*([print] * 7))
+
+    # Each node reads from a queue after two fused ones.
+    assert GraphExecutionContext(graph).get_fusable_indexes() == {1, 2, 4, 5}
+
+
+def test_fused_execution_of_a_deep_chain():
+    loaded = []
+
+    graph = Graph()
+    graph.add_chain(range(9), *([noop] * 200), loaded.append)
+
+    context = create_strategy("threadpool_fused").execute(graph, plugins=[])
+    assert loaded == list(range(9))
+    assert not context.xstatus
+
+
+def test_fused_execution_keeps_statistics():
+    def extract():
+        yield from range(10)
+
+    def odd_only(i):
+        if i % 2:
+            return i
+
+    def fail_on_three(i):
+        if i == 3:
+            raise ValueError("three")
+        return i
+
+    graph = Graph(extract, odd_only, fail_on_three, print)
+    with GraphExecutionContext(graph, fuse=True) as context:
+        assert [node.fused for node in context] == [False, True, True, True]
+        context.write(BEGIN, EMPTY, END)
+        context.loop()
+
+    assert [dict(node.get_statistics()) for node in context] == [
+        {"in": 1, "out": 10, "err": 0, "warn": 0, "queued": 0},
+        {"in": 10, "out": 5, "err": 0, "warn": 0, "queued": 0},
+        {"in": 5, "out": 4, "err": 1, "warn": 0, "queued": 0},
+        {"in": 4, "out": 0, "err": 0, "warn": 0, "queued": 0},
+    ]
+    assert context.stopped
+
+
+def test_fused_node_failing_to_start():
+    loaded = []
+
+    @use("missing")
+    def broken(i, missing):
+        return i
+
+    graph = Graph(range(5), broken, loaded.append)
+    graph.add_chain(range(3), loaded.append)
+
+    context = create_strategy("threadpool_fused").execute(graph, plugins=[])
+    assert [node.fused for node in context] == [False, True, True, False, True]
+    assert [node.state for node in context] == ["done", "defunct", "done", "done", "done"]
+    assert loaded == [0, 1, 2]
+    assert context.xstatus
+
+
+def test_buffer_sizes_and_memory_budget():
+    graph = Graph()
+    graph.add_chain(print, print, _buffer_size=10)
+    graph.add_chain(print, _input=0)
+
+    context = GraphExecutionContext(graph, memory_budget=1024 ** 2)
+    assert [node.input.maxsize for node in context] == [10, 10, 8192]
+    assert context.memory_budget.limit == 1024 ** 2
+    assert all(node.input.budget is context.memory_budget for node in context)
+
+    assert GraphExecutionContext(graph).memory_budget is None
+
+
+def test_queued_statistics():
+    graph = Graph()
+    graph.add_chain(print, print)
+
+    context = GraphExecutionContext(graph)
+    context.write(BEGIN, EMPTY)
+    context[1].input.put(BEGIN)
+    context[1].input.put_many([("a",), ("b",)])
+
+    assert dict(context[0].get_statistics())["queued"] == 1
+    assert dict(context[1].get_statistics())["queued"] == 2
+    assert "queued=2" in str(context[1])
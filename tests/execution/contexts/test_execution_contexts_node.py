@@ -1,11 +1,15 @@
+import threading
+import time
 from unittest.mock import MagicMock
 
 import pytest
 
 from bonobo import Graph
-from bonobo.constants import EMPTY
-from bonobo.execution.contexts.node import NodeExecutionContext, split_token
-from bonobo.execution.strategies import NaiveStrategy
+from bonobo.constants import BEGIN, EMPTY, END
+from bonobo.execution.contexts.node import NodeExecutionContext, OutputFlusher, split_token
+from bonobo.execution.contexts.graph import GraphExecutionContext
+from bonobo.execution.strategies import NaiveStrategy, create_strategy
+from bonobo.structs.inputs import Input
 from bonobo.util.envelopes import F_INHERIT, F_NOT_MODIFIED
 from bonobo.util.testing import BufferingGraphExecutionContext, BufferingNodeExecutionContext
 
@@ -261,3 +265,148 @@ def test_split_token_inherit():
         assert split_token(F_INHERIT) == ({F_INHERIT}, ())
         assert split_token((F_INHERIT,)) == ({F_INHERIT}, ())
         assert split_token((F_INHERIT, "foo", "bar")) == ({F_INHERIT}, ("foo", "bar"))
+
+
+def test_node_loop_wakes_up_on_kill():
+    def f(*args):
+        yield from args
+
+    with BufferingNodeExecutionContext(f) as context:
+        context.write(BEGIN, ("foo",))
+
+        thread = threading.Thread(target=context.loop)
+        thread.start()
+        try:
+            deadline = time.time() + 5
+            while not len(context.get_buffer()) and time.time() < deadline:
+                time.sleep(0.01)
+            assert context.get_buffer() == [("foo",)]
+        finally:
+            context.kill()
+            thread.join(timeout=5)
+
+        assert not thread.is_alive()
+
+
+def test_node_run_quantum_resumes_generators():
+    def generate(n):
+        yield from range(n)
+
+    with BufferingNodeExecutionContext(generate) as context:
+        context.write(BEGIN, (5,), (3,))
+
+        # Reading an input row counts in the quantum, as well as each step of the generator.
+        context.run_quantum(4)
+        assert context.get_buffer() == [(0,), (1,), (2,)]
+        assert context.has_work
+
+        context.run_quantum(4)
+        assert context.get_buffer() == [(i,) for i in (0, 1, 2, 3, 4)]
+
+        context.run_quantum(4)
+        assert context.get_buffer() == [(i,) for i in (0, 1, 2, 3, 4, 0, 1, 2)]
+        assert not context.has_work
+
+
+@pytest.mark.parametrize("validation, errors", [("strict", 1), ("sampled", 0), ("trusted", 0)])
+def test_node_validation(validation, errors):
+    def f(*args):
+        return args
+
+    with BufferingNodeExecutionContext(f) as context:
+        context.validation = validation
+        context.input.put(BEGIN)
+        for row in [(1, 2), ["a", "b"], (3, 4), (5,)]:
+            context.input.put(row)
+            context.step()
+
+        # Rows of another type are always checked and cast, but the length of rows of the known type is only checked in
+        # strict mode (or once in a while, if sampled). A length error is fatal.
+        assert context.statistics["err"] == errors
+        assert context.get_buffer() == [(1, 2), ("a", "b"), (3, 4)] + [(5,)] * (1 - errors)
+
+
+def test_node_validation_levels():
+    with pytest.raises(ValueError):
+        NodeExecutionContext(print).validation = "lenient"
+
+    context = GraphExecutionContext(Graph(print, print), validation="trusted")
+    assert [node.validation for node in context] == ["trusted", "trusted"]
+
+
+def test_node_timings():
+    def slow(i):
+        time.sleep(0.001 * i)
+        yield i
+
+    with BufferingNodeExecutionContext(slow) as context:
+        context.write(BEGIN, (1,), (5,), END)
+        thread = threading.Thread(target=context.loop)
+        thread.start()
+        thread.join()
+
+    timings = context.get_timings()
+    assert 0.006 <= timings["busy"] < 1
+    assert len(context.get_latency()) == 2
+    assert 0.005 <= context.get_latency().percentile(99) < 0.02
+
+    stats = dict(context.get_statistics(timings=True))
+    assert set(stats) == {"in", "out", "err", "warn", "queued", "busy", "idle", "blocked", "p50", "p99"}
+    assert context.as_dict()["timings"] == timings
+    assert "busy=" in context.as_dict()["stats"]
+
+
+def test_node_output_latency_with_slow_generator():
+    sent, received = {}, {}
+
+    def extract():
+        for i in range(6):
+            time.sleep(0.2)
+            sent[i] = time.time()
+            yield i
+
+    def load(i):
+        received[i] = time.time()
+
+    # The buffered rows must not wait for the next one, or for the generator to end (rows are flushed after
+    # BATCH_TIMEOUT, even while the generator is busy).
+    create_strategy("threadpool").execute(Graph(extract, load), plugins=[])
+    assert sorted(received) == list(range(6))
+    assert max(received[i] - sent[i] for i in range(6)) < 0.1
+
+
+def test_node_flush_expired_never_waits():
+    free, full = Input(), Input(maxsize=1)
+    for output in (free, full):
+        output.put(BEGIN)
+    full.put(("x",))
+
+    context = NodeExecutionContext(print, _outputs=[free, full])
+    context._output_batch_size = 10
+    context._put(("a",))
+
+    # The full output gets the rows later, once it has room, but never before the rows it already had.
+    context.flush_expired(time.time() + 1)
+    assert free.qsize() == 1 and full.qsize() == 1
+    context.flush_expired(time.time() + 1)
+    assert full.qsize() == 1
+    full.get()
+    context.flush_expired(time.time() + 1)
+    assert free.qsize() == 1 and full.get() == ("a",)
+    assert not context._output_buffer
+
+
+def test_node_flusher_thread_ends_with_executions():
+    flusher = OutputFlusher(period=0.01)
+    context = NodeExecutionContext(print)
+
+    flusher.register(context)
+    thread = flusher._thread
+    assert thread.is_alive()
+    flusher.unregister(context)
+    thread.join(1)
+    assert not thread.is_alive()
+
+    flusher.register(context)
+    assert flusher._thread.is_alive()
+    flusher.unregister(context)
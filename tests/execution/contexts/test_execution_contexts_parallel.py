@@ -0,0 +1,103 @@
+import threading
+import time
+from operator import itemgetter
+
+import pytest
+
+from bonobo import Graph
+from bonobo.config import use_context_processor
+from bonobo.execution.strategies import NaiveStrategy, ThreadPoolExecutorStrategy
+from bonobo.util.testing import BufferingGraphExecutionContext
+
+
+def extract():
+    yield from range(1, 21)
+
+
+def collect(*row):
+    return row
+
+
+def slow(i):
+    # Make sure that the completion order is not the input order.
+    time.sleep(0.001 * (i % 4))
+    return i, threading.get_ident()
+
+
+@pytest.mark.parametrize("strategy_type", [NaiveStrategy, ThreadPoolExecutorStrategy])
+def test_parallel_ordered(strategy_type):
+    graph = Graph()
+    graph.add_chain(extract, slow, collect)
+    graph.set_parallelism(slow, 4, ordered=True)
+
+    context = strategy_type(GraphExecutionContextType=BufferingGraphExecutionContext).execute(graph)
+    output = context.get_buffer()
+
+    assert [i for i, _ in output] == list(range(1, 21))
+    assert len(set(thread for _, thread in output)) == 4
+    assert dict(context[1].get_statistics()) == {"in": 20, "out": 20, "err": 0, "warn": 0, "queued": 0}
+
+
+def test_parallel_partition_by_key():
+    def modulo(i):
+        return i, i % 3
+
+    def slow_pair(i, key):
+        return slow(i)[1], key
+
+    graph = Graph()
+    graph.add_chain(extract, modulo, slow_pair, collect)
+    graph.set_parallelism(slow_pair, 4, key=itemgetter(1))
+
+    context = ThreadPoolExecutorStrategy(GraphExecutionContextType=BufferingGraphExecutionContext).execute(graph)
+    output = context.get_buffer()
+
+    assert len(output) == 20
+    threads_by_key = {}
+    for thread, key in output:
+        threads_by_key.setdefault(key, set()).add(thread)
+    assert sorted(threads_by_key) == [0, 1, 2]
+    assert all(len(threads) == 1 for threads in threads_by_key.values())
+
+
+def test_parallel_replicas_have_their_own_context():
+    setups = []
+
+    def counter(self, context):
+        setups.append(context)
+        count = yield [0]
+        context.send(count[0])
+
+    @use_context_processor(counter)
+    def count(count, *args):
+        count[0] += 1
+
+    def fail_on_ten(i):
+        if i == 10:
+            raise ValueError("ten")
+        return i
+
+    graph = Graph(extract, fail_on_ten, count, collect)
+    graph.set_parallelism(count, 3)
+
+    context = ThreadPoolExecutorStrategy(GraphExecutionContextType=BufferingGraphExecutionContext).execute(graph)
+
+    assert len(setups) == 3
+    assert sum(row[0] for row in context.get_buffer()) == 19
+    assert dict(context[1].get_statistics())["err"] == 1
+    assert not context.xstatus
+
+
+def test_parallel_replica_errors_are_counted_on_the_node():
+    def fail_on_three(i):
+        if i == 3:
+            raise ValueError("three")
+        return i
+
+    graph = Graph(extract, fail_on_three, collect)
+    graph.set_parallelism(fail_on_three, 3)
+
+    context = ThreadPoolExecutorStrategy(GraphExecutionContextType=BufferingGraphExecutionContext).execute(graph)
+
+    assert len(context.get_buffer()) == 19
+    assert dict(context[1].get_statistics()) == {"in": 20, "out": 19, "err": 1, "warn": 0, "queued": 0}
@@ -0,0 +1,51 @@
+import json
+
+from bonobo.execution.strategies import NaiveStrategy, ThreadPoolExecutorStrategy
+from bonobo.structs.graphs import Graph
+
+
+def extract():
+    yield from range(10)
+
+
+def fail_on_odd(i):
+    if i % 2:
+        raise ValueError("odd {}".format(i))
+    return i
+
+
+def test_report(tmpdir):
+    graph = Graph(extract, fail_on_odd)
+    graph.add_chain(print, _input=extract)
+
+    context = NaiveStrategy().execute(graph)
+    report = context.get_report()
+
+    assert report.strategy == "NaiveStrategy"
+    assert report.duration >= 0
+    assert report.cpu_count
+    assert report.edges == [("BEGIN", 0), (0, 1), (0, 2)]
+
+    node = report.nodes[1]
+    assert (node["index"], node["name"], node["state"]) == (1, "fail_on_odd", "done")
+    assert node["statistics"]["err"] == 5
+    assert node["latency"]["rows"] == 5
+    assert [error["message"] for error in node["errors"]] == ["odd 1", "odd 3", "odd 5", "odd 7", "odd 9"]
+    assert {error["type"] for error in node["errors"]} == {"ValueError"}
+
+    filename = str(tmpdir.join("report.json"))
+    report.write(filename)
+    with open(filename) as f:
+        assert json.load(f)["nodes"][1]["statistics"]["err"] == 5
+
+
+def test_report_peak_queued():
+    graph = Graph(extract, fail_on_odd)
+    graph.set_parallelism(fail_on_odd, 2)
+
+    context = ThreadPoolExecutorStrategy().execute(graph)
+
+    # Errors of replicas are sampled too.
+    assert len(context[1].error_samples) == 5
+    assert context[1].peak_queued >= 0
+    assert context.get_report().nodes[1]["peak_queued"] == context[1].peak_queued
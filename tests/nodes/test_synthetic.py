@@ -0,0 +1,70 @@
+import datetime
+from time import perf_counter
+
+import pytest
+
+import bonobo
+from bonobo.examples.datasets.synthetic import get_graph
+from bonobo.nodes.synthetic import Float, Integer, String, Timestamp
+from bonobo.util.testing import BufferingNodeExecutionContext
+
+FIELDS = {
+    "id": Integer(10, 20),
+    "price": Float(1.0, 2.0),
+    "city": String(5, length=3),
+    "at": Timestamp(datetime.datetime(2020, 1, 1), 60),
+}
+
+
+def generate(*args, **kwargs):
+    with BufferingNodeExecutionContext(bonobo.Generate(*args, **kwargs)) as context:
+        context.write_sync(())
+    return context.get_buffer()
+
+
+def test_generate_count_and_types():
+    rows = generate(FIELDS, 250, batch_size=100)
+    assert len(rows) == 250
+    assert rows[0]._fields == ("id", "price", "city", "at")
+    assert all(10 <= row.id < 20 for row in rows)
+    assert all(1.0 <= row.price <= 2.0 for row in rows)
+    assert len({row.city for row in rows}) == 5
+    assert all(len(row.city) == 3 for row in rows)
+    assert rows[0].at == datetime.datetime(2020, 1, 1)
+    assert rows[-1].at == datetime.datetime(2020, 1, 1) + datetime.timedelta(minutes=249)
+
+
+def test_generate_is_deterministic():
+    rows = generate(FIELDS, 100, seed=42)
+    assert generate(FIELDS, 100, seed=42, batch_size=7) == rows
+    assert generate(list(FIELDS.items()), 100, seed=42) == rows
+    assert generate(FIELDS, 100, seed=43) != rows
+
+
+def test_generate_at_rate():
+    started = perf_counter()
+    rows = generate({"id": Integer()}, 50, rate=200)
+    assert len(rows) == 50
+    # The last burst (of 20 rows) is sent after 40 rows, so 0.2s after the first one.
+    assert perf_counter() - started >= 0.19
+
+
+def test_timestamp_format():
+    rows = generate({"at": Timestamp(interval=0.5, format="%H:%M:%S.%f")}, 3)
+    assert [row.at for row in rows] == ["00:00:00.000000", "00:00:00.500000", "00:00:01.000000"]
+
+
+def test_invalid_fields():
+    with pytest.raises(ValueError):
+        Integer(5, 5)
+    with pytest.raises(ValueError):
+        String(63, length=1)
+
+
+def test_synthetic_dataset(tmpdir):
+    graph = get_graph(rows=10, seed=1)
+    bonobo.run(graph, services={"fs": bonobo.open_fs(str(tmpdir))}, strategy="naive")
+    lines = tmpdir.join("synthetic.csv").read().splitlines()
+    assert lines[0] == "id,customer,country,quantity,price,ordered_at"
+    assert len(lines) == 11
+    assert len(tmpdir.join("synthetic.ldjson").read().splitlines()) == 10
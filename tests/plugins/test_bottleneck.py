@@ -0,0 +1,49 @@
+import time
+
+from bonobo.execution.strategies import ThreadPoolExecutorStrategy
+from bonobo.plugins.bottleneck import BottleneckPlugin, NodeSample
+from bonobo.structs.graphs import Graph
+
+
+def extract():
+    yield from range(200)
+
+
+def slow(i):
+    time.sleep(0.002)
+    return i
+
+
+def fast(i):
+    return i
+
+
+def test_get_saturated():
+    plugin = BottleneckPlugin()
+    plugin.outputs_of = {0: [1], 1: [2], 2: []}
+    plugin.inputs_of = {0: set(), 1: {0}, 2: {1}}
+
+    # Upstream blocked, downstream idle.
+    samples = [NodeSample(0.1, 0.0, 0.9, None), NodeSample(0.9, 0.0, 0.1, 1.0), NodeSample(0.0, 1.0, 0.0, 0.0)]
+    assert plugin.get_saturated(samples) == 1
+
+    # Nobody is waiting for anybody.
+    samples = [NodeSample(0.3, 0.6, 0.0, None), NodeSample(0.3, 0.6, 0.0, 0.0), NodeSample(0.3, 0.6, 0.0, 0.0)]
+    assert plugin.get_saturated(samples) is None
+
+
+def test_bottleneck():
+    graph = Graph(extract, slow, fast)
+    graph.set_buffer_size(slow, 10)
+    plugin = BottleneckPlugin()
+
+    ThreadPoolExecutorStrategy(tick_period=0.02).execute(graph, plugins=[plugin])
+
+    summary = plugin.summary
+    assert summary["bottleneck"] == 1
+    assert summary["nodes"][1]["saturated"] > 0
+    assert summary["nodes"][1]["busy"] > summary["nodes"][2]["busy"]
+    assert summary["critical_path"] == [0, 1, 2]
+    assert summary["recommendations"][0].startswith("'slow' limits the throughput")
+    assert "graph.set_parallelism(1, " in summary["recommendations"][0]
+    assert "Critical path: extract -> slow -> fast" in plugin.format_summary(summary)
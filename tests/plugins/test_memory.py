@@ -0,0 +1,81 @@
+import tracemalloc
+
+import pytest
+
+from bonobo.config import Configurable, Option
+from bonobo.execution.strategies import NaiveStrategy, create_strategy
+from bonobo.plugins.memory import MemoryTracerPlugin, get_code_locations
+from bonobo.structs.graphs import Graph
+
+
+def extract():
+    yield from range(1, 101)
+
+
+class Hoard(Configurable):
+    def __call__(self, i):
+        self.buffer.append(bytearray(10000))
+        return i
+
+    buffer = []
+
+
+def keep_some(i):
+    if not i % 10:
+        keep_some.kept.append(bytearray(10000))
+    return i
+
+
+keep_some.kept = []
+
+
+class Hold(Configurable):
+    size = Option(int, positional=True)
+
+    def __call__(self, i):
+        if i == 1:
+            self.held = bytearray(self.size)
+        return i
+
+
+def test_get_code_locations():
+    (filename, first, last), = get_code_locations(keep_some)
+    assert filename == __file__
+    assert last - first == 3
+
+    # Only the node's own class, not bonobo's base classes.
+    (filename, first, last), = get_code_locations(Hoard())
+    assert filename == __file__
+    assert last - first == 5
+
+
+def test_memory_tracer():
+    hoard = Hoard()
+    graph = Graph(extract, hoard, keep_some)
+    plugin = MemoryTracerPlugin(every=1)
+
+    context = NaiveStrategy().execute(graph, plugins=[plugin])
+
+    assert not tracemalloc.is_tracing()
+    assert context[1].peak_memory >= 100 * 10000
+    assert 10 * 10000 <= context[2].peak_memory < 100 * 10000
+    assert context[0].peak_memory < 10000
+
+    statistics = dict(context[1].get_statistics())
+    assert statistics["peak_mem"] == context[1].peak_memory
+    assert context.get_report().nodes[2]["peak_memory"] == context[2].peak_memory
+
+    Hoard.buffer.clear()
+    keep_some.kept.clear()
+
+
+@pytest.mark.parametrize("strategy", ["naive", "threadpool", "scheduler"])
+def test_memory_tracer_with_shared_code(strategy):
+    # Same code for both nodes, only the one actually running can tell them apart.
+    graph = Graph(extract, Hold(1000), Hold(10 ** 7))
+    plugin = MemoryTracerPlugin(every=1)
+
+    context = create_strategy(strategy).execute(graph, plugins=[plugin])
+
+    assert context[1].peak_memory < 10 ** 6
+    assert context[2].peak_memory >= 10 ** 7
@@ -0,0 +1,53 @@
+from urllib.request import urlopen
+
+from bonobo.execution.contexts.graph import GraphExecutionContext
+from bonobo.execution.strategies import NaiveStrategy
+from bonobo.plugins.openmetrics import CONTENT_TYPE, OpenMetricsPlugin
+from bonobo.structs.graphs import Graph
+
+
+def extract():
+    yield from range(10)
+
+
+def test_render():
+    plugin = OpenMetricsPlugin(port=None)
+    context = GraphExecutionContext(Graph(extract, print))
+
+    metrics = plugin.render(context)
+    assert metrics.endswith("\n# EOF\n")
+    assert "# TYPE bonobo_node_rows counter" in metrics
+    assert 'bonobo_node_rows_total{node="extract",index="0",direction="in"} 0' in metrics
+    assert 'bonobo_node_state{node="print",index="1",bonobo_node_state="pending"} 1' in metrics
+    assert 'bonobo_node_state{node="print",index="1",bonobo_node_state="running"} 0' in metrics
+
+    # Rates are computed between two renderings.
+    context[1].statistics["in"] += 100
+    metrics = plugin.render(context)
+    assert 'bonobo_node_rows_total{node="print",index="1",direction="in"} 100' in metrics
+    rate = next(line for line in metrics.splitlines() if line.startswith('bonobo_node_rows_per_second{node="print"'))
+    assert float(rate.split()[-1]) > 0
+
+
+def test_serve_and_write(tmpdir):
+    path = str(tmpdir.join("bonobo.prom"))
+    plugin = OpenMetricsPlugin(port=0, path=path)
+    scraped = []
+
+    def scrape(i):
+        if not scraped:
+            with urlopen("http://{}:{}/metrics".format(*plugin.address)) as response:
+                scraped.append((response.headers["Content-Type"], response.read().decode("utf-8")))
+
+    NaiveStrategy().execute(Graph(extract, scrape), plugins=[plugin])
+
+    assert plugin.server is None
+    content_type, metrics = scraped[0]
+    assert content_type == CONTENT_TYPE
+    assert 'bonobo_node_state{node="scrape",index="1",bonobo_node_state="running"} 1' in metrics
+
+    with open(path) as f:
+        metrics = f.read()
+    assert 'bonobo_node_rows_total{node="scrape",index="1",direction="in"} 10' in metrics
+    assert 'bonobo_node_latency_seconds_count{node="scrape",index="1"} 10' in metrics
+    assert 'bonobo_node_state{node="scrape",index="1",bonobo_node_state="done"} 1' in metrics
@@ -0,0 +1,59 @@
+import os
+import pstats
+
+from bonobo.execution.strategies import NaiveStrategy, ThreadPoolExecutorStrategy
+from bonobo.plugins.profiler import ProfilerPlugin
+from bonobo.structs.graphs import Graph
+
+
+def extract():
+    yield from range(100)
+
+
+def slow_square(i):
+    return sum(i for _ in range(i)) ** 2
+
+
+def test_profiler(tmpdir):
+    path = str(tmpdir.join("profile"))
+
+    for strategy in (NaiveStrategy(), ThreadPoolExecutorStrategy()):
+        strategy.execute(Graph(extract, slow_square, print), plugins=[ProfilerPlugin(path=path)])
+
+        assert sorted(os.listdir(path)) == [
+            "0-extract.collapsed",
+            "0-extract.pstats",
+            "1-slow_square.collapsed",
+            "1-slow_square.pstats",
+            "2-print.collapsed",
+            "2-print.pstats",
+            "summary.txt",
+        ]
+
+        stats = pstats.Stats(os.path.join(path, "1-slow_square.pstats"))
+        assert any(name == "slow_square" for filename, line, name in stats.stats)
+
+        # slow_square is fused with extract by the naive strategy, but its time is not accounted for in extract.
+        with open(os.path.join(path, "0-extract.collapsed")) as f:
+            assert "slow_square" not in f.read()
+        with open(os.path.join(path, "1-slow_square.collapsed")) as f:
+            stacks = [line.rsplit(" ", 1) for line in f]
+        assert any(stack.endswith(":slow_square") or ":slow_square;" in stack for stack, _ in stacks)
+        assert all(int(microseconds) > 0 for _, microseconds in stacks)
+
+        with open(os.path.join(path, "summary.txt")) as f:
+            summary = f.read()
+        assert "slow_square" in summary and "tottime" in summary
+
+
+def test_profiler_with_parallelism(tmpdir):
+    path = str(tmpdir.join("profile"))
+
+    graph = Graph(extract, slow_square, print)
+    graph.set_parallelism(slow_square, 3)
+    ThreadPoolExecutorStrategy().execute(graph, plugins=[ProfilerPlugin(path=path)])
+
+    # Rows are processed by the replicas, in their own threads, and their profiles are merged.
+    stats = pstats.Stats(os.path.join(path, "1-slow_square.pstats"))
+    calls = [nc for (filename, line, name), (cc, nc, tt, ct, callers) in stats.stats.items() if name == "slow_square"]
+    assert calls == [100]
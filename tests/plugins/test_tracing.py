@@ -0,0 +1,53 @@
+import json
+from collections import Counter
+
+from bonobo.execution.strategies import NaiveStrategy, ThreadPoolExecutorStrategy
+from bonobo.plugins.tracing import RowTracerPlugin
+from bonobo.structs.graphs import Graph
+
+
+def extract():
+    yield from range(1, 101)
+
+
+def split(i):
+    yield i
+    yield -i
+
+
+def fail_on_negative(i):
+    if i < 0:
+        raise ValueError(i)
+    return i
+
+
+def load(i):
+    pass
+
+
+def test_row_tracing(tmpdir):
+    for strategy in (NaiveStrategy(), ThreadPoolExecutorStrategy()):
+        path = str(tmpdir.join("trace.json"))
+        graph = Graph(extract, split, fail_on_negative)
+        graph.add_chain(load, _input=split)
+
+        strategy.execute(graph, plugins=[RowTracerPlugin(0.1, path=path)])
+
+        with open(path) as f:
+            events = json.load(f)["traceEvents"]
+
+        threads = {event["tid"]: event["args"]["name"] for event in events if event["ph"] == "M"}
+        assert threads == {0: "extract", 1: "split", 2: "fail_on_negative", 3: "load"}
+
+        # 10 traced rows, each split in two, then going to two nodes.
+        spans = [event for event in events if event.get("cat") == "node"]
+        assert Counter(threads[span["tid"]] for span in spans) == {"split": 10, "fail_on_negative": 20, "load": 20}
+        assert len({span["args"]["trace"] for span in spans}) == 10
+        assert sum(1 for span in spans if span["args"].get("error")) == 10
+
+        queued = [event for event in events if event.get("cat") == "queue"]
+        assert len(queued) == len(spans)
+        assert all(event["dur"] >= 0 for event in queued + spans)
+
+        flows = Counter(event["ph"] for event in events if event.get("cat") == "flow")
+        assert flows == {"s": 50, "f": 50}
@@ -157,3 +157,45 @@ def test_copy():
 
     assert len(g1) == 1
     assert len(g2) == 2
+
+
+def test_graph_parallelism():
+    g = Graph()
+    a, b, c = get_pseudo_nodes(*"abc")
+
+    g.add_chain(a, b, _parallelism=4)
+    g.add_chain(c, _input=None)
+    assert g.parallelism == {0: (4, None, False), 1: (4, None, False)}
+
+    g.set_parallelism(c, 2, key=len, ordered=True)
+    assert g.parallelism[2] == (2, len, True)
+
+    g.set_parallelism(a, 1)
+    assert 0 not in g.parallelism
+    assert g.copy().parallelism == g.parallelism
+
+    with pytest.raises(ValueError):
+        g.set_parallelism(b, 0)
+
+
+
+def test_graph_buffer_sizes():
+    g = Graph()
+    a, b, c, d = get_pseudo_nodes(*"abcd")
+
+    g.add_chain(a, b, _buffer_size=100)
+    (g.orphan() >> c).set_buffer_size(0) >> d
+    assert g.buffer_sizes == {0: 100, 1: 100, 2: 0}
+
+    g.set_buffer_size(a, None)
+    assert g.buffer_sizes == {1: 100, 2: 0}
+    assert g.copy().buffer_sizes == g.buffer_sizes
+
+    with pytest.raises(ValueError):
+        g.set_buffer_size(b, -1)
+
+    g.set_buffer_size(d, 10, spill=True)
+    assert g.spilling == {3}
+    assert g.copy().spilling == g.spilling
+    g.set_buffer_size(d, None)
+    assert not g.spilling and 3 not in g.buffer_sizes
@@ -14,13 +14,16 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from queue import Empty
+import asyncio
+import threading
+from queue import Empty, Full
 
 import pytest
 
 from bonobo.constants import BEGIN, END
 from bonobo.errors import InactiveReadableError, InactiveWritableError
-from bonobo.structs.inputs import Input
+from bonobo.structs.inputs import BATCH_SIZE, AioInput, Input, MemoryBudget, SpillingInput
+from bonobo.util.bags import BagType
 
 
 def test_input_runlevels():
@@ -64,3 +67,216 @@ def test_input_runlevels():
     assert q.get() == "baz"
     with pytest.raises(InactiveReadableError):
         q.get()
+
+
+def test_input_blocking_get_wakes_up_on_put():
+    q = Input()
+    q.put(BEGIN)
+
+    timer = threading.Timer(0.05, q.put, args=("foo",))
+    timer.start()
+    try:
+        assert q.get() == "foo"
+    finally:
+        timer.join()
+
+
+def test_input_blocking_get_wakes_up_on_end():
+    q = Input()
+    q.put(BEGIN)
+
+    timer = threading.Timer(0.05, q.put, args=(END,))
+    timer.start()
+    try:
+        with pytest.raises(InactiveReadableError):
+            q.get()
+    finally:
+        timer.join()
+
+
+def test_input_interrupt():
+    q = Input()
+    q.put(BEGIN)
+
+    timer = threading.Timer(0.05, q.interrupt)
+    timer.start()
+    try:
+        with pytest.raises(Empty):
+            q.get()
+    finally:
+        timer.join()
+
+    # Once interrupted, still returns available data.
+    q.put("foo")
+    assert q.get() == "foo"
+    with pytest.raises(Empty):
+        q.get()
+
+
+def test_input_batches():
+    q = Input()
+
+    with pytest.raises(InactiveWritableError):
+        q.put_many(["foo"])
+
+    q.put(BEGIN)
+    q.put_many(["foo", "bar", "baz"])
+    q.put(BEGIN)
+    q.put_many(["qux"])
+    q.put(END)
+    q.put_many(["quux"])
+    q.put(END)
+
+    # Batches are limited in size, but never cross an END token.
+    assert q.get_many(2) == ["foo", "bar"]
+    assert q.get_many(10) == ["baz", "qux"]
+    assert q.get_many(10) == ["quux"]
+    with pytest.raises(InactiveReadableError):
+        q.get_many(10)
+
+
+class Uncomparable(tuple):
+    def __eq__(self, other):
+        raise TypeError("Cannot compare.")
+
+    __hash__ = tuple.__hash__
+
+
+def test_input_tokens_are_compared_by_identity():
+    q = Input()
+    row = Uncomparable((1, 2))
+
+    q.put(BEGIN)
+    q.put(row)
+    q.put_many([row, row])
+    q.put(END)
+    assert q._ends == 1
+
+    assert q.get() is row
+    assert q.get_many(10) == [row, row]
+    assert q._ends == 1
+    with pytest.raises(InactiveReadableError):
+        q.get_many(10)
+    assert q._ends == 0
+
+
+def test_input_batches_larger_than_buffer():
+    q = Input(maxsize=2)
+    q.put(BEGIN)
+
+    rows = list(range(10))
+    writer = threading.Thread(target=q.put_many, args=(rows,))
+    writer.start()
+
+    result = []
+    while len(result) < len(rows):
+        result += q.get_many(10)
+    writer.join()
+
+    assert result == rows
+
+
+def test_aio_input_waits_for_data_and_room():
+    q = AioInput(maxsize=2)
+    q.put(BEGIN)
+
+    async def writer():
+        await q.put_many(list(range(5)))
+        q.put(END)
+
+    async def reader():
+        rows = []
+        while True:
+            try:
+                rows += await q.get_many(10)
+            except InactiveReadableError:
+                return rows
+
+    async def main():
+        return await asyncio.gather(writer(), reader())
+
+    loop = asyncio.new_event_loop()
+    try:
+        _, rows = loop.run_until_complete(main())
+    finally:
+        loop.close()
+
+    assert rows == [0, 1, 2, 3, 4]
+    assert not q.alive
+
+
+def test_aio_input_interrupt():
+    q = AioInput()
+    q.put(BEGIN)
+
+    async def interrupt():
+        q.interrupt()
+
+    async def main():
+        return await asyncio.gather(q.get_many(10), interrupt())
+
+    loop = asyncio.new_event_loop()
+    try:
+        with pytest.raises(Empty):
+            loop.run_until_complete(main())
+    finally:
+        loop.close()
+
+
+def test_input_memory_budget():
+    budget = MemoryBudget(limit=1)
+    full, empty = Input(), Input()
+    for q in full, empty:
+        budget.register(q)
+        q.put(BEGIN)
+
+    full.put_many([("row",)] * BATCH_SIZE)
+    assert budget.exceeded()
+
+    # An input holding at least a batch waits while the budget is exceeded...
+    with pytest.raises(Full):
+        full.put_many([("row",)], timeout=0.05)
+
+    # ... but the others don't, so the nodes reading the full ones can make progress.
+    empty.put_many([("row",)], timeout=0.05)
+    assert empty.qsize() == 1
+
+    # Waiting writers are released when the budget is available again.
+    thread = threading.Thread(target=full.put_many, args=([("row",)],))
+    thread.start()
+    empty.get_many(10)
+    full.get_many(BATCH_SIZE)
+    budget.limit = full.queued_bytes + 1000
+    thread.join(1)
+    assert not thread.is_alive()
+    assert full.qsize() == 1
+
+
+def test_spilling_input(tmpdir):
+    Row = BagType("Row", ("i", "double"))
+    q = SpillingInput(maxsize=10, dir=str(tmpdir))
+    q.put(BEGIN)
+    q.put(BEGIN)
+
+    # Writers never wait, overflow goes to disk.
+    q.put_many([Row(i, 2 * i) for i in range(1000)])
+    q.put(END)
+    q.put_many([(i,) for i in range(1000, 1500)])
+    assert q._file is not None
+    assert len(q.queue) == 10 and q.spilled == 1491 and q.qsize() == 1501
+
+    rows = []
+    while len(rows) < 1000:
+        rows += q.get_many(100)
+    assert rows == [(i, 2 * i) for i in range(1000)]
+    assert all(type(row)._fields == ("i", "double") for row in rows)
+
+    # Once all was read back, the file is reused from the start.
+    q.put(END)
+    rows = []
+    with pytest.raises(InactiveReadableError):
+        while True:
+            rows += q.get_many(100)
+    assert rows == [(i,) for i in range(1000, 1500)]
+    assert q.spilled == 0
+    assert q._file is None
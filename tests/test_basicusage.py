@@ -1,9 +1,14 @@
+import threading
+import time
 from unittest.mock import patch
 
 import pytest
 
 import bonobo
 from bonobo.execution.contexts.graph import GraphExecutionContext
+from bonobo.execution.iterator import GraphIterator
+from bonobo.execution.strategies import create_strategy
+from bonobo.structs.inputs import BUFFER_SIZE
 
 
 @pytest.mark.timeout(2)
@@ -15,3 +20,67 @@ def test_run_graph_noop():
         result = bonobo.run(graph)
 
     assert isinstance(result, GraphExecutionContext)
+
+
+@pytest.mark.timeout(5)
+def test_iterate_graph():
+    def extract():
+        yield from range(100)
+
+    def square(i):
+        return i, i ** 2
+
+    graph = bonobo.Graph(extract, square, bonobo.noop)
+
+    assert list(bonobo.iterate(graph, output=square)) == [(i, i ** 2) for i in range(100)]
+    assert len(graph) == 3
+
+
+@pytest.mark.timeout(5)
+@pytest.mark.parametrize("strategy", ["naive", "threadpool", "threadpool_fused", "scheduler"])
+def test_iterate_unbounded_graph(strategy):
+    produced = []
+
+    def extract():
+        i = 0
+        while True:
+            produced.append(i)
+            yield i
+            i += 1
+
+    rows = bonobo.iterate(bonobo.Graph(extract, bonobo.noop, bonobo.noop), strategy=strategy)
+    assert [next(rows) for _ in range(10)] == [(i,) for i in range(10)]
+
+    # The producer waits for the consumer (at most a full input queue ahead for each node), and is stopped once the
+    # iteration is closed, even if waiting for room in the input of a node killed already.
+    time.sleep(0.5)
+    rows.close()
+    count = len(produced)
+    assert count < 3 * BUFFER_SIZE
+    assert len(produced) == count
+
+
+@pytest.mark.timeout(5)
+@pytest.mark.parametrize("strategy", ["naive", "threadpool", "threadpool_fused", "scheduler"])
+def test_iterate_closed_before_the_first_row(strategy):
+    produced = []
+
+    def extract():
+        i = 0
+        while True:
+            produced.append(i)
+            yield i
+            i += 1
+
+    def nothing(i):
+        pass
+
+    iterator = GraphIterator(bonobo.Graph(extract, nothing), strategy=create_strategy(strategy))
+    threading.Timer(0.5, iterator.close).start()
+
+    # Closed from another thread while waiting for a row, which never comes.
+    assert list(iterator) == []
+    assert iterator.context[0].killed
+    count = len(produced)
+    time.sleep(0.1)
+    assert len(produced) == count
@@ -1,14 +1,31 @@
-from bonobo.config.processors import use_context_processor
+import asyncio
+import os
+import time
+from unittest.mock import patch
+
+import pytest
+
+from bonobo import noop
+from bonobo.config.processors import use_context, use_context_processor
 from bonobo.constants import BEGIN, END
+from bonobo.execution import events
 from bonobo.execution.contexts.graph import GraphExecutionContext
-from bonobo.execution.strategies import NaiveStrategy
+from bonobo.execution.strategies import AsyncIOStrategy, NaiveStrategy, ProcessStrategy, SchedulerStrategy
+from bonobo.execution.strategies.executor import FusedThreadPoolExecutorStrategy, ThreadPoolExecutorStrategy
+from bonobo.nodes import OrderFields, UnpackItems, count
+from bonobo.plugins import Plugin
 from bonobo.structs.graphs import Graph
+from bonobo.structs.inputs import SpillingInput
 
 
 def generate_integers():
     yield from range(10)
 
 
+def generate_many_integers():
+    yield from range(2000)
+
+
 def square(i):
     return i ** 2
 
@@ -46,6 +63,37 @@ def test_execution():
     assert ctx.results == [1, 4, 9, 16, 25, 36, 49, 64, 81]
 
 
+def test_execution_compiles_trees():
+    def generate_lots_of_integers():
+        # More than what fits in a queue, which would block a single thread.
+        yield from range(20000)
+
+    graph = Graph(generate_lots_of_integers, square)
+    graph.add_chain(count, _input=square)
+    graph.add_chain(push_result, _input=square)
+    graph.add_chain(generate_integers, _output=push_result)
+
+    context = NaiveStrategy().execute(graph)
+
+    # Only roots and nodes with more than one input have a queue.
+    assert [node.fused for node in context] == [False, True, True, False, False]
+    assert [dict(node.get_statistics())["in"] for node in context] == [1, 20000, 19999, 19999 + 10, 1]
+    assert sorted(context.results) == sorted([i ** 2 for i in range(1, 20000)] + list(range(10)))
+    assert not context.xstatus
+
+
+def test_execution_compiles_deep_trees():
+    # Much deeper than what nested calls can run, some nodes read from a (naive) queue again.
+    graph = Graph(generate_integers, *([noop] * 100))
+    graph.add_chain(*([noop] * 100), push_result, _input=50)
+
+    context = NaiveStrategy().execute(graph)
+
+    assert not all(node.fused for node in context[1:])
+    assert context.results == list(range(10))
+    assert not context.xstatus
+
+
 def test_simple_execution_context():
     graph = Graph()
     graph.add_chain(*chain)
@@ -78,3 +126,234 @@ def test_simple_execution_context():
     assert not context.alive
     assert context.started
     assert context.stopped
+
+
+def test_execution_with_threadpool_keeps_row_order():
+    graph = Graph()
+    graph.add_chain(generate_many_integers, square, push_result)
+
+    strategy = ThreadPoolExecutorStrategy()
+    ctx = strategy.execute(graph)
+
+    assert ctx.results == [i ** 2 for i in range(1, 2000)]
+
+
+def test_execution_with_threadpool_returns_when_done():
+    ticks = []
+
+    class TickCounter(Plugin):
+        def register(self, dispatcher):
+            dispatcher.add_listener(events.TICK, lambda event: ticks.append(time.time()))
+
+    def slow(i):
+        time.sleep(0.01)
+
+    graph = Graph(generate_integers, slow)
+    # Default services are not measured (importing them may take longer than a tick).
+    services = {"fs": None, "http": None}
+
+    start = time.time()
+    ThreadPoolExecutorStrategy(tick_period=0.02).execute(graph, plugins=[TickCounter], services=services)
+    duration = time.time() - start
+
+    # No waiting for a full tick period once nodes are done, but plugins still get ticks in the meantime.
+    assert duration < GraphExecutionContext.TICK_PERIOD
+    assert len(ticks) >= 4
+
+
+def test_execution_with_fused_threadpool():
+    graph = Graph()
+    graph.add_chain(*chain)
+
+    strategy = FusedThreadPoolExecutorStrategy()
+    ctx = strategy.execute(graph)
+
+    assert [node.fused for node in ctx] == [False, True, True]
+    assert ctx.results == [1, 4, 9, 16, 25, 36, 49, 64, 81]
+
+
+def get_pid(i):
+    return i, os.getpid()
+
+
+def test_execution_with_processes(tmpdir):
+    filename = str(tmpdir.join("output.txt"))
+
+    def write(i, pid):
+        with open(filename, "a") as f:
+            f.write("{} {}\n".format(i, pid))
+
+    def fail_on_three(i):
+        if i == 3:
+            raise ValueError("three")
+        return i
+
+    graph = Graph(generate_integers, fail_on_three, get_pid)
+    graph.add_chain(write, _input=get_pid)
+    graph.add_chain(count, _input=get_pid)
+
+    strategy = ProcessStrategy()
+    assert strategy.get_groups(strategy.create_graph_execution_context(graph)) == {0: [0, 1, 2], 3: [3], 4: [4]}
+    ctx = strategy.execute(graph)
+
+    assert [dict(node.get_statistics())["in"] for node in ctx] == [1, 10, 8, 8, 8]
+    assert [dict(node.get_statistics())["err"] for node in ctx] == [0, 1, 0, 0, 0]
+    assert all(node.stopped for node in ctx)
+
+    with open(filename) as f:
+        rows = [line.split() for line in f]
+    assert sorted(int(i) for i, pid in rows) == [1, 2, 4, 5, 6, 7, 8, 9]
+    assert len(set(pid for i, pid in rows)) == 1
+    assert int(rows[0][1]) != os.getpid()
+
+
+def test_execution_with_processes_when_a_worker_dies():
+    def extract():
+        yield from range(50000)
+
+    def crash(i):
+        if i == 10:
+            os._exit(3)
+
+    # The crashing worker stops reading its queue, so the extract worker would wait forever for room in it.
+    graph = Graph(extract, crash)
+    graph.add_chain(count, _input=extract)
+
+    ctx = ProcessStrategy().execute(graph, plugins=[])
+
+    assert [node.state for node in ctx] == ["killed", "defunct", "killed"]
+    assert ctx.stopped
+    assert ctx.xstatus
+
+
+@use_context
+def check_fields(context, *row):
+    if context.get_input_fields() != ("id", "name"):
+        raise ValueError("Unexpected fields {!r}.".format(context.get_input_fields()))
+    return row
+
+
+def test_execution_with_processes_keeps_bag_types():
+    def extract():
+        yield {"id": 1, "name": "foo"}
+        yield {"id": 2, "name": "bar"}
+
+    graph = Graph(extract, UnpackItems(0), OrderFields(["id", "name"]), check_fields)
+
+    strategy = ProcessStrategy()
+    strategy.fuse = False
+    ctx = strategy.execute(graph)
+
+    assert [dict(node.get_statistics())["out"] for node in ctx] == [2, 2, 2, 2]
+    assert [dict(node.get_statistics())["err"] for node in ctx] == [0, 0, 0, 0]
+    assert not ctx.xstatus
+
+
+async def async_square(i):
+    await asyncio.sleep(0.001 * (i % 3))
+    return i ** 2
+
+
+async def async_range(i):
+    for j in range(i):
+        yield j
+
+
+def test_execution_with_asyncio():
+    graph = Graph()
+    graph.add_chain(generate_integers, async_square, async_range, square, push_result)
+
+    context = AsyncIOStrategy().execute(graph)
+
+    assert context.results == [j ** 2 for i in range(10) for j in range(i ** 2) if j]
+    assert not context.xstatus
+
+
+def test_execution_with_asyncio_concurrency():
+    graph = Graph()
+    graph.add_chain(generate_many_integers, async_square, push_result)
+    graph.set_parallelism(async_square, 50)
+
+    context = AsyncIOStrategy().execute(graph)
+
+    assert sorted(context.results) == [i ** 2 for i in range(1, 2000)]
+    assert dict(context[1].get_statistics()) == {"in": 2000, "out": 1999, "err": 0, "warn": 0, "queued": 0}
+
+
+def test_execution_with_asyncio_failing_to_create_the_context():
+    graph = Graph(generate_integers, async_square)
+    graph.set_parallelism(async_square, 2, ordered=True)
+
+    loops = []
+
+    def new_event_loop(new_event_loop=asyncio.new_event_loop):
+        loops.append(new_event_loop())
+        return loops[-1]
+
+    # The actual error, not one from the cleanup, which still happens.
+    with patch("asyncio.new_event_loop", new_event_loop), pytest.raises(NotImplementedError):
+        AsyncIOStrategy().execute(graph)
+    assert loops[0].is_closed()
+
+
+def test_execution_with_spilling_input():
+    def slow(i):
+        time.sleep(0.0001)
+        return i
+
+    def fast(i):
+        return i
+
+    graph = Graph(generate_many_integers, slow, push_result)
+    graph.add_chain(fast, _input=generate_many_integers)
+    graph.set_buffer_size(slow, 10, spill=True)
+
+    context = ThreadPoolExecutorStrategy().execute(graph)
+
+    assert isinstance(context[1].input, SpillingInput)
+    assert context.results == list(range(1, 2000))
+    assert dict(context[3].get_statistics())["in"] == 2000
+
+
+def test_execution_with_scheduler():
+    queued = []
+
+    @use_context
+    def check_capacity(context, i):
+        queued.append(context.input.qsize())
+        return i
+
+    graph = Graph(generate_many_integers, square, check_capacity, push_result)
+    graph.add_chain(square, count, _input=generate_many_integers)
+    graph.set_buffer_size(check_capacity, 10)
+
+    strategy = SchedulerStrategy(workers=2, quantum=5)
+    context = strategy.execute(graph)
+
+    assert context.results == [i ** 2 for i in range(1, 2000)]
+    assert [dict(node.get_statistics())["in"] for node in context] == [1, 2000, 1999, 1999, 2000, 1999]
+    assert max(queued) < 10 + 5
+    assert not context.xstatus
+
+
+def test_execution_with_scheduler_returns_when_done():
+    ticks = []
+
+    class TickCounter(Plugin):
+        def register(self, dispatcher):
+            dispatcher.add_listener(events.TICK, lambda event: ticks.append(time.time()))
+
+    def slow(i):
+        time.sleep(0.01)
+
+    graph = Graph(generate_integers, slow)
+    # Default services are not measured (importing them may take longer than a tick).
+    services = {"fs": None, "http": None}
+
+    start = time.time()
+    SchedulerStrategy(workers=2, tick_period=0.02).execute(graph, plugins=[TickCounter], services=services)
+    duration = time.time() - start
+
+    # Same as the threadpool strategy: the execution ends with the last node, not with the next tick.
+    assert duration < GraphExecutionContext.TICK_PERIOD
+    assert len(ticks) >= 4
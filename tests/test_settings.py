@@ -22,6 +22,15 @@ def test_to_bool():
     assert settings.to_bool("1")
 
 
+def test_to_bytes():
+    assert settings.to_bytes("") is None
+    assert settings.to_bytes(None) is None
+    assert settings.to_bytes("1000") == 1000
+    assert settings.to_bytes("2k") == 2048
+    assert settings.to_bytes("1.5M") == 1536 * 1024
+    assert settings.to_bytes("1G") == 1024 ** 3
+
+
 def test_setting():
     s = settings.Setting(TEST_SETTING)
     assert s.get() is None
@@ -1,4 +1,6 @@
-from bonobo.util.statistics import WithStatistics
+import pytest
+
+from bonobo.util.statistics import Counters, LatencyHistogram, WithStatistics, format_duration
 
 
 class MyThingWithStats(WithStatistics):
@@ -9,3 +11,43 @@ class MyThingWithStats(WithStatistics):
 def test_with_statistics():
     o = MyThingWithStats()
     assert o.get_statistics_as_string() == "foo=42 bar=69"
+
+
+def test_counters():
+    o = WithStatistics("in", "out")
+    o.increment("in")
+    o.increment("out", amount=3)
+    o.statistics.counts[o.statistics.slot("in")] += 1
+
+    assert isinstance(o.statistics, Counters)
+    assert dict(o.statistics) == {"in": 2, "out": 3}
+    assert list(o.get_statistics()) == [("in", 2), ("out", 3)]
+
+    o.statistics.update({"out": 0})
+    assert o.get_statistics_as_string() == "in=2"
+    with pytest.raises(KeyError):
+        o.increment("err")
+
+
+def test_latency_histogram():
+    latency = LatencyHistogram()
+    assert latency.percentile(50) == 0.0
+
+    for duration in (0.0000005, 0.000003, 0.000003, 0.000003, 0.002):
+        latency.add(duration)
+
+    assert len(latency) == 5
+    assert latency.as_dict() == {2 ** -20: 1, 2 ** -18: 3, 2 ** -8: 1}
+    assert latency.percentile(50) == 2 ** -18  # ~4µs
+    assert latency.percentile(99) == 2 ** -8  # ~4ms
+
+    other = LatencyHistogram(latency.counts)
+    other.update(latency)
+    other.add(0.0)
+    assert other.as_dict() == {2 ** -20: 3, 2 ** -18: 6, 2 ** -8: 2}
+
+
+def test_format_duration():
+    assert format_duration(0.0000042) == "4µs"
+    assert format_duration(0.0123) == "12.3ms"
+    assert format_duration(3.14159) == "3.14s"